@@ -0,0 +1,191 @@
+# admin_dashboard/activity_archive.py
+"""
+Activity log retention.
+
+Rows older than ACTIVITY_LOG_RETENTION_DAYS are moved out of ActivityLog into
+gzip-compressed JSONL files, one set per month, under
+ACTIVITY_LOG_ARCHIVE_DIR; an ActivityLogArchive row records each file. The
+live table stays small, and archived months are searched by streaming their
+files line by line (``read_archived``), never loading a month into memory.
+
+A month's rows are read, written to the file and deleted in one
+transaction, with the rows locked (SELECT ... FOR UPDATE where supported;
+SQLite serialises the writers), so a row changed meanwhile, e.g. by an undo,
+can't be deleted with a stale archived copy. If the delete doesn't remove
+exactly the rows written, the transaction rolls back and the file is
+removed. The file name carries the id range it covers, so a run interrupted
+before the commit simply writes it again.
+
+Run it daily from cron, e.g.
+``15 3 * * * cd /path/to/project && python manage.py archive_activity_logs``
+(or with ``--queue`` to hand the work to the run_jobs worker).
+"""
+import gzip
+import json
+import os
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ActivityLog, ActivityLogArchive
+
+
+RETENTION_DAYS = getattr(settings, 'ACTIVITY_LOG_RETENTION_DAYS', 180)
+
+ARCHIVED_FIELDS = [
+    'id', 'user_id', 'user__username', 'action', 'description', 'timestamp',
+    'content_type_id', 'object_id', 'object_repr', 'ip_address', 'user_agent',
+    'extra_data', 'changes_json', 'previous_state', 'new_state',
+    'can_undo', 'is_undone', 'undone_at', 'undone_by_id', 'undo_reason',
+]
+# Fields the archive search looks in (as the live activity log search does)
+SEARCHED_FIELDS = ['description', 'object_repr', 'user__username']
+
+
+def archive_dir():
+    return Path(getattr(settings, 'ACTIVITY_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'activity_logs'))
+
+
+def _month_start(value):
+    return value.replace(day=1)
+
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def retention_cutoff(days=None, now=None):
+    """Rows with a timestamp before this are archived."""
+    now = now or timezone.now()
+    return now - timedelta(days=RETENTION_DAYS if days is None else days)
+
+
+def _write_month(month, rows):
+    """Stream ``rows`` into a temporary file; returns its path and id range."""
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    temporary = directory / f'.activity-{month:%Y-%m}.{os.getpid()}.tmp'
+    first_id = last_id = None
+    count = 0
+    with gzip.open(temporary, 'wt', encoding='utf-8') as archive:
+        for row in rows:
+            archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+            first_id = row['id'] if first_id is None else first_id
+            last_id = row['id']
+            count += 1
+    return temporary, first_id, last_id, count
+
+
+class ArchiveMismatch(Exception):
+    """The rows deleted are not the rows written to the archive file."""
+
+
+def archive_month(month, cutoff):
+    """Move the rows of ``month`` older than ``cutoff`` into an archive file."""
+    logs = ActivityLog.objects.filter(
+        timestamp__gte=_aware(month),
+        timestamp__lt=min(_aware(_next_month(month)), cutoff),
+    )
+    temporary = path = None
+    try:
+        with transaction.atomic():
+            rows = logs.select_for_update().order_by('id').values(*ARCHIVED_FIELDS).iterator(chunk_size=2000)
+            temporary, first_id, last_id, count = _write_month(month, rows)
+            if not count:
+                temporary.unlink()
+                return None
+
+            path = archive_dir() / f'activity-{month:%Y-%m}-{first_id}-{last_id}.jsonl.gz'
+            os.replace(temporary, path)
+            archived = logs.filter(id__gte=first_id, id__lte=last_id)
+            span = archived.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+            archive, _ = ActivityLogArchive.objects.update_or_create(
+                path=str(path.relative_to(archive_dir())),
+                defaults={
+                    'month': month,
+                    'row_count': count,
+                    'first_id': first_id,
+                    'last_id': last_id,
+                    'first_timestamp': span['first'],
+                    'last_timestamp': span['last'],
+                },
+            )
+            _, deleted = archived.delete()
+            if deleted.get(ActivityLog._meta.label, 0) != count:
+                raise ArchiveMismatch(
+                    f"{month:%Y-%m}: wrote {count} rows but would delete "
+                    f"{deleted.get(ActivityLog._meta.label, 0)}"
+                )
+    except Exception:
+        for leftover in (temporary, path):
+            if leftover is not None:
+                leftover.unlink(missing_ok=True)
+        raise
+    return archive
+
+
+def archive_old_logs(days=None, now=None):
+    """
+    Background task / command: archive every row past the retention period,
+    month by month. Returns ``(True, message)``.
+    """
+    cutoff = retention_cutoff(days, now)
+    months = ActivityLog.objects.filter(timestamp__lt=cutoff).aggregate(
+        oldest=Min('timestamp'), total=Count('id')
+    )
+    if not months['total']:
+        return True, "No activity logs to archive"
+
+    archives = []
+    month = _month_start(timezone.localdate(months['oldest']))
+    while _aware(month) < cutoff:
+        archive = archive_month(month, cutoff)
+        if archive:
+            archives.append(archive)
+        month = _next_month(month)
+    archived = sum(archive.row_count for archive in archives)
+    return True, f"Archived {archived} activity log(s) into {len(archives)} file(s)"
+
+
+def _matches(row, search, action, user_id):
+    if action and row['action'] != action:
+        return False
+    if user_id and str(row['user_id']) != str(user_id):
+        return False
+    if search:
+        search = search.lower()
+        return any(search in (row.get(field) or '').lower() for field in SEARCHED_FIELDS)
+    return True
+
+
+def read_archived(start=None, end=None, search='', action='', user_id=None):
+    """
+    Yield archived rows (newest month first, by id within a month) whose
+    timestamp falls in [start, end), optionally filtered like the live view.
+    Only the files overlapping the range are opened, one line at a time.
+    """
+    archives = ActivityLogArchive.objects.all()
+    if start:
+        archives = archives.filter(last_timestamp__gte=start)
+    if end:
+        archives = archives.filter(first_timestamp__lt=end)
+    for archive in archives:
+        with gzip.open(archive_dir() / archive.path, 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                row = json.loads(line)
+                timestamp = parse_datetime(row['timestamp'])
+                if (start and timestamp < start) or (end and timestamp >= end):
+                    continue
+                if _matches(row, search, action, user_id):
+                    row['timestamp'] = timestamp
+                    yield row
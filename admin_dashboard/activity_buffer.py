@@ -0,0 +1,326 @@
+# admin_dashboard/activity_buffer.py
+"""
+Buffered writer for middleware activity logs.
+
+The middleware only appends a record to an in-process buffer, so logging
+adds no database write to the request. Records are inserted with one
+``bulk_create`` once ACTIVITY_LOG_BUFFER_SIZE of them are waiting or the
+oldest is ACTIVITY_LOG_FLUSH_SECONDS old: checked when a request finishes
+(after the response has gone out), by an idle timer thread, and at exit.
+
+Every record is also appended to a write-ahead file of its process under
+ACTIVITY_LOG_WAL_DIR before ``record`` returns, and that file is removed
+once its records have been written. If the process is killed before it could
+flush (SIGKILL, OOM, worker recycling), the next flush in any process finds
+the file of the dead process and writes its records, so a record is logged
+at least once. The file is not fsynced: it survives a process crash, not a
+power failure.
+
+If the batch insert fails, the records are inserted one by one, so a bad
+record cannot hold back the others. Records of users deleted since are kept
+with no user (as SET_NULL would have done). A record the database still
+rejects goes to the ACTIVITY_LOG_DEAD_LETTER file for inspection. When the
+database itself is unavailable, the remaining records go to the
+ACTIVITY_LOG_SPOOL file instead, and the next flush loads them first.
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import ActivityLog
+
+
+logger = logging.getLogger(__name__)
+
+BUFFER_SIZE = getattr(settings, 'ACTIVITY_LOG_BUFFER_SIZE', 50)
+FLUSH_SECONDS = getattr(settings, 'ACTIVITY_LOG_FLUSH_SECONDS', 5)
+MAX_CHANGES_LENGTH = 5000
+
+_lock = threading.Lock()
+_pending = []
+_oldest = None
+_timer = None
+# This process's (pid, owner) and open write-ahead file
+_process = None
+_wal = None
+_batches = itertools.count(1)
+
+
+def _spool_path():
+    return Path(getattr(settings, 'ACTIVITY_LOG_SPOOL', settings.BASE_DIR / 'logs' / 'activity_spool.jsonl'))
+
+
+def _wal_dir():
+    return Path(getattr(settings, 'ACTIVITY_LOG_WAL_DIR', settings.BASE_DIR / 'logs' / 'activity_wal'))
+
+
+def _dead_letter_path():
+    return Path(getattr(settings, 'ACTIVITY_LOG_DEAD_LETTER', settings.BASE_DIR / 'logs' / 'activity_dead_letter.jsonl'))
+
+
+def _changes_json(changes):
+    # Encoding is deferred to the flush, off the request path
+    try:
+        data = json.dumps(changes, default=str)
+    except Exception:
+        return '{}'
+    if len(data) > MAX_CHANGES_LENGTH:
+        return json.dumps({'note': 'Data too large to store'})
+    return data
+
+
+def _to_row(record):
+    return ActivityLog(
+        user_id=record['user_id'],
+        action=record['action'],
+        description=record['description'],
+        timestamp=parse_datetime(record['timestamp']),
+        ip_address=record['ip_address'],
+        user_agent=record['user_agent'],
+        changes_json=record.get('changes_json') or _changes_json(record.get('changes', {})),
+    )
+
+
+def _spool(records, path=None):
+    path = path or _spool_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('a', encoding='utf-8') as spool:
+        for record in records:
+            spool.write(json.dumps(record, default=str) + '\n')
+
+
+def _take_spooled():
+    """Move the spool aside and return its records (empty when there is none)."""
+    path = _spool_path()
+    if not path.exists():
+        return []
+    claimed = path.with_suffix(f'.{threading.get_ident()}.replay')
+    path.replace(claimed)
+    with claimed.open(encoding='utf-8') as spool:
+        records = [json.loads(line) for line in spool if line.strip()]
+    claimed.unlink()
+    return records
+
+
+def _owner(path):
+    # Write-ahead files are named '<owner>.jsonl' while being appended to and
+    # '<owner>.<n>.flushing' while their records are being inserted, where the
+    # owner is '<pid>-<start time>' of the process that holds them
+    return path.name.split('.', 1)[0]
+
+
+def _process_owner():
+    global _process, _wal
+    if _process is None or _process[0] != os.getpid():
+        # First call in this process, or in a worker forked after the import
+        _process = (os.getpid(), f'{os.getpid()}-{time.time_ns()}')
+        _wal = None
+    return _process[1]
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _write_ahead(entry):
+    """Append ``entry`` to this process's write-ahead file (called under _lock)."""
+    global _wal
+    owner = _process_owner()
+    if _wal is None:
+        directory = _wal_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        _wal = (directory / f'{owner}.jsonl').open('a', encoding='utf-8')
+    _wal.write(json.dumps(entry, default=str) + '\n')
+    _wal.flush()
+
+
+def _flushing_path():
+    return _wal_dir() / f'{_process_owner()}.{next(_batches)}.flushing'
+
+
+def _rotate_wal():
+    """Set aside the write-ahead file of the records being flushed (called under _lock)."""
+    global _wal
+    if _wal is None or _process[0] != os.getpid():
+        return []
+    _wal.close()
+    flushing = _flushing_path()
+    Path(_wal.name).replace(flushing)
+    _wal = None
+    return [flushing]
+
+
+def _take_orphaned():
+    """Claim the write-ahead files of dead processes; returns (records, files)."""
+    directory = _wal_dir()
+    if not directory.exists():
+        return [], []
+    own = _process_owner()
+    records, claimed = [], []
+    for path in directory.iterdir():
+        owner = _owner(path)
+        pid = owner.split('-', 1)[0]
+        if owner == own or not pid.isdigit():
+            continue
+        # An owner with our pid but another start time was an earlier process
+        if int(pid) != os.getpid() and _alive(int(pid)):
+            continue
+        target = _flushing_path()
+        try:
+            path.replace(target)
+        except FileNotFoundError:
+            # Claimed by another process first
+            continue
+        with target.open(encoding='utf-8') as wal:
+            records.extend(json.loads(line) for line in wal if line.strip())
+        claimed.append(target)
+    return records, claimed
+
+
+def record(user, action, description, timestamp, ip_address=None, user_agent='', changes=None):
+    """Queue one activity log row; never touches the database."""
+    global _oldest
+    entry = {
+        'user_id': user.pk,
+        'action': action,
+        'description': description,
+        'timestamp': timestamp.isoformat(),
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'changes': changes or {},
+    }
+    with _lock:
+        _pending.append(entry)
+        try:
+            _write_ahead(entry)
+        except Exception:
+            logger.exception("Could not write the activity log write-ahead file")
+        if _oldest is None:
+            _oldest = time.monotonic()
+        _start_timer()
+
+
+def _due():
+    return len(_pending) >= BUFFER_SIZE or (
+        _oldest is not None and time.monotonic() - _oldest >= FLUSH_SECONDS
+    )
+
+
+def _drop_deleted_users(records):
+    user_ids = {entry['user_id'] for entry in records if entry['user_id'] is not None}
+    existing = set(get_user_model().objects.filter(id__in=user_ids).values_list('id', flat=True))
+    for entry in records:
+        if entry['user_id'] not in existing:
+            entry['user_id'] = None
+
+
+def _insert_one_by_one(records):
+    """Returns (written, rejected, unwritten) after inserting each record alone."""
+    written, rejected = 0, []
+    for position, entry in enumerate(records):
+        try:
+            with transaction.atomic():
+                _to_row(entry).save()
+        except (IntegrityError, DataError, KeyError, TypeError, ValueError):
+            rejected.append(entry)
+        except Exception:
+            # The database is unavailable: keep the rest for the next flush
+            logger.exception("Activity log insert failed")
+            return written, rejected, records[position:]
+        else:
+            written += 1
+    return written, rejected, []
+
+
+def _encoded(records):
+    for entry in records:
+        entry.setdefault('changes_json', _changes_json(entry.pop('changes', {})))
+    return records
+
+
+def _write(records):
+    """Insert ``records``; whatever can't be inserted is spooled or dead-lettered."""
+    try:
+        _drop_deleted_users(records)
+        with transaction.atomic():
+            ActivityLog.objects.bulk_create([_to_row(entry) for entry in records])
+    except Exception:
+        logger.exception("Activity log batch insert failed; inserting %s records one by one", len(records))
+        written, rejected, unwritten = _insert_one_by_one(records)
+        if rejected:
+            logger.error("%s activity log records rejected; see %s", len(rejected), _dead_letter_path())
+            _spool(_encoded(rejected), _dead_letter_path())
+        if unwritten:
+            _spool(_encoded(unwritten))
+        return written
+    return len(records)
+
+
+def flush():
+    """Write every waiting record; returns how many were written."""
+    global _oldest
+    with _lock:
+        records = _pending[:]
+        _pending.clear()
+        _oldest = None
+        done_files = _rotate_wal()
+    try:
+        orphaned, claimed = _take_orphaned()
+        records = orphaned + records
+        done_files += claimed
+    except Exception:
+        logger.exception("Could not read the activity log write-ahead files")
+    try:
+        records = _take_spooled() + records
+    except Exception:
+        logger.exception("Could not read the activity log spool")
+    written = _write(records) if records else 0
+    # Every record is now in the database, the spool or the dead-letter file
+    for path in done_files:
+        path.unlink(missing_ok=True)
+    return written
+
+
+def flush_if_due(**kwargs):
+    if _due():
+        flush()
+
+
+def _timer_flush():
+    global _timer
+    _timer = None
+    try:
+        flush()
+    finally:
+        # The timer thread has its own connection; don't leave it open
+        connection.close()
+
+
+def _start_timer():
+    # Flushes a quiet process whose buffer would otherwise wait for the next request
+    global _timer
+    if _timer is None and FLUSH_SECONDS:
+        _timer = threading.Timer(FLUSH_SECONDS, _timer_flush)
+        _timer.daemon = True
+        _timer.start()
+
+
+request_finished.connect(flush_if_due, dispatch_uid='activity_log_flush')
+atexit.register(flush)
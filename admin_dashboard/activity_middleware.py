@@ -1,8 +1,10 @@
 # admin_dashboard/activity_middleware.py
+from functools import lru_cache
+
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib.contenttypes.models import ContentType
-from .models import ActivityLog
-import json
+from . import activity_buffer
 
 
 class ActivityLoggingMiddleware(MiddlewareMixin):
@@ -10,48 +12,47 @@ class ActivityLoggingMiddleware(MiddlewareMixin):
     Middleware to automatically log user activities across the system
     """
     
-    # Actions that should be logged
-    LOGGED_PATHS = {
+    # Actions that should be logged, first matching path fragment wins
+    LOGGED_PATHS = (
         # Authentication
-        '/accounts/login/': 'LOGIN',
-        '/accounts/logout/': 'LOGOUT',
+        ('/accounts/login/', 'LOGIN'),
+        ('/accounts/logout/', 'LOGOUT'),
         
         # Team Management
-        '/teams/register/': 'TEAM_CREATE',
-        '/teams/edit/': 'TEAM_UPDATE',
-        '/teams/delete/': 'TEAM_DELETE',
+        ('/teams/register/', 'TEAM_CREATE'),
+        ('/teams/edit/', 'TEAM_UPDATE'),
+        ('/teams/delete/', 'TEAM_DELETE'),
         
         # Player Management
-        '/teams/player/add/': 'PLAYER_CREATE',
-        '/teams/player/edit/': 'PLAYER_UPDATE',
-        '/teams/player/delete/': 'PLAYER_DELETE',
-        '/teams/player/transfer/': 'PLAYER_TRANSFER',
+        ('/teams/player/add/', 'PLAYER_CREATE'),
+        ('/teams/player/edit/', 'PLAYER_UPDATE'),
+        ('/teams/player/delete/', 'PLAYER_DELETE'),
+        ('/teams/player/transfer/', 'PLAYER_TRANSFER'),
         
         # Match Management
-        '/matches/create/': 'MATCH_CREATE',
-        '/matches/edit/': 'MATCH_UPDATE',
-        '/matches/reschedule/': 'MATCH_RESCHEDULE',
+        ('/matches/create/', 'MATCH_CREATE'),
+        ('/matches/edit/', 'MATCH_UPDATE'),
+        ('/matches/reschedule/', 'MATCH_RESCHEDULE'),
         
-        # Match Reports
-        '/referees/match/': 'MATCH_REPORT',
+        # Match Reports and other referee match actions
+        ('/referees/match/', 'REFEREE_ACTION'),
         
         # Fixture Management
-        '/admin-dashboard/generate-fixtures/': 'FIXTURE_GENERATE',
+        ('/admin-dashboard/generate-fixtures/', 'FIXTURE_GENERATE'),
         
         # Squad Management
-        '/referees/matchday/squad/submit/': 'SQUAD_SUBMIT',
-        '/referees/matchday/referee/approve/': 'SQUAD_APPROVE',
+        ('/referees/matchday/squad/submit/', 'SQUAD_SUBMIT'),
+        ('/referees/matchday/referee/approve/', 'SQUAD_APPROVE'),
         
         # Referee Management
-        '/referees/match/': 'REFEREE_ACTION',
-        '/referees/register/': 'REFEREE_REGISTER',
+        ('/referees/register/', 'REFEREE_REGISTER'),
         
         # Payment Management
-        '/payments/': 'PAYMENT_ACTION',
+        ('/payments/', 'PAYMENT_ACTION'),
         
         # Admin Actions
-        '/admin-dashboard/': 'ADMIN_ACTION',
-    }
+        ('/admin-dashboard/', 'ADMIN_ACTION'),
+    )
     
     def process_response(self, request, response):
         """Log activity after successful requests"""
@@ -68,8 +69,8 @@ class ActivityLoggingMiddleware(MiddlewareMixin):
         if not (200 <= response.status_code < 400):
             return response
         
-        # Get the action type based on path
-        action = self._get_action_type(request.path)
+        # Get the action type from the resolved route
+        action = self._get_action_type(request)
         if not action:
             return response
         
@@ -82,15 +83,16 @@ class ActivityLoggingMiddleware(MiddlewareMixin):
         # Get user agent
         user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
         
-        # Create activity log
+        # Queue the activity log; it is written in a batch after the response
         try:
-            ActivityLog.objects.create(
+            activity_buffer.record(
                 user=request.user,
                 action=action,
                 description=description,
+                timestamp=timezone.now(),
                 ip_address=ip_address,
                 user_agent=user_agent,
-                changes_json=self._get_changes_json(request)
+                changes=self._get_changes(request)
             )
         except Exception as e:
             # Don't break the request if logging fails
@@ -98,9 +100,17 @@ class ActivityLoggingMiddleware(MiddlewareMixin):
         
         return response
     
-    def _get_action_type(self, path):
-        """Determine action type from request path"""
-        for path_pattern, action in self.LOGGED_PATHS.items():
+    def _get_action_type(self, request):
+        """Action type of the resolved route (None when it isn't logged)"""
+        match = request.resolver_match
+        if match is None:
+            return None
+        return route_actions(self.__class__).get(match.route)
+    
+    @classmethod
+    def classify(cls, path):
+        """Determine action type from a request path or route"""
+        for path_pattern, action in cls.LOGGED_PATHS:
             if path_pattern in path:
                 # Special handling for specific actions
                 if 'login' in path:
@@ -160,21 +170,36 @@ class ActivityLoggingMiddleware(MiddlewareMixin):
             ip = request.META.get('REMOTE_ADDR')
         return ip[:45]  # Max length of IP field
     
-    def _get_changes_json(self, request):
-        """Extract relevant data from POST request"""
-        try:
-            # Get POST data (excluding sensitive fields)
-            sensitive_fields = ['password', 'csrfmiddlewaretoken', 'password1', 'password2']
-            data = {
-                key: value for key, value in request.POST.items()
-                if key not in sensitive_fields and not key.startswith('_')
-            }
-            
-            # Limit size
-            data_str = json.dumps(data, default=str)
-            if len(data_str) > 5000:
-                return json.dumps({'note': 'Data too large to store'})
-            
-            return data_str
-        except Exception:
-            return '{}'
+    def _get_changes(self, request):
+        """Extract relevant data from POST request (JSON-encoded when flushed)"""
+        # Get POST data (excluding sensitive fields)
+        sensitive_fields = ['password', 'csrfmiddlewaretoken', 'password1', 'password2']
+        return {
+            key: value for key, value in request.POST.items()
+            if key not in sensitive_fields and not key.startswith('_')
+        }
+
+
+def _routes(patterns, prefix=''):
+    for pattern in patterns:
+        route = str(pattern.pattern)
+        # Joined the way the resolver builds ResolverMatch.route
+        route = prefix + (route[1:] if prefix and route.startswith('^') else route)
+        if isinstance(pattern, URLResolver):
+            yield from _routes(pattern.url_patterns, route)
+        else:
+            yield route
+
+
+@lru_cache(maxsize=None)
+def route_actions(middleware_class=ActivityLoggingMiddleware):
+    """
+    {route: action} for every logged route in the URLconf, keyed the way
+    ``request.resolver_match.route`` reports it. Built once per process.
+    """
+    actions = {}
+    for route in _routes(get_resolver().url_patterns):
+        action = middleware_class.classify('/' + route)
+        if action:
+            actions.setdefault(route, action)
+    return actions
@@ -2,6 +2,7 @@
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import user_passes_test
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
@@ -9,6 +10,7 @@ from django.contrib.auth import get_user_model
 from datetime import datetime, timedelta
 from django.utils import timezone
 from .models import ActivityLog
+from .search import ACTIVITY_LOG_INDEX
 from .undo_handlers import perform_undo
 
 User = get_user_model()
@@ -57,8 +59,7 @@ def activity_logs(request):
     
     if search_query:
         logs = logs.filter(
-            Q(description__icontains=search_query) |
-            Q(object_repr__icontains=search_query) |
+            ACTIVITY_LOG_INDEX.q(search_query) |
             Q(user__username__icontains=search_query)
         )
     
@@ -104,6 +105,79 @@ def activity_logs(request):
     return render(request, 'admin_dashboard/activity_logs.html', context)
 
 
+@staff_member_required
+def activity_log_archive(request):
+    """Search activity logs moved to the monthly archive files"""
+    from itertools import islice
+    from .activity_archive import RETENTION_DAYS, read_archived
+    from .models import ActivityLogArchive
+    
+    per_page = 50
+    month_filter = request.GET.get('month', '')
+    action_filter = request.GET.get('action', '')
+    search_query = request.GET.get('search', '')
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page_number = 1
+    
+    start = end = None
+    if month_filter:
+        try:
+            month = datetime.strptime(month_filter, '%Y-%m').date()
+            start = timezone.make_aware(datetime.combine(month, datetime.min.time()))
+            end = timezone.make_aware(datetime.combine((month + timedelta(days=32)).replace(day=1), datetime.min.time()))
+        except ValueError:
+            month_filter = ''
+    
+    # Read one row past the page to know whether there is a next page
+    rows = list(islice(
+        read_archived(start, end, search=search_query, action=action_filter),
+        (page_number - 1) * per_page, page_number * per_page + 1,
+    ))
+    
+    context = {
+        'logs': rows[:per_page],
+        'page_number': page_number,
+        'has_next': len(rows) > per_page,
+        'archives': ActivityLogArchive.objects.all(),
+        'months': ActivityLogArchive.objects.dates('month', 'month', order='DESC'),
+        'action_choices': ActivityLog.ACTION_CHOICES,
+        'retention_days': RETENTION_DAYS,
+        'month_filter': month_filter,
+        'action_filter': action_filter,
+        'search_query': search_query,
+    }
+    
+    return render(request, 'admin_dashboard/activity_log_archive.html', context)
+
+
+@staff_member_required
+def api_search_activity_logs(request):
+    """Activity logs matching ?q=, best match first (JSON)"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        limit = 20
+    logs = ACTIVITY_LOG_INDEX.search(query, limit, ActivityLog.objects.select_related('user')) if query else []
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {
+                'id': log.id,
+                'timestamp': log.timestamp.isoformat(),
+                'user': log.user.username if log.user else None,
+                'action': log.action,
+                'action_display': log.get_action_display(),
+                'description': log.description,
+                'object_repr': log.object_repr,
+            }
+            for log in logs
+        ],
+    })
+
+
 @staff_member_required
 def activity_log_detail(request, log_id):
     """Display detailed information about a specific log entry"""
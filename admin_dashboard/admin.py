@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import ActivityLog
+from django.utils import timezone
+from .models import ActivityLog, ActivityLogArchive, BackgroundJob
 
 
 @admin.register(ActivityLog)
@@ -24,3 +25,36 @@ class ActivityLogAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         return request.user.is_superuser  # Only superusers can delete logs
+
+
+@admin.register(ActivityLogArchive)
+class ActivityLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('month', 'row_count', 'first_timestamp', 'last_timestamp', 'path', 'created_at')
+    ordering = ('-month', 'first_id')
+    
+    def has_add_permission(self, request):
+        return False  # Written by the archive_activity_logs command
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'created_by', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'dedupe_key', 'error')
+    readonly_fields = ('task', 'args', 'kwargs', 'dedupe_key', 'status', 'attempts', 'result', 'error',
+                       'created_by', 'created_at', 'started_at', 'finished_at')
+    ordering = ('-created_at',)
+    actions = ['retry_jobs']
+
+    @admin.action(description="🔁 Retry selected failed jobs")
+    def retry_jobs(self, request, queryset):
+        retried = queryset.filter(status='failed').update(
+            status='queued', attempts=0, error='', run_after=timezone.now(), started_at=None, finished_at=None
+        )
+        self.message_user(request, f"✅ Re-queued {retried} job(s)")
+
+    def has_add_permission(self, request):
+        return False  # Jobs are queued by the application
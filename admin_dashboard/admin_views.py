@@ -3,8 +3,9 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from teams.models import Zone, Team
 from matches.models import Match
-from matches.utils.fixture_generator import generate_fixtures_for_zone
+from matches.utils.fixture_generator import queue_zone_fixtures
 from .activity_logger import log_activity, get_client_ip
+from .jobs import enqueue
 
 @staff_member_required
 def generate_fixtures_admin(request):
@@ -15,6 +16,20 @@ def generate_fixtures_admin(request):
         zone_id = request.POST.get('zone_id')
         regenerate = request.POST.get('regenerate') == 'true'
         
+        if request.POST.get('generate_all') == 'true':
+            # Season kickoff: every pending zone with enough teams, in one
+            # batch run by the job worker
+            job = enqueue('generate_all_fixtures', user=request.user, dedupe_key='fixtures:all')
+            messages.info(request, f'⏳ Fixture generation for all ready zones queued (job #{job.id}).')
+            log_activity(
+                user=request.user,
+                action='FIXTURE_GENERATE',
+                description='Queued fixture generation for all ready zones',
+                ip_address=get_client_ip(request),
+                extra_data={'job_id': job.id}
+            )
+            return redirect('admin_dashboard:generate_fixtures_admin')
+        
         if zone_id:
             try:
                 zone = Zone.objects.get(id=zone_id)
@@ -33,7 +48,7 @@ def generate_fixtures_admin(request):
                             f'Cannot generate fixtures for {zone.name}. At least 2 approved teams are required (currently has {approved_teams}).'
                         )
                     else:
-                        # If regenerating, delete existing fixtures
+                        # A regeneration deletes the zone's fixtures: not once any were played
                         if regenerate and zone.fixtures_generated:
                             existing_matches = Match.objects.filter(zone=zone)
                             
@@ -55,62 +70,26 @@ def generate_fixtures_admin(request):
                                 )
                                 return redirect('admin_dashboard:generate_fixtures_admin')
                             
-                            # Delete existing fixtures and reset zone status
-                            deleted_count = existing_matches.count()
-                            existing_matches.delete()
-                            zone.fixtures_generated = False
-                            zone.fixture_generation_date = None
-                            zone.save()
-                            messages.info(request, f'Deleted {deleted_count} existing fixtures for {zone.name}.')
-                            
-                            # Log fixture deletion
-                            log_activity(
-                                user=request.user,
-                                action='FIXTURE_DELETE',
-                                description=f'Deleted {deleted_count} fixtures for {zone.name} before regeneration',
-                                obj=zone,
-                                ip_address=get_client_ip(request),
-                                extra_data={'zone_id': zone.id, 'deleted_count': deleted_count}
-                            )
-                        
-                        # Generate fixtures
-                        success, message = generate_fixtures_for_zone(zone_id)
-                        if success:
-                            # Count generated matches
-                            match_count = Match.objects.filter(zone=zone).count()
-                            action = 'Regenerated' if regenerate else 'Generated'
-                            messages.success(
-                                request, 
-                                f'✓ Successfully {action.lower()} {match_count} fixtures for {zone.name}! {message}'
-                            )
-                            
-                            # Log successful fixture generation
-                            log_activity(
-                                user=request.user,
-                                action='FIXTURE_REGENERATE' if regenerate else 'FIXTURE_GENERATE',
-                                description=f'{action} {match_count} fixtures for {zone.name}',
-                                obj=zone,
-                                ip_address=get_client_ip(request),
-                                extra_data={
-                                    'zone_id': zone.id,
-                                    'match_count': match_count,
-                                    'approved_teams': approved_teams,
-                                    'regenerated': regenerate
-                                }
-                            )
-                        else:
-                            messages.error(request, f'Failed to generate fixtures: {message}')
-                            
-                            # Log failed fixture generation
-                            log_activity(
-                                user=request.user,
-                                action='FIXTURE_GENERATE',
-                                description=f'Failed to generate fixtures for {zone.name}: {message}',
-                                obj=zone,
-                                ip_address=get_client_ip(request),
-                                extra_data={'zone_id': zone.id, 'error': message}
-                            )
-                            
+                        # Deleting and generating a season is the job worker's
+                        # work (run_jobs); the request only queues it
+                        regenerating = regenerate and zone.fixtures_generated
+                        job = queue_zone_fixtures(zone.id, user=request.user, regenerate=regenerating)
+                        action = 'regeneration' if regenerating else 'generation'
+                        messages.info(request, f'⏳ Fixture {action} for {zone.name} queued (job #{job.id}).')
+                        log_activity(
+                            user=request.user,
+                            action='FIXTURE_REGENERATE' if regenerating else 'FIXTURE_GENERATE',
+                            description=f'Queued fixture {action} for {zone.name}',
+                            obj=zone,
+                            ip_address=get_client_ip(request),
+                            extra_data={
+                                'zone_id': zone.id,
+                                'job_id': job.id,
+                                'approved_teams': approved_teams,
+                                'regenerated': regenerating
+                            }
+                        )
+                
             except Zone.DoesNotExist:
                 messages.error(request, 'Zone not found.')
             except Exception as e:
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.core.management import call_command
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, **kwargs):
+    from .search import ACTIVITY_LOG_INDEX
+    ACTIVITY_LOG_INDEX.ensure()
+
+
+def ensure_cache_table(sender, using='default', verbosity=1, **kwargs):
+    # No-op when the table already exists
+    call_command('createcachetable', database=using, verbosity=verbosity)
 
 
 class AdminDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_dashboard'
+
+    def ready(self):
+        # Full-text index and its triggers live outside the migrations
+        post_migrate.connect(ensure_search_index, sender=self)
+        # So is the shared cache table (settings.CACHES)
+        post_migrate.connect(ensure_cache_table, sender=self)
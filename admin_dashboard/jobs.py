@@ -0,0 +1,137 @@
+# admin_dashboard/jobs.py
+"""
+Database-backed background job queue.
+
+Requests only insert a BackgroundJob row (``enqueue``); the ``run_jobs``
+management command claims queued rows and runs them, so slow work such as
+generating a season of fixtures never happens inside a request. Tasks are
+referred to by name and resolved through TASKS, which keeps this module free
+of imports from the apps whose work it runs.
+"""
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob
+
+
+TASKS = {
+    'generate_zone_fixtures': 'matches.utils.fixture_generator.generate_fixtures_for_zone',
+    'regenerate_zone_fixtures': 'matches.utils.fixture_generator.regenerate_fixtures_for_zone',
+    'generate_all_fixtures': 'matches.utils.fixture_generator.generate_fixtures_for_all_zones',
+    'rebuild_league_table': 'matches.standings.rebuild_league_table',
+    'verify_league_table': 'matches.standings.verify_league_table',
+    'render_pdf': 'referees.pdf_reports.render_pdf',
+    'archive_activity_logs': 'admin_dashboard.activity_archive.archive_old_logs',
+}
+
+RETRY_DELAY = timedelta(seconds=30)
+# A job still 'running' after this long belongs to a worker that died
+STALE_AFTER = timedelta(minutes=30)
+
+
+def enqueue(task, *args, user=None, dedupe_key='', delay=None, **kwargs):
+    """
+    Queue ``task`` to be run by the worker with ``args``/``kwargs`` (which must
+    be JSON-serialisable). When ``dedupe_key`` is given and a job with the same
+    key is still waiting, that job is returned instead of queueing another.
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown background task: {task}")
+
+    if dedupe_key:
+        waiting = BackgroundJob.objects.filter(dedupe_key=dedupe_key, status='queued').first()
+        if waiting:
+            return waiting
+
+    return BackgroundJob.objects.create(
+        task=task,
+        args=list(args),
+        kwargs=kwargs,
+        dedupe_key=dedupe_key,
+        created_by=user if user is not None and user.is_authenticated else None,
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+
+
+def requeue_stale_jobs():
+    """Put jobs abandoned by a crashed worker back in the queue."""
+    return BackgroundJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - STALE_AFTER
+    ).update(status='queued', started_at=None)
+
+
+def claim_next_job():
+    """
+    Take the oldest job that is due. The claim is a conditional UPDATE on the
+    status, so two workers polling at once can never both get the same job.
+    """
+    while True:
+        now = timezone.now()
+        job_id = BackgroundJob.objects.filter(
+            status='queued', run_after__lte=now
+        ).order_by('run_after', 'id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        claimed = BackgroundJob.objects.filter(id=job_id, status='queued').update(
+            status='running', started_at=now, attempts=F('attempts') + 1
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=job_id)
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome. Tasks following the repo's
+    ``(success, message, ...)`` convention fail without retrying when they
+    report success=False; exceptions are retried with a growing delay until
+    ``max_attempts`` is reached.
+    """
+    try:
+        outcome = import_string(TASKS[job.task])(*job.args, **job.kwargs)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.started_at = None
+            job.run_after = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+            job.save(update_fields=['status', 'error', 'started_at', 'run_after'])
+            return job
+        job.status = 'failed'
+    else:
+        job.result = outcome
+        job.status = 'succeeded'
+        job.error = ''
+        if isinstance(outcome, tuple) and outcome and isinstance(outcome[0], bool) and not outcome[0]:
+            job.status = 'failed'
+            job.error = str(outcome[1]) if len(outcome) > 1 else ''
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    return job
+
+
+def run_pending_jobs(limit=None):
+    """Run due jobs until the queue is empty (or ``limit`` jobs ran)."""
+    requeue_stale_jobs()
+    processed = 0
+    while limit is None or processed < limit:
+        close_old_connections()
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def job_status_counts():
+    """Number of jobs per status, e.g. {'queued': 2, 'running': 0, ...}."""
+    counts = dict.fromkeys([status for status, _ in BackgroundJob.STATUS_CHOICES], 0)
+    for row in BackgroundJob.objects.values('status').annotate(total=Count('id')).order_by():
+        counts[row['status']] = row['total']
+    return counts
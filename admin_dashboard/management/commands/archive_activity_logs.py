@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from admin_dashboard.activity_archive import RETENTION_DAYS, archive_old_logs
+
+
+class Command(BaseCommand):
+    help = (
+        'Move activity logs past the retention period into monthly compressed archive files. '
+        'Run daily from cron, e.g. "15 3 * * * cd /path/to/project && python manage.py '
+        'archive_activity_logs --queue"'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS,
+                            help=f'Keep this many days in the live table (default {RETENTION_DAYS})')
+        parser.add_argument('--queue', action='store_true',
+                            help='Queue the archiving for the run_jobs worker instead of running it here')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            from admin_dashboard.jobs import enqueue
+
+            job = enqueue('archive_activity_logs', days=options['days'], dedupe_key='archive_activity_logs')
+            self.stdout.write(self.style.SUCCESS(f"Queued activity log archiving (job #{job.id})"))
+            return
+        success, message = archive_old_logs(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(message) if success else self.style.ERROR(message))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from admin_dashboard.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (fixture generation, league table rebuilds, verification)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due and exit')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, help='Exit after running this many jobs')
+
+    def handle(self, *args, **options):
+        remaining = options['max_jobs']
+        total = 0
+        while remaining is None or remaining > 0:
+            processed = run_pending_jobs(limit=remaining)
+            total += processed
+            if remaining is not None:
+                remaining -= processed
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Ran {total} background job(s)'))
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
@@ -189,3 +190,89 @@ class ActivityLog(models.Model):
         if days_old > 7:
             return False
         return True
+
+
+class ActivityLogArchive(models.Model):
+    """
+    One compressed JSONL file of activity logs moved out of the live table
+    (see admin_dashboard/activity_archive.py). Files hold a single month.
+    """
+    month = models.DateField(help_text="First day of the month the rows belong to")
+    path = models.CharField(max_length=255, unique=True)
+    row_count = models.PositiveIntegerField(default=0)
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    first_timestamp = models.DateTimeField()
+    last_timestamp = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-month', 'first_id']
+        verbose_name = 'Activity Log Archive'
+        verbose_name_plural = 'Activity Log Archives'
+
+    def __str__(self):
+        return f"{self.month:%B %Y} ({self.row_count} logs)"
+
+
+class BackgroundJob(models.Model):
+    """
+    Work queued by a request and run later by the ``run_jobs`` worker
+    (fixture generation, league-table rebuilds, verification, ...)
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    # Jobs sharing a key are not queued twice while one is still waiting
+    dedupe_key = models.CharField(max_length=200, blank=True, db_index=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='background_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_queue_idx'),
+        ]
+        verbose_name = 'Background Job'
+        verbose_name_plural = 'Background Jobs'
+
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.get_status_display()})"
+
+    @property
+    def status_class(self):
+        return {
+            'queued': 'secondary',
+            'running': 'info',
+            'succeeded': 'success',
+            'failed': 'danger',
+        }.get(self.status, 'secondary')
+
+    @property
+    def duration(self):
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
+        return None
@@ -0,0 +1,12 @@
+# admin_dashboard/search.py
+"""Full-text index over activity log descriptions (see fkf_league.search)."""
+from fkf_league.search import FtsIndex
+
+from .models import ActivityLog
+
+
+# Trigram tokens so part of a word still matches ("rated" finds "generated"),
+# as the description__icontains search it replaces did
+ACTIVITY_LOG_INDEX = FtsIndex(
+    'activity_log_fts', ActivityLog, ['description', 'object_repr'], tokenize='trigram',
+)
@@ -1,3 +1,414 @@
-from django.test import TestCase
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.db import OperationalError, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from admin_dashboard import activity_archive, activity_buffer, jobs
+from admin_dashboard.activity_middleware import ActivityLoggingMiddleware, route_actions
+from admin_dashboard.models import ActivityLog, ActivityLogArchive, BackgroundJob
+from admin_dashboard.search import ACTIVITY_LOG_INDEX
+from matches.models import Match
+from fkf_league.search import FtsIndex
+from fkf_league.testing import isolate_activity_log, make_team
+from teams.models import Zone
+
+
+def failing_task(*args, **kwargs):
+    raise RuntimeError("worker blew up")
+
+
+def rejecting_task(*args, **kwargs):
+    return False, "Nothing to do"
+
+
+def echo_task(*args, **kwargs):
+    return True, "done", {'args': list(args), 'kwargs': kwargs}
+
+
+TEST_TASKS = {
+    'fail': 'admin_dashboard.tests.failing_task',
+    'reject': 'admin_dashboard.tests.rejecting_task',
+    'echo': 'admin_dashboard.tests.echo_task',
+}
+
+
+@mock.patch.dict(jobs.TASKS, TEST_TASKS)
+class JobQueueTests(TestCase):
+    def test_enqueue_rejects_unknown_tasks(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no_such_task')
+
+    def test_waiting_job_is_reused_for_the_same_dedupe_key(self):
+        first = jobs.enqueue('echo', 1, dedupe_key='echo:1')
+        self.assertEqual(jobs.enqueue('echo', 1, dedupe_key='echo:1').id, first.id)
+
+        jobs.run_pending_jobs()
+        self.assertNotEqual(jobs.enqueue('echo', 1, dedupe_key='echo:1').id, first.id)
+
+    def test_claim_takes_each_due_job_once(self):
+        due = jobs.enqueue('echo')
+        jobs.enqueue('echo', delay=timedelta(hours=1))
+
+        claimed = jobs.claim_next_job()
+
+        self.assertEqual(claimed.id, due.id)
+        self.assertEqual((claimed.status, claimed.attempts), ('running', 1))
+        self.assertIsNotNone(claimed.started_at)
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_successful_job_stores_its_result(self):
+        job = jobs.enqueue('echo', 2, zone='A')
+
+        self.assertEqual(jobs.run_pending_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result, [True, 'done', {'args': [2], 'kwargs': {'zone': 'A'}}])
+        self.assertIsNotNone(job.finished_at)
+
+    def test_exception_is_retried_with_backoff_then_fails(self):
+        job = jobs.enqueue('fail')
+
+        jobs.run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('worker blew up', job.error)
+        self.assertGreater(job.run_after, timezone.now())
+        # Not due yet: nothing runs
+        self.assertEqual(jobs.run_pending_jobs(), 0)
+
+        for attempt in (2, 3):
+            BackgroundJob.objects.filter(id=job.id).update(run_after=timezone.now())
+            jobs.run_pending_jobs()
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_task_reporting_failure_is_not_retried(self):
+        job = jobs.enqueue('reject')
+
+        jobs.run_pending_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), ('failed', 1, 'Nothing to do'))
+
+    def test_job_of_a_dead_worker_is_requeued(self):
+        job = jobs.enqueue('echo')
+        jobs.claim_next_job()
+        BackgroundJob.objects.filter(id=job.id).update(started_at=timezone.now() - jobs.STALE_AFTER * 2)
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        self.assertEqual(jobs.run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('succeeded', 2))
+
+
+class FixtureGenerationQueueTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone Q')
+
+    def test_fourth_approved_team_queues_generation_on_commit(self):
+        for _ in range(3):
+            make_team(self.zone)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            make_team(self.zone)
+
+        self.assertEqual(len(callbacks), 1)
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.task, job.args), ('generate_zone_fixtures', [self.zone.id]))
+
+    def test_rolled_back_approval_queues_nothing(self):
+        for _ in range(3):
+            make_team(self.zone)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                make_team(self.zone)
+                raise RuntimeError("approval failed")
+
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_admin_page_queues_generation_and_regeneration(self):
+        isolate_activity_log(self)
+        for _ in range(2):
+            make_team(self.zone)
+        admin = User.objects.create_user('league-admin', is_staff=True)
+        self.client.force_login(admin)
+        url = reverse('admin_dashboard:generate_fixtures_admin')
+
+        self.client.post(url, {'zone_id': self.zone.id})
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.task, job.args), ('generate_zone_fixtures', [self.zone.id]))
+        self.assertFalse(Match.objects.exists())
+
+        jobs.run_pending_jobs()
+        self.assertEqual(Match.objects.filter(zone=self.zone).count(), 1)
+
+        self.client.post(url, {'zone_id': self.zone.id, 'regenerate': 'true'})
+        job = BackgroundJob.objects.get(status='queued')
+        self.assertEqual((job.task, job.args), ('regenerate_zone_fixtures', [self.zone.id]))
+        self.assertEqual(jobs.run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+
+
+class ActivityBufferTests(TestCase):
+    def setUp(self):
+        directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.wal_dir = directory / 'wal'
+        self.spool = directory / 'spool.jsonl'
+        self.dead_letter = directory / 'dead_letter.jsonl'
+        self.enterContext(override_settings(
+            ACTIVITY_LOG_WAL_DIR=self.wal_dir,
+            ACTIVITY_LOG_SPOOL=self.spool,
+            ACTIVITY_LOG_DEAD_LETTER=self.dead_letter,
+        ))
+        # No idle timer thread flushing behind the test's back
+        self.enterContext(mock.patch.object(activity_buffer, 'FLUSH_SECONDS', 0))
+        self.addCleanup(self.forget_buffer)
+        self.user = User.objects.create_user('clerk')
+
+    def forget_buffer(self):
+        with activity_buffer._lock:
+            activity_buffer._pending.clear()
+            activity_buffer._oldest = None
+            if activity_buffer._wal is not None:
+                activity_buffer._wal.close()
+                activity_buffer._wal = None
+
+    def record(self, description, user=None):
+        activity_buffer.record(user or self.user, 'OTHER', description, timezone.now(), '127.0.0.1', 'tests')
+
+    def test_flush_writes_records_and_clears_the_write_ahead_file(self):
+        self.record('first')
+        self.record('second')
+        self.assertEqual(len(list(self.wal_dir.iterdir())), 1)
+        self.assertFalse(ActivityLog.objects.exists())
+
+        self.assertEqual(activity_buffer.flush(), 2)
+
+        self.assertEqual(
+            sorted(ActivityLog.objects.values_list('description', 'user_id')),
+            [('first', self.user.id), ('second', self.user.id)],
+        )
+        self.assertEqual(list(self.wal_dir.iterdir()), [])
+
+    def test_records_spooled_while_the_database_is_down_are_written_next_time(self):
+        self.record('during outage')
+        with mock.patch.object(ActivityLog.objects, 'bulk_create', side_effect=OperationalError('down')), \
+                mock.patch.object(ActivityLog, 'save', side_effect=OperationalError('down')), \
+                self.assertLogs(activity_buffer.logger, 'ERROR'):
+            self.assertEqual(activity_buffer.flush(), 0)
+        self.assertTrue(self.spool.exists())
+        self.assertEqual(list(self.wal_dir.iterdir()), [])
+
+        self.assertEqual(activity_buffer.flush(), 1)
+
+        self.assertEqual(list(ActivityLog.objects.values_list('description', flat=True)), ['during outage'])
+        self.assertFalse(self.spool.exists())
+
+    def test_record_of_a_deleted_user_is_kept_without_a_user(self):
+        leaver = User.objects.create_user('leaver')
+        self.record('before leaving', user=leaver)
+        leaver.delete()
+
+        self.assertEqual(activity_buffer.flush(), 1)
+
+        self.assertIsNone(ActivityLog.objects.get().user_id)
+
+    def test_rejected_record_goes_to_dead_letter_without_blocking_the_rest(self):
+        self.record('good')
+        with activity_buffer._lock:
+            activity_buffer._pending.append(dict(activity_buffer._pending[0], description='bad', timestamp='garbage'))
+
+        with self.assertLogs(activity_buffer.logger, 'ERROR') as logs:
+            self.assertEqual(activity_buffer.flush(), 1)
+
+        self.assertIn('1 activity log records rejected', logs.output[-1])
+        self.assertEqual(list(ActivityLog.objects.values_list('description', flat=True)), ['good'])
+        rejected = [json.loads(line) for line in self.dead_letter.read_text().splitlines()]
+        self.assertEqual([entry['description'] for entry in rejected], ['bad'])
+        self.assertFalse(self.spool.exists())
+
+    def test_write_ahead_file_of_a_dead_process_is_recovered(self):
+        # A pid that has certainly exited
+        finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        entry = {
+            'user_id': self.user.id, 'action': 'OTHER', 'description': 'from a killed worker',
+            'timestamp': timezone.now().isoformat(), 'ip_address': None, 'user_agent': '', 'changes': {},
+        }
+        self.wal_dir.mkdir()
+        (self.wal_dir / f'{finished.stdout.strip()}-1.jsonl').write_text(json.dumps(entry) + '\n')
+
+        self.assertEqual(activity_buffer.flush(), 1)
+
+        self.assertEqual(ActivityLog.objects.get().description, 'from a killed worker')
+        self.assertEqual(list(self.wal_dir.iterdir()), [])
+
+
+class RouteActionMapTests(SimpleTestCase):
+    PATHS = [
+        '/accounts/login/',
+        '/accounts/logout/',
+        '/referees/match/7/confirm/',
+        '/referees/match/7/comprehensive-report/',
+        '/referees/matchday/squad/submit/7/',
+        '/referees/matchday/referee/approve/7/',
+        '/admin-dashboard/approve-registrations/',
+        '/matches/fixtures/',
+        '/teams/register/',
+        '/teams/all/',
+    ]
+
+    def test_routes_are_classified_like_their_paths(self):
+        actions = route_actions()
+        for path in self.PATHS:
+            with self.subTest(path=path):
+                self.assertEqual(actions.get(resolve(path).route), ActivityLoggingMiddleware.classify(path))
+
+    def test_expected_actions(self):
+        actions = route_actions()
+        self.assertEqual(actions[resolve('/accounts/login/').route], 'LOGIN')
+        self.assertEqual(actions[resolve('/referees/match/7/confirm/').route], 'REFEREE_ACTION')
+        self.assertEqual(actions[resolve('/referees/match/7/comprehensive-report/').route], 'MATCH_REPORT')
+        self.assertNotIn(resolve('/matches/fixtures/').route, actions)
+
+    def test_map_is_built_once(self):
+        self.assertIs(route_actions(), route_actions())
+
+
+class ActivityMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = ActivityLoggingMiddleware(lambda request: HttpResponse())
+        self.record = self.enterContext(mock.patch.object(activity_buffer, 'record'))
+
+    def post(self, path, user, status=200):
+        request = self.factory.post(path, {'note': 'x', 'password': 'secret'})
+        request.user = user
+        request.resolver_match = resolve(path)
+        return self.middleware.process_response(request, HttpResponse(status=status))
+
+    def test_logged_route_is_recorded(self):
+        self.post('/referees/match/7/confirm/', User.objects.create_user('official'))
+
+        self.record.assert_called_once()
+        kwargs = self.record.call_args.kwargs
+        self.assertEqual(kwargs['action'], 'REFEREE_ACTION')
+        self.assertEqual(kwargs['changes'], {'note': 'x'})
+
+    def test_unlogged_requests_are_skipped(self):
+        user = User.objects.create_user('visitor')
+        self.post('/matches/fixtures/', user)
+        self.post('/referees/match/7/confirm/', AnonymousUser())
+        self.post('/referees/match/7/confirm/', user, status=500)
+
+        self.record.assert_not_called()
+
+
+class ActivityArchiveTests(TestCase):
+    def setUp(self):
+        self.archive_dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(ACTIVITY_LOG_ARCHIVE_DIR=self.archive_dir))
+        self.now = timezone.make_aware(datetime(2026, 6, 15, 12))
+        self.user = User.objects.create_user('auditor')
+        for day, description in [
+            (date(2026, 1, 10), 'Approved Kinoru FC'),
+            (date(2026, 1, 20), 'Rejected Meru Stars'),
+            (date(2026, 2, 5), 'Approved Meru Stars'),
+            (date(2026, 6, 1), 'Still live'),
+        ]:
+            ActivityLog.objects.create(
+                user=self.user, action='TEAM_APPROVE', description=description,
+                timestamp=timezone.make_aware(datetime.combine(day, datetime.min.time())),
+            )
+
+    def archive(self):
+        return activity_archive.archive_old_logs(days=90, now=self.now)
+
+    def test_old_logs_move_to_one_file_per_month(self):
+        self.assertEqual(self.archive(), (True, "Archived 3 activity log(s) into 2 file(s)"))
+
+        self.assertEqual(list(ActivityLog.objects.values_list('description', flat=True)), ['Still live'])
+        archives = ActivityLogArchive.objects.order_by('month')
+        self.assertEqual([(archive.month, archive.row_count) for archive in archives], [
+            (date(2026, 1, 1), 2), (date(2026, 2, 1), 1),
+        ])
+        self.assertEqual(sorted(path.name for path in self.archive_dir.iterdir()), sorted(a.path for a in archives))
+        # Nothing left to archive
+        self.assertEqual(self.archive(), (True, "No activity logs to archive"))
+
+    def test_read_archived_searches_and_filters_the_files(self):
+        self.archive()
+
+        self.assertEqual(
+            [row['description'] for row in activity_archive.read_archived(search='meru')],
+            ['Approved Meru Stars', 'Rejected Meru Stars'],
+        )
+        self.assertEqual(len(list(activity_archive.read_archived(search='AUDITOR'))), 3)
+        january = list(activity_archive.read_archived(
+            start=timezone.make_aware(datetime(2026, 1, 15)), end=timezone.make_aware(datetime(2026, 2, 1)),
+        ))
+        self.assertEqual([row['description'] for row in january], ['Rejected Meru Stars'])
+        self.assertEqual(january[0]['timestamp'], timezone.make_aware(datetime(2026, 1, 20)))
+        self.assertEqual(list(activity_archive.read_archived(action='LOGIN')), [])
+
+    def test_mismatched_delete_rolls_back_and_removes_the_file(self):
+        with mock.patch('django.db.models.query.QuerySet.delete', return_value=(0, {})), \
+                self.assertRaises(activity_archive.ArchiveMismatch):
+            self.archive()
+
+        self.assertEqual(ActivityLog.objects.count(), 4)
+        self.assertFalse(ActivityLogArchive.objects.exists())
+        self.assertEqual(list(self.archive_dir.iterdir()), [])
+
+
+class ActivityLogSearchIndexTests(TestCase):
+    def setUp(self):
+        ACTIVITY_LOG_INDEX.ensure()
+
+    def found(self, text):
+        return sorted(ACTIVITY_LOG_INDEX.filter(ActivityLog.objects.all(), text).values_list('description', flat=True))
+
+    def test_index_follows_bulk_create_update_and_delete(self):
+        ActivityLog.objects.bulk_create([
+            ActivityLog(action='TEAM_APPROVE', description='Approved Kinoru Rangers', object_repr='Kinoru Rangers'),
+            ActivityLog(action='TEAM_REJECT', description='Rejected Meru Stars', object_repr='Meru Stars'),
+        ])
+        self.assertEqual(self.found('kinoru'), ['Approved Kinoru Rangers'])
+        self.assertEqual(self.found('approv'), ['Approved Kinoru Rangers'])
+        # Part of a word matches, as icontains did
+        self.assertEqual(self.found('ange'), ['Approved Kinoru Rangers'])
+
+        ActivityLog.objects.filter(object_repr='Meru Stars').update(
+            description='Rejected Nkubu United', object_repr='Nkubu United',
+        )
+        self.assertEqual(self.found('nkubu'), ['Rejected Nkubu United'])
+        self.assertEqual(self.found('meru'), [])
+
+        ActivityLog.objects.filter(object_repr='Kinoru Rangers').delete()
+        self.assertEqual(self.found('kinoru'), [])
+        self.assertEqual(
+            [log.description for log in ACTIVITY_LOG_INDEX.search('rejected')],
+            ['Rejected Nkubu United'],
+        )
+
+    def test_index_built_with_another_tokenizer_is_replaced(self):
+        ActivityLog.objects.create(action='FIXTURE_GENERATE', description='Generated 12 fixtures')
+        FtsIndex('activity_log_fts', ActivityLog, ['description', 'object_repr']).ensure()
+        self.assertEqual(self.found('rated'), [])
+
+        self.assertTrue(ACTIVITY_LOG_INDEX.ensure())
+
+        self.assertEqual(self.found('rated'), ['Generated 12 fixtures'])
+        self.assertFalse(ACTIVITY_LOG_INDEX.ensure())
@@ -22,6 +22,8 @@ urlpatterns = [
     
     # Activity Logs
     path('activity-logs/', activity_views.activity_logs, name='activity_logs'),
+    path('activity-logs/archive/', activity_views.activity_log_archive, name='activity_log_archive'),
+    path('api/activity-logs/search/', activity_views.api_search_activity_logs, name='api_search_activity_logs'),
     path('activity-logs/<int:log_id>/', activity_views.activity_log_detail, name='activity_log_detail'),
     path('activity-logs/<int:log_id>/undo/', activity_views.undo_action, name='undo_action'),
     
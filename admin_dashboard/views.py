@@ -11,10 +11,13 @@ from teams.models import Team, Player, Zone, LeagueSettings, TransferRequest
 from payments.models import Payment
 from matches.models import Match, LeagueTable
 from referees.models import MatchReport, Referee
+from fkf_league.roles import roles_for
+from .models import BackgroundJob
+from .jobs import job_status_counts
 
 def admin_required(user):
     """Check if user is staff (Super Admin) or in League Admin group (League Manager)"""
-    return user.is_staff or user.groups.filter(name='League Admin').exists()
+    return user.is_staff or roles_for(user).is_league_admin
 
 def superadmin_required(user):
     """Check if user is superuser - for user management only"""
@@ -218,6 +221,10 @@ def admin_dashboard(request):
         status='completed'
     ).order_by('-match_date')[:5]
     
+    # Background jobs (fixture generation, table rebuilds, verification)
+    recent_jobs = BackgroundJob.objects.order_by('-created_at')[:5]
+    job_counts = job_status_counts()
+    
     context = {
         'total_teams': total_teams,
         'registered_teams': registered_teams,
@@ -232,6 +239,8 @@ def admin_dashboard(request):
         'pending_registrations': pending_registrations,
         'recent_payments': recent_payments,
         'recent_matches': recent_matches,
+        'recent_jobs': recent_jobs,
+        'job_counts': job_counts,
     }
     return render(request, 'admin_dashboard/dashboard.html', context)
 
@@ -551,14 +560,15 @@ def dashboard(request):
     from datetime import datetime, timedelta
     
     user = request.user
+    roles = roles_for(user)
     
     # 1. SUPER ADMIN - Full access with user management
     if user.is_superuser:
         return admin_dashboard(request)  # Redirect to full admin dashboard
     
     # 2. TEAM MANAGER
-    elif user.groups.filter(name='Team Managers').exists():
-        team = Team.objects.filter(manager=user).first()
+    elif roles.is_team_manager:
+        team = roles.managed_team
         
         if not team:
             messages.error(request, "You are not assigned to any team.")
@@ -704,7 +714,7 @@ def dashboard(request):
         return render(request, 'dashboard/team_manager.html', context)
     
     # 3. REFEREES MANAGER
-    elif user.groups.filter(name='Referees Manager').exists():
+    elif roles.is_referees_manager:
         # Get pending referees count for dashboard
         pending_referees_count = Referee.objects.filter(status='pending').count()
         
@@ -714,11 +724,11 @@ def dashboard(request):
         return render(request, 'dashboard/referees_manager.html', context)
     
     # 4. REFEREE
-    elif user.groups.filter(name='Referee').exists():
+    elif roles.is_referee:
         return redirect('referees:referee_dashboard')
     
     # 5. LEAGUE MANAGER (League Admin group) - Operations without user management
-    elif user.groups.filter(name='League Admin').exists():
+    elif roles.is_league_admin:
         # Get league settings
         settings = LeagueSettings.get_settings()
         
@@ -53,3 +53,55 @@ KENYA_COUNTIES = [
     ('wajir', 'Wajir'),
     ('west_pokot', 'West Pokot'),
 ]
+
+# Approximate location (county headquarters) of each county, used as a
+# referee's base location when no exact coordinates are recorded
+COUNTY_CENTROIDS = {
+    'baringo': (0.4919, 35.7430),
+    'bomet': (-0.7813, 35.3416),
+    'bungoma': (0.5635, 34.5606),
+    'busia': (0.4608, 34.1115),
+    'elgeyo_marakwet': (0.6703, 35.5081),
+    'embu': (-0.5310, 37.4506),
+    'garissa': (-0.4532, 39.6461),
+    'homa_bay': (-0.5273, 34.4571),
+    'isiolo': (0.3546, 37.5822),
+    'kajiado': (-1.8524, 36.7768),
+    'kakamega': (0.2827, 34.7519),
+    'kericho': (-0.3689, 35.2863),
+    'kiambu': (-1.1714, 36.8356),
+    'kilifi': (-3.6305, 39.8499),
+    'kirinyaga': (-0.4989, 37.2803),
+    'kisii': (-0.6817, 34.7680),
+    'kisumu': (-0.0917, 34.7680),
+    'kitui': (-1.3670, 38.0106),
+    'kwale': (-4.1737, 39.4521),
+    'laikipia': (0.2726, 36.5381),
+    'lamu': (-2.2717, 40.9020),
+    'machakos': (-1.5177, 37.2634),
+    'makueni': (-1.7833, 37.6333),
+    'mandera': (3.9366, 41.8670),
+    'marsabit': (2.3346, 37.9899),
+    'meru': (0.0463, 37.6559),
+    'migori': (-1.0634, 34.4731),
+    'mombasa': (-4.0435, 39.6682),
+    'muranga': (-0.7210, 37.1526),
+    'nairobi': (-1.2921, 36.8219),
+    'nakuru': (-0.3031, 36.0800),
+    'nandi': (0.2039, 35.1050),
+    'narok': (-1.0876, 35.8710),
+    'nyamira': (-0.5633, 34.9358),
+    'nyandarua': (-0.2719, 36.3784),
+    'nyeri': (-0.4201, 36.9476),
+    'samburu': (1.0968, 36.6981),
+    'siaya': (0.0607, 34.2881),
+    'taita_taveta': (-3.3961, 38.5561),
+    'tana_river': (-1.5000, 40.0333),
+    'tharaka_nithi': (-0.3333, 37.6500),
+    'trans_nzoia': (1.0157, 35.0062),
+    'turkana': (3.1191, 35.5973),
+    'uasin_gishu': (0.5143, 35.2698),
+    'vihiga': (0.0760, 34.7229),
+    'wajir': (1.7471, 40.0573),
+    'west_pokot': (1.2389, 35.1119),
+}
@@ -0,0 +1,57 @@
+# fkf_league/geo.py
+"""
+Grid-bucket spatial index helpers (no external maps API).
+
+The map is divided into CELL_DEGREES x CELL_DEGREES cells. Locations store
+their cell code in an indexed column, so "who is near this venue" becomes
+``cell__in=cells_within(...)`` followed by exact ordering on the few rows
+that match.
+"""
+import math
+
+from .constants import COUNTY_CENTROIDS
+
+
+# 0.25 degrees is roughly 28 km at the equator
+CELL_DEGREES = 0.25
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+
+def cell_for(latitude, longitude):
+    """Code of the grid cell containing the point, e.g. '358:862'."""
+    if latitude is None or longitude is None:
+        return ''
+    row = math.floor((float(latitude) + 90) / CELL_DEGREES)
+    column = math.floor((float(longitude) + 180) / CELL_DEGREES)
+    return f'{row}:{column}'
+
+
+def cells_within(latitude, longitude, radius_km):
+    """Codes of every cell touching the box of ``radius_km`` around the point."""
+    latitude, longitude = float(latitude), float(longitude)
+    lat_span = radius_km / KM_PER_DEGREE
+    lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    first_row = math.floor((latitude - lat_span + 90) / CELL_DEGREES)
+    last_row = math.floor((latitude + lat_span + 90) / CELL_DEGREES)
+    first_column = math.floor((longitude - lon_span + 180) / CELL_DEGREES)
+    last_column = math.floor((longitude + lon_span + 180) / CELL_DEGREES)
+    return [
+        f'{row}:{column}'
+        for row in range(first_row, last_row + 1)
+        for column in range(first_column, last_column + 1)
+    ]
+
+
+def distance_km(start, end):
+    """Great-circle (haversine) distance between two (lat, lon) points."""
+    lat1, lon1 = map(math.radians, map(float, start))
+    lat2, lon2 = map(math.radians, map(float, end))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def county_location(county):
+    """Approximate (lat, lon) of a county code, or None."""
+    return COUNTY_CENTROIDS.get(county or '')
@@ -0,0 +1,86 @@
+# fkf_league/roles.py
+"""
+Per-request role resolution.
+
+``roles_for(user)`` returns a UserRoles object cached on the user instance.
+Django hands every view, template and template filter of a request the same
+``request.user`` object, so a user's group names are read with one query per
+request however many role checks a page makes, and the managed team and
+referee profile are each loaded at most once, on first use.
+
+Changing a user's groups through ``user.groups`` drops the cached roles of
+that instance, so a view that edits the current user's roles sees the change.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed
+from django.utils.functional import cached_property
+
+
+CACHE_ATTR = '_fkf_roles'
+
+
+class UserRoles:
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def group_names(self):
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(self.user.groups.values_list('name', flat=True))
+
+    def in_group(self, *names):
+        """True if the user belongs to any of ``names``."""
+        return not self.group_names.isdisjoint(names)
+
+    @cached_property
+    def is_league_admin(self):
+        return self.in_group('League Admin')
+
+    @cached_property
+    def is_referees_manager(self):
+        return self.in_group('Referees Manager')
+
+    @cached_property
+    def is_referee(self):
+        return self.in_group('Referee')
+
+    @cached_property
+    def is_team_manager(self):
+        return self.in_group('Team Managers')
+
+    @cached_property
+    def managed_team(self):
+        from teams.models import Team
+
+        if not self.user.is_authenticated:
+            return None
+        return Team.objects.filter(manager=self.user).first()
+
+    @cached_property
+    def referee_profile(self):
+        if not self.user.is_authenticated:
+            return None
+        return getattr(self.user, 'referee_profile', None)
+
+
+def roles_for(user):
+    """The cached UserRoles of ``user`` (usually ``request.user``)."""
+    roles = getattr(user, CACHE_ATTR, None)
+    if roles is None:
+        roles = UserRoles(user)
+        setattr(user, CACHE_ATTR, roles)
+    return roles
+
+
+def forget_roles(user):
+    if hasattr(user, CACHE_ATTR):
+        delattr(user, CACHE_ATTR)
+
+
+def _groups_changed(sender, instance, action, **kwargs):
+    if action.startswith('post_') and isinstance(instance, User):
+        forget_roles(instance)
+
+
+m2m_changed.connect(_groups_changed, sender=User.groups.through, dispatch_uid='fkf_roles_groups_changed')
@@ -0,0 +1,165 @@
+# fkf_league/search.py
+"""
+SQLite FTS5 full-text indexes kept in step with ordinary tables.
+
+An FtsIndex is an external-content FTS5 table over some text columns of a
+model, maintained by AFTER INSERT/UPDATE/DELETE triggers on the model's table
+(so bulk_create and queryset updates are indexed too). Apps declare their
+indexes and call ``ensure()`` from post_migrate: the table and triggers are
+created when missing, and the index is rebuilt from the content table when
+they had to be (first install, or a migration that remade the table and
+dropped its triggers). A table built with another tokenizer than the one
+declared is dropped and rebuilt.
+
+On other database backends, or an SQLite build without FTS5, ``filter`` falls
+back to ``icontains`` and ``search`` to an unranked ``icontains`` query.
+"""
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class FtsIndex:
+    def __init__(self, name, model, columns, tokenize='unicode61', prefix=True, using='default'):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        # 'trigram' matches any substring of 3+ characters, like icontains
+        self.tokenize = tokenize
+        self.prefix = prefix
+        self.using = using
+        self._ready = None
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    @property
+    def content_table(self):
+        return self.model._meta.db_table
+
+    def _triggers(self):
+        columns = ', '.join(self.columns)
+        new_values = ', '.join(f'new.{column}' for column in self.columns)
+        old_values = ', '.join(f'old.{column}' for column in self.columns)
+        delete_old = (
+            f"INSERT INTO {self.name}({self.name}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        insert_new = f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.id, {new_values});"
+        return {
+            f'{self.name}_ai': f"AFTER INSERT ON {self.content_table} BEGIN {insert_new} END",
+            f'{self.name}_ad': f"AFTER DELETE ON {self.content_table} BEGIN {delete_old} END",
+            f'{self.name}_au': (
+                f"AFTER UPDATE OF {columns} ON {self.content_table} "
+                f"BEGIN {delete_old} {insert_new} END"
+            ),
+        }
+
+    def _table_sql(self, cursor):
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = %s", [self.name])
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _existing(self, cursor, kind):
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = %s AND (name = %s OR tbl_name = %s)",
+            [kind, self.name, self.content_table],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    def ensure(self):
+        """Create the FTS table and triggers if missing; returns True if the index was rebuilt."""
+        if self.connection.vendor != 'sqlite':
+            return False
+        with self.connection.cursor() as cursor:
+            try:
+                table_sql = self._table_sql(cursor)
+                if table_sql and f"tokenize='{self.tokenize}'" not in table_sql:
+                    # The declared tokenizer changed: the stored index is unusable
+                    cursor.execute(f"DROP TABLE {self.name}")
+                    table_sql = None
+                rebuild = table_sql is None
+                if rebuild:
+                    cursor.execute(
+                        f"CREATE VIRTUAL TABLE {self.name} USING fts5("
+                        f"{', '.join(self.columns)}, content='{self.content_table}', "
+                        f"content_rowid='id', tokenize='{self.tokenize}')"
+                    )
+            except OperationalError:
+                # SQLite built without FTS5 (or the tokenizer). Triggers left
+                # from an earlier index would make every write fail
+                for name in self._triggers():
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                self._ready = False
+                return False
+            triggers = self._existing(cursor, 'trigger')
+            for name, body in self._triggers().items():
+                if name not in triggers:
+                    cursor.execute(f"CREATE TRIGGER {name} {body}")
+                    rebuild = True
+            if rebuild:
+                cursor.execute(f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')")
+        self._ready = True
+        return rebuild
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')")
+
+    def ready(self):
+        if self._ready is None:
+            if self.connection.vendor != 'sqlite':
+                self._ready = False
+            else:
+                with self.connection.cursor() as cursor:
+                    self._ready = self.name in self._existing(cursor, 'table')
+        return self._ready
+
+    def match_expression(self, text):
+        """FTS5 query for free text: every word must match (quoted, so no operators)."""
+        if self.tokenize == 'trigram':
+            # Trigram terms need 3+ characters; shorter words can't narrow the match
+            words = [word.replace('"', '""') for word in text.split() if len(word) >= 3]
+            return ' '.join(f'"{word}"' for word in words)
+        suffix = '*' if self.prefix else ''
+        return ' '.join(f'"{token}"{suffix}' for token in TOKEN_RE.findall(text))
+
+    def _fallback(self, text):
+        query = Q()
+        for column in self.columns:
+            query |= Q(**{f'{column}__icontains': text})
+        return query
+
+    def q(self, text):
+        """Q object matching rows whose indexed columns contain ``text``."""
+        expression = self.match_expression(text)
+        if not expression or not self.ready():
+            return self._fallback(text)
+        return Q(pk__in=RawSQL(
+            f"SELECT rowid FROM {self.name} WHERE {self.name} MATCH %s", [expression]
+        ))
+
+    def filter(self, queryset, text):
+        return queryset.filter(self.q(text))
+
+    def search(self, text, limit=20, queryset=None):
+        """Model instances matching ``text``, best match (bm25) first."""
+        queryset = self.model._default_manager.all() if queryset is None else queryset
+        expression = self.match_expression(text)
+        if not expression or not self.ready():
+            return list(queryset.filter(self._fallback(text))[:limit])
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.name} WHERE {self.name} MATCH %s "
+                f"ORDER BY bm25({self.name}) LIMIT %s",
+                [expression, limit],
+            )
+            ranked = [row[0] for row in cursor.fetchall()]
+        found = queryset.in_bulk(ranked)
+        return [found[pk] for pk in ranked if pk in found]
@@ -133,6 +133,35 @@ DATABASES = {
 }
 
 
+# Cache (public standings/top-scorer read models, see matches/read_models.py)
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Kept in the database so invalidations made by the run_jobs worker reach the
+# web processes; the table is created after migrate (admin_dashboard/apps.py).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'fkf_cache',
+    },
+    # Per-process scratch data (read model hit/miss counters)
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fkf-league',
+    },
+}
+
+# Middleware activity logs are buffered and written in batches
+# (see admin_dashboard/activity_buffer.py)
+ACTIVITY_LOG_BUFFER_SIZE = 50
+ACTIVITY_LOG_FLUSH_SECONDS = 5
+ACTIVITY_LOG_WAL_DIR = BASE_DIR / 'logs' / 'activity_wal'
+ACTIVITY_LOG_SPOOL = BASE_DIR / 'logs' / 'activity_spool.jsonl'
+ACTIVITY_LOG_DEAD_LETTER = BASE_DIR / 'logs' / 'activity_dead_letter.jsonl'
+# Older logs are moved to monthly compressed files (admin_dashboard/activity_archive.py)
+ACTIVITY_LOG_RETENTION_DAYS = 180
+ACTIVITY_LOG_ARCHIVE_DIR = BASE_DIR / 'archive' / 'activity_logs'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,72 @@
+# fkf_league/testing.py
+"""
+Shared builders for the apps' tests.py modules.
+
+Teams are numbered after the highest team id, so every call gets unique
+names, phone numbers and emails without state kept between tests.
+"""
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.db.models import Max
+from django.test import override_settings
+from django.utils import timezone
+
+
+def make_team(zone, **kwargs):
+    from teams.models import Team
+
+    number = (Team.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    fields = {
+        'team_name': f'Team {number}',
+        'location': 'Meru',
+        'home_ground': f'Ground {number}',
+        'contact_person': 'Manager',
+        'phone_number': f'+254700{number:06d}',
+        'email': f'team{number}@example.com',
+        'zone': zone,
+        'status': 'approved',
+    }
+    fields.update(kwargs)
+    return Team.objects.create(**fields)
+
+
+def make_match(zone, home, away, days=0, **kwargs):
+    from matches.models import Match
+
+    kwargs.setdefault('match_date', timezone.now() + timedelta(days=days))
+    return Match.objects.create(zone=zone, home_team=home, away_team=away, venue='Stadium', **kwargs)
+
+
+def make_referee(**kwargs):
+    from referees.models import Referee
+
+    number = (Referee.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    fields = {
+        'first_name': 'Referee',
+        'last_name': f'{number:03d}',
+        'fkf_number': f'FKF-{number:04d}',
+        'email': f'referee{number}@example.com',
+        'status': 'approved',
+        'is_active': True,
+    }
+    fields.update(kwargs)
+    return Referee.objects.create(**fields)
+
+
+def isolate_activity_log(test):
+    """
+    For tests that go through the activity middleware: its write-ahead and
+    spool files go to a temporary directory, and the records it buffered are
+    written (to the test database) when the test ends, not at exit.
+    """
+    from admin_dashboard import activity_buffer
+
+    directory = Path(test.enterContext(tempfile.TemporaryDirectory()))
+    test.enterContext(override_settings(
+        ACTIVITY_LOG_WAL_DIR=directory / 'wal',
+        ACTIVITY_LOG_SPOOL=directory / 'spool.jsonl',
+        ACTIVITY_LOG_DEAD_LETTER=directory / 'dead_letter.jsonl',
+    ))
+    test.addCleanup(activity_buffer.flush)
@@ -4,9 +4,11 @@ from django.utils.html import format_html
 from django.urls import path
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.db import transaction
 from .models import Match, Goal, Card, LeagueTable, Suspension
 from teams.models import Zone
-from .utils.fixture_generator import generate_fixtures_for_zone, regenerate_fixtures_for_zone, update_match_date
+from .utils.fixture_generator import queue_zone_fixtures, update_match_date
+from admin_dashboard.jobs import enqueue
 
 class MatchAdminForm(forms.ModelForm):
     class Meta:
@@ -35,28 +37,44 @@ class MatchAdminForm(forms.ModelForm):
         return match_date
 
 # Zone Admin Configuration
-@admin.action(description="🎯 Generate fixtures for selected zones")
+@admin.action(description="🎯 Queue fixture generation for selected zones")
 def generate_zone_fixtures(modeladmin, request, queryset):
     for zone in queryset:
-        success, message = generate_fixtures_for_zone(zone.id)
-        if success:
-            modeladmin.message_user(request, message)
-        else:
-            modeladmin.message_user(request, f"⚠️ {zone.name}: {message}", level='warning')
+        job = queue_zone_fixtures(zone.id, user=request.user)
+        modeladmin.message_user(request, f"⏳ {zone.name}: fixture generation queued (job #{job.id})")
 
-@admin.action(description="🔄 Regenerate fixtures (delete & recreate)")
+@admin.action(description="🗓️ Generate fixtures for selected zones in one batch")
+def generate_zone_fixtures_batch(modeladmin, request, queryset):
+    zone_ids = sorted(queryset.values_list('id', flat=True))
+    job = enqueue(
+        'generate_all_fixtures', zone_ids=zone_ids, user=request.user,
+        dedupe_key=f"fixtures:zones:{','.join(map(str, zone_ids))}",
+    )
+    modeladmin.message_user(request, f"⏳ Fixture generation for {len(zone_ids)} zone(s) queued (job #{job.id})")
+
+@admin.action(description="🔄 Queue fixture regeneration (delete & recreate)")
 def regenerate_zone_fixtures(modeladmin, request, queryset):
     for zone in queryset:
-        success, message = regenerate_fixtures_for_zone(zone.id)
-        if success:
-            modeladmin.message_user(request, message)
-        else:
-            modeladmin.message_user(request, f"⚠️ {zone.name}: {message}", level='warning')
+        job = queue_zone_fixtures(zone.id, user=request.user, regenerate=True)
+        modeladmin.message_user(request, f"⏳ {zone.name}: fixture regeneration queued (job #{job.id})")
+
+@admin.action(description="📊 Queue league table rebuild from results")
+def rebuild_zone_league_tables(modeladmin, request, queryset):
+    for zone in queryset:
+        job = enqueue('rebuild_league_table', zone.id, user=request.user, dedupe_key=f'rebuild:zone:{zone.id}')
+        modeladmin.message_user(request, f"⏳ {zone.name}: league table rebuild queued (job #{job.id})")
+
+@admin.action(description="🔍 Queue league table verification")
+def verify_zone_league_tables(modeladmin, request, queryset):
+    for zone in queryset:
+        job = enqueue('verify_league_table', zone.id, user=request.user, dedupe_key=f'verify:zone:{zone.id}')
+        modeladmin.message_user(request, f"⏳ {zone.name}: league table verification queued (job #{job.id})")
 
 class ZoneAdmin(admin.ModelAdmin):
     list_display = ['name', 'fixtures_generated', 'fixture_generation_date', 'team_count']
     list_filter = ['fixtures_generated']
-    actions = [generate_zone_fixtures, regenerate_zone_fixtures]
+    actions = [generate_zone_fixtures, generate_zone_fixtures_batch, regenerate_zone_fixtures,
+               rebuild_zone_league_tables, verify_zone_league_tables]
     
     def team_count(self, obj):
         return obj.team_set.filter(status='approved').count()
@@ -195,15 +213,26 @@ class MatchAdmin(admin.ModelAdmin):
     @admin.action(description="⏸️ Postpone selected matches")
     def postpone_matches(self, request, queryset):
         """Bulk postpone matches"""
-        updated = queryset.update(status='postponed')
+        updated = self._set_status(queryset, 'postponed')
         self.message_user(request, f"✅ Postponed {updated} matches")
     
     @admin.action(description="✅ Mark as completed")
     def complete_matches(self, request, queryset):
         """Bulk mark matches as completed"""
-        updated = queryset.update(status='completed')
+        updated = self._set_status(queryset, 'completed')
         self.message_user(request, f"✅ Marked {updated} matches as completed")
     
+    def _set_status(self, queryset, status):
+        # Saved one by one (not queryset.update) so the post_save receivers
+        # run: league table, clean sheets, appointments, cached read models
+        updated = 0
+        with transaction.atomic():
+            for match in queryset.exclude(status=status).select_for_update():
+                match.status = status
+                match.save(update_fields=['status', 'updated_at'])
+                updated += 1
+        return updated
+    
     # SUPER ADMIN: Custom URLs for match actions
     def get_urls(self):
         urls = super().get_urls()
@@ -222,11 +251,8 @@ class MatchAdmin(admin.ModelAdmin):
         zone_id = request.GET.get('zone')
         
         if zone_id:
-            success, message = generate_fixtures_for_zone(zone_id)
-            if success:
-                messages.success(request, message)
-            else:
-                messages.error(request, message)
+            job = queue_zone_fixtures(int(zone_id), user=request.user)
+            messages.info(request, f"⏳ Fixture generation queued (job #{job.id})")
             return redirect('/admin/teams/zone/')
         
         zones = Zone.objects.filter(fixtures_generated=False)
@@ -258,10 +284,25 @@ class MatchAdmin(admin.ModelAdmin):
         messages.success(request, f"✅ Match marked as ongoing: {match}")
         return redirect('/admin/matches/match/')
 
+
+class LeagueTableAdmin(admin.ModelAdmin):
+    list_display = ['team', 'zone', 'matches_played', 'wins', 'draws', 'losses',
+                    'goals_for', 'goals_against', 'goal_difference', 'points', 'form']
+    list_filter = ['zone']
+    actions = ['rebuild_tables']
+
+    @admin.action(description="📊 Queue rebuild of the selected rows' zones")
+    def rebuild_tables(self, request, queryset):
+        zone_ids = set(queryset.values_list('zone_id', flat=True))
+        for zone_id in zone_ids:
+            enqueue('rebuild_league_table', zone_id, user=request.user, dedupe_key=f'rebuild:zone:{zone_id}')
+        self.message_user(request, f"⏳ League table rebuild queued for {len(zone_ids)} zone(s)")
+
+
 # Register models
 admin.site.register(Zone, ZoneAdmin)
 admin.site.register(Match, MatchAdmin)
 admin.site.register(Goal)
 admin.site.register(Card)
-admin.site.register(LeagueTable)
+admin.site.register(LeagueTable, LeagueTableAdmin)
 admin.site.register(Suspension)
\ No newline at end of file
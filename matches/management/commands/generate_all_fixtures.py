@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from matches.utils.fixture_generator import generate_fixtures_for_all_zones
+
+
+class Command(BaseCommand):
+    help = 'Generate fixtures for every zone that is ready, in one batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', type=int, action='append', help='Only this zone id (repeatable)')
+        parser.add_argument('--start-date', type=str, help='Season start date (YYYY-MM-DD)')
+        parser.add_argument('--double', action='store_true', help='Double round-robin (home and away)')
+        parser.add_argument('--referee-capacity', type=int, help='Matches the referee pool can cover per matchday')
+        parser.add_argument('--workers', type=int, help='Worker processes for schedule computation')
+
+    def handle(self, *args, **options):
+        start_date = None
+        if options['start_date']:
+            start_date = datetime.strptime(options['start_date'], '%Y-%m-%d').date()
+
+        success, message, generated = generate_fixtures_for_all_zones(
+            zone_ids=options['zone'],
+            start_date=start_date,
+            legs=2 if options['double'] else 1,
+            referee_capacity=options['referee_capacity'],
+            max_workers=options['workers'],
+        )
+        if success:
+            self.stdout.write(self.style.SUCCESS(message))
+        else:
+            self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from teams.models import Zone
+from matches.standings import rebuild_league_table
+
+
+class Command(BaseCommand):
+    help = 'Recompute every league table row from the completed match results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', type=int, help='Only rebuild this zone id')
+
+    def handle(self, *args, **options):
+        zones = Zone.objects.all()
+        if options['zone']:
+            zones = zones.filter(id=options['zone'])
+
+        total_rows = 0
+        for zone in zones:
+            rows = rebuild_league_table(zone.id)
+            total_rows += rows
+            self.stdout.write(f'{zone.name}: {rows} rows rebuilt')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total_rows} league table rows'))
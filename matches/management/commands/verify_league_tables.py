@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from teams.models import Zone
+from matches.standings import verify_league_table
+
+
+class Command(BaseCommand):
+    help = 'Check that every league table matches the completed match results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', type=int, help='Only check this zone id')
+
+    def handle(self, *args, **options):
+        zones = Zone.objects.all()
+        if options['zone']:
+            zones = zones.filter(id=options['zone'])
+
+        total_mismatches = 0
+        for zone in zones:
+            mismatches = verify_league_table(zone.id)
+            total_mismatches += len(mismatches)
+            for team_id, field, stored, expected in mismatches:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'{zone.name}: team {team_id} {field} is {stored}, expected {expected}'
+                    )
+                )
+
+        if total_mismatches:
+            self.stdout.write(self.style.ERROR(f'{total_mismatches} league table mismatches found'))
+        else:
+            self.stdout.write(self.style.SUCCESS('League tables match the completed results'))
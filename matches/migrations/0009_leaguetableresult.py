@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_applied_results(apps, schema_editor):
+    """Record already-completed matches as counted in the league table."""
+    Match = apps.get_model('matches', 'Match')
+    LeagueTableResult = apps.get_model('matches', 'LeagueTableResult')
+    LeagueTableResult.objects.bulk_create([
+        LeagueTableResult(
+            match_id=match.id,
+            zone_id=match.zone_id,
+            home_team_id=match.home_team_id,
+            away_team_id=match.away_team_id,
+            home_score=match.home_score,
+            away_score=match.away_score,
+        )
+        for match in Match.objects.filter(status='completed')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0019_player_fifa_id_player_fifa_verification_date_and_more'),
+        ('matches', '0008_match_start_time_alter_match_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeagueTableResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('home_score', models.IntegerField()),
+                ('away_score', models.IntegerField()),
+                ('applied_at', models.DateTimeField(auto_now=True)),
+                ('away_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='teams.team')),
+                ('home_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='teams.team')),
+                ('match', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='table_result', to='matches.match')),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='teams.zone')),
+            ],
+        ),
+        migrations.RunPython(backfill_applied_results, migrations.RunPython.noop),
+    ]
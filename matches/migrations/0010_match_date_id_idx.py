@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0009_leaguetableresult'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['match_date', 'id'], name='match_date_id_idx'),
+        ),
+    ]
@@ -52,10 +52,61 @@ class Match(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination of the fixtures listing
+            models.Index(fields=['match_date', 'id'], name='match_date_id_idx'),
+        ]
+    
+    # Fields whose change means the match result changed
+    RESULT_FIELDS = ('home_score', 'away_score', 'status')
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.match_date and timezone.is_naive(self.match_date):
             self.match_date = timezone.make_aware(self.match_date)
+        self._snapshot_loaded_values()
+    
+    def _snapshot_loaded_values(self, fields=None):
+        """Remember field values as loaded from (or last written to) the database."""
+        if fields is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (fields is None or field.attname in fields):
+                self._loaded_values[field.attname] = self.__dict__[field.attname]
+    
+    @property
+    def changed_fields(self):
+        """Attribute names (e.g. 'status', 'zone_id') changed since load or last save."""
+        return {
+            name for name, value in self._loaded_values.items()
+            if self.__dict__.get(name, value) != value
+        }
+    
+    def has_changed(self, *fields):
+        """True if any of the given fields changed; with no arguments, if anything did."""
+        changed = self.changed_fields
+        return bool(changed.intersection(fields)) if fields else bool(changed)
+    
+    def previous_value(self, field):
+        """Value of a field as loaded from (or last written to) the database."""
+        return self._loaded_values.get(field, getattr(self, field))
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self._snapshot_loaded_values()
+        else:
+            attnames = {self._meta.get_field(name).attname for name in update_fields}
+            self._snapshot_loaded_values(attnames)
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None:
+            self._snapshot_loaded_values()
+        else:
+            self._snapshot_loaded_values({self._meta.get_field(name).attname for name in fields})
     
     def __str__(self):
         return f"{self.home_team} vs {self.away_team} - {self.match_date.strftime('%Y-%m-%d')}"
@@ -140,8 +191,31 @@ class LeagueTable(models.Model):
         self.points = (self.wins * 3) + (self.draws * 1)
     
     def update_stats(self):
-        # This will be updated when matches are recorded
-        pass
+        """Recompute this row from the completed matches of its zone."""
+        from matches.standings import expected_standings
+        stats = expected_standings(self.zone_id).get(self.team_id, {})
+        for field in ('matches_played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against'):
+            setattr(self, field, stats.get(field, 0))
+        self.goal_difference = self.goals_for - self.goals_against
+        self.calculate_points()
+
+
+class LeagueTableResult(models.Model):
+    """
+    The result of a completed match as it is currently counted in the league
+    table. Lets the standings engine reverse exactly what it applied when a
+    result is corrected, so re-saving a match never double-counts.
+    """
+    match = models.OneToOneField('Match', on_delete=models.CASCADE, related_name='table_result')
+    zone = models.ForeignKey('teams.Zone', on_delete=models.CASCADE, related_name='+')
+    home_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    away_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    home_score = models.IntegerField()
+    away_score = models.IntegerField()
+    applied_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.home_team} {self.home_score}-{self.away_score} {self.away_team}"
 
 
 class Suspension(models.Model):
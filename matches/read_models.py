@@ -0,0 +1,175 @@
+# matches/read_models.py
+"""
+Cached read models for the public standings and top-scorer pages.
+
+The data is kept in the default cache as plain dicts/lists (JSON-ready), under
+keys that embed a shared version number. Any result event bumps the version,
+which makes every cached read model stale at once without having to know
+which keys exist. Hits and misses are counted per read model, per process
+(in the 'local' cache, so counting never writes to the shared one).
+"""
+import time
+
+from django.core.cache import cache, caches
+
+from matches.models import Match, LeagueTable
+from teams.models import Zone, Player
+
+
+CACHE_TTL = 300
+KEY_PREFIX = 'matches:read_models'
+VERSION_KEY = f'{KEY_PREFIX}:version'
+READ_MODELS = ['league_standings', 'top_scorers', 'goalkeepers', 'scorers_by_zone', 'fixture_filters']
+TABLE_ROWS_PER_ZONE = 20
+LEADERBOARD_SIZE = 10
+SCORERS_PER_ZONE = 20
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_read_models():
+    """Make every cached read model stale; the next request rebuilds it."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _count(name, outcome):
+    stats = caches['local']
+    key = f'{KEY_PREFIX}:stats:{name}:{outcome}'
+    if not stats.add(key, 1, None):
+        try:
+            stats.incr(key)
+        except ValueError:
+            stats.set(key, 1, None)
+
+
+def cache_stats():
+    """Hit/miss counters per read model, e.g. {'top_scorers': {'hits': 10, 'misses': 1}}."""
+    keys = [f'{KEY_PREFIX}:stats:{name}:{outcome}' for name in READ_MODELS for outcome in ('hit', 'miss')]
+    counters = caches['local'].get_many(keys)
+    return {
+        name: {
+            'hits': counters.get(f'{KEY_PREFIX}:stats:{name}:hit', 0),
+            'misses': counters.get(f'{KEY_PREFIX}:stats:{name}:miss', 0),
+        }
+        for name in READ_MODELS
+    }
+
+
+def _cached(name, builder):
+    key = f'{KEY_PREFIX}:{name}:v{current_version()}'
+    data = cache.get(key)
+    if data is None:
+        _count(name, 'miss')
+        data = builder()
+        cache.set(key, data, CACHE_TTL)
+    else:
+        _count(name, 'hit')
+    return data
+
+
+def _image(field):
+    return {'url': field.url} if field else None
+
+
+def _team_data(team):
+    return {'id': team.id, 'team_name': team.team_name, 'logo': _image(team.logo)}
+
+
+def _player_data(player):
+    return {
+        'id': player.id,
+        'full_name': player.full_name,
+        'photo': _image(player.photo),
+        'position': player.position,
+        'goals_scored': player.goals_scored,
+        'clean_sheets': player.clean_sheets,
+        'matches_played': player.matches_played,
+        'team': _team_data(player.team),
+    }
+
+
+def _build_league_standings():
+    standings = {
+        zone.id: {'zone': {'id': zone.id, 'name': zone.name}, 'table': []}
+        for zone in Zone.objects.all()
+    }
+    entries = LeagueTable.objects.select_related('team').order_by(
+        'zone_id', '-points', '-goal_difference', '-goals_for'
+    )
+    for entry in entries:
+        table = standings[entry.zone_id]['table']
+        if len(table) < TABLE_ROWS_PER_ZONE:
+            table.append({
+                'id': entry.id,
+                'team': _team_data(entry.team),
+                'matches_played': entry.matches_played,
+                'wins': entry.wins,
+                'draws': entry.draws,
+                'losses': entry.losses,
+                'goals_for': entry.goals_for,
+                'goals_against': entry.goals_against,
+                'goal_difference': entry.goal_difference,
+                'points': entry.points,
+                'form': entry.form,
+            })
+    return list(standings.values())
+
+
+def league_standings():
+    """Per-zone league tables (zones in name order, top 20 rows each)."""
+    return _cached('league_standings', _build_league_standings)
+
+
+def top_scorers():
+    """League-wide top scorers."""
+    return _cached('top_scorers', lambda: [
+        _player_data(player)
+        for player in Player.objects.filter(goals_scored__gt=0).select_related('team')
+        .order_by('-goals_scored')[:LEADERBOARD_SIZE]
+    ])
+
+
+def goalkeepers():
+    """Goalkeepers with the most clean sheets."""
+    return _cached('goalkeepers', lambda: [
+        _player_data(player)
+        for player in Player.objects.filter(position='GK', matches_played__gt=0).select_related('team')
+        .order_by('-clean_sheets', '-matches_played')[:LEADERBOARD_SIZE]
+    ])
+
+
+def _build_scorers_by_zone():
+    by_zone = {
+        zone.id: {'zone': {'id': zone.id, 'name': zone.name}, 'scorers': []}
+        for zone in Zone.objects.all()
+    }
+    scorers = []
+    for player in Player.objects.filter(goals_scored__gt=0).select_related('team').order_by('-goals_scored'):
+        data = _player_data(player)
+        scorers.append(data)
+        zone_scorers = by_zone.get(player.team.zone_id)
+        if zone_scorers and len(zone_scorers['scorers']) < SCORERS_PER_ZONE:
+            zone_scorers['scorers'].append(data)
+    return {'scorers': scorers, 'zones': list(by_zone.values())}
+
+
+def scorers_by_zone():
+    """All scorers plus the top 20 of each zone: {'scorers': [...], 'zones': [...]}."""
+    return _cached('scorers_by_zone', _build_scorers_by_zone)
+
+
+def fixture_filter_options():
+    """Zones and distinct round numbers offered as filters on the fixtures page."""
+    return _cached('fixture_filters', lambda: {
+        'zones': [{'id': zone.id, 'name': zone.name} for zone in Zone.objects.all()],
+        'rounds': list(Match.objects.values_list('round_number', flat=True).distinct().order_by('round_number')),
+    })
@@ -1,52 +1,72 @@
 # matches/signals.py - CREATE THIS NEW FILE
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+import logging
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_delete, post_delete
 from django.dispatch import receiver
+
 from matches.models import Match, LeagueTable
-from teams.models import Team, Zone
-from matches.utils.fixture_generator import generate_fixtures_for_zone
+from matches.standings import (
+    match_result_changed, rebuild_league_table, refresh_form_guides, sync_match_result,
+    withdraw_match_result,
+)
+from matches.read_models import invalidate_read_models
+from teams.models import Team, Zone, Player
+from matches.utils.fixture_generator import queue_zone_fixtures
 
-# --- Existing signal for fixture generation ---
-# --- New signal for updating LeagueTable.form ---
+logger = logging.getLogger(__name__)
+
+# --- Incremental league table: apply/correct/withdraw a match result ---
 @receiver(post_save, sender=Match)
-def update_league_table_form(sender, instance, **kwargs):
-    if instance.status != 'completed':
+def update_league_table_on_result(sender, instance, created, **kwargs):
+    if created:
+        if instance.status != 'completed':
+            return
+    elif not instance.has_changed(*Match.RESULT_FIELDS, 'zone_id', 'home_team_id', 'away_team_id'):
         return
-    for team in [instance.home_team, instance.away_team]:
-        # Get last 5 completed matches for this team (as home or away)
-        recent_matches = Match.objects.filter(
-            ((models.Q(home_team=team) | models.Q(away_team=team)) & models.Q(status='completed'))
-        ).order_by('-match_date')[:5]
-        form = ''
-        for match in recent_matches:
-            if match.home_team == team:
-                if match.home_score > match.away_score:
-                    form += 'W'
-                elif match.home_score < match.away_score:
-                    form += 'L'
-                else:
-                    form += 'D'
-            else:
-                if match.away_score > match.home_score:
-                    form += 'W'
-                elif match.away_score < match.home_score:
-                    form += 'L'
-                else:
-                    form += 'D'
-        # Save to LeagueTable
-        try:
-            league_table = LeagueTable.objects.get(team=team, zone=instance.zone)
-            league_table.form = form
-            league_table.save(update_fields=['form'])
-        except LeagueTable.DoesNotExist:
-            pass
+    sync_match_result(instance)
+
+
+@receiver(pre_delete, sender=Match)
+def withdraw_league_table_result(sender, instance, **kwargs):
+    instance._result_withdrawn = withdraw_match_result(instance)
+
+
+@receiver(post_delete, sender=Match)
+def announce_withdrawn_result(sender, instance, **kwargs):
+    if getattr(instance, '_result_withdrawn', False):
+        match_result_changed.send(sender=Match, match=instance, zone_ids={instance.zone_id})
 
+# --- Form guide: recomputed for the zone only when a result actually changed ---
+@receiver(match_result_changed)
+def update_league_table_form(sender, match, zone_ids, **kwargs):
+    for zone_id in zone_ids:
+        refresh_form_guides(zone_id)
+
+# --- Public standings/top-scorer read models: stale after any result event ---
+@receiver(match_result_changed)
+@receiver(post_save, sender=LeagueTable)
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+@receiver(post_save, sender=Zone)
+@receiver(post_delete, sender=Match)
+def invalidate_public_read_models(sender, **kwargs):
+    invalidate_read_models()
+
+
+@receiver(post_save, sender=Match)
+def invalidate_fixture_filters(sender, instance, created, **kwargs):
+    # Rounds offered on the fixtures page only change with new or moved matches
+    if created or instance.has_changed('round_number', 'zone_id'):
+        invalidate_read_models()
+
+# --- Existing signal for fixture generation ---
 @receiver(post_save, sender=Team)
 def auto_generate_fixtures_on_team_approval(sender, instance, created, **kwargs):
     """
-    AUTOMATICALLY GENERATE FIXTURES WHEN:
+    AUTOMATICALLY QUEUE FIXTURE GENERATION WHEN:
     1. A team is approved (status='approved')
     2. AND assigned to a zone
     3. AND zone has minimum required teams (default: 4 teams)
@@ -71,13 +91,16 @@ def auto_generate_fixtures_on_team_approval(sender, instance, created, **kwargs)
         # Change this number if you want different minimum
         MINIMUM_TEAMS_REQUIRED = 4
         
-        # If zone has enough teams, generate fixtures
+        # If zone has enough teams, queue fixture generation for the worker
+        # (run_jobs) so the approving request doesn't wait for a whole season.
+        # Queued on commit, so a rolled-back approval leaves no job behind.
         if approved_teams_in_zone >= MINIMUM_TEAMS_REQUIRED:
-            # Generate fixtures automatically
-            success, message = generate_fixtures_for_zone(zone.id)
-            
-            # Optional: Log to console (remove in production)
-            print(f"🎯 AUTO-GENERATED FIXTURES: {message}")
+            transaction.on_commit(lambda: _queue_zone_fixtures(zone))
+
+
+def _queue_zone_fixtures(zone):
+    job = queue_zone_fixtures(zone.id)
+    logger.info("Queued fixture generation for %s (job #%s)", zone.name, job.id)
 
 # --- New signal: Ensure LeagueTable is created/updated for team-zone changes ---
 @receiver(post_save, sender=Team)
@@ -87,7 +110,13 @@ def ensure_league_table_for_team(sender, instance, created, **kwargs):
     """
     if instance.status == 'approved' and instance.zone:
         # Create or update LeagueTable for this team and zone
-        LeagueTable.objects.get_or_create(team=instance, zone=instance.zone)
+        _, created = LeagueTable.objects.get_or_create(team=instance, zone=instance.zone)
+        # A team coming back (re-approved) gets its results back from the
+        # ledger's matches instead of a zeroed row
+        if created and Match.objects.filter(
+            Q(home_team=instance) | Q(away_team=instance), zone=instance.zone, status='completed'
+        ).exists():
+            rebuild_league_table(instance.zone_id)
     # Optionally, handle removal if team is moved out of a zone or status changes
     if instance.zone is None or instance.status != 'approved':
         LeagueTable.objects.filter(team=instance).delete()
\ No newline at end of file
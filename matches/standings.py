@@ -0,0 +1,281 @@
+# matches/standings.py
+"""
+Incremental league-table engine.
+
+Every completed match contributes a fixed delta to the two LeagueTable rows of
+its teams. The delta currently applied is recorded in LeagueTableResult, so a
+result can be applied, corrected or withdrawn with a constant number of UPDATE
+statements and without re-reading the season's history.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, Q, Sum, When
+from django.utils import timezone
+
+from django.dispatch import Signal
+
+from matches.models import Match, LeagueTable, LeagueTableResult
+from matches.read_models import invalidate_read_models
+
+
+# Sent after a match's contribution to the league table has changed.
+# Receivers get ``match`` and ``zone_ids`` (every zone whose table moved).
+match_result_changed = Signal()
+
+
+STAT_FIELDS = ['matches_played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against']
+
+
+def result_delta(goals_for, goals_against):
+    """Table delta for one team that scored goals_for and conceded goals_against."""
+    won = int(goals_for > goals_against)
+    drawn = int(goals_for == goals_against)
+    lost = int(goals_for < goals_against)
+    return {
+        'matches_played': 1,
+        'wins': won,
+        'draws': drawn,
+        'losses': lost,
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+        'goal_difference': goals_for - goals_against,
+        'points': won * 3 + drawn,
+    }
+
+
+def _apply_team_delta(team_id, zone_id, delta, sign):
+    """
+    Add ``sign`` times ``delta`` to the team's row. Returns False when the team
+    has no row: it was deleted (team un-approved, or removed in the admin) and
+    so holds none of the results in the ledger; the caller rebuilds the zone.
+    """
+    updates = {field: F(field) + sign * value for field, value in delta.items()}
+    updates['last_updated'] = timezone.now()
+    return bool(LeagueTable.objects.filter(team_id=team_id, zone_id=zone_id).update(**updates))
+
+
+def _apply_result(zone_id, home_team_id, away_team_id, home_score, away_score, sign):
+    home = _apply_team_delta(home_team_id, zone_id, result_delta(home_score, away_score), sign)
+    away = _apply_team_delta(away_team_id, zone_id, result_delta(away_score, home_score), sign)
+    return home and away
+
+
+def sync_match_result(match):
+    """
+    Bring the league table in line with the current state of ``match``.
+
+    Completed matches are counted with their current score, anything else is
+    not counted at all. Calling this again for an unchanged match is a no-op.
+    If a team of the match has no table row, the zone is rebuilt instead, so
+    the row comes back with the team's whole history and no delta is taken
+    from a row that never received it. Returns True when the table was changed.
+    """
+    counts = match.status == 'completed'
+    with transaction.atomic():
+        applied = LeagueTableResult.objects.select_for_update().filter(match_id=match.pk).first()
+
+        if applied and counts and (
+            applied.zone_id == match.zone_id
+            and applied.home_team_id == match.home_team_id
+            and applied.away_team_id == match.away_team_id
+            and applied.home_score == match.home_score
+            and applied.away_score == match.away_score
+        ):
+            return False
+        if not applied and not counts:
+            return False
+
+        zone_ids = {match.zone_id} if counts else set()
+        complete = True
+        if applied:
+            zone_ids.add(applied.zone_id)
+            complete &= _apply_result(applied.zone_id, applied.home_team_id, applied.away_team_id,
+                                      applied.home_score, applied.away_score, -1)
+
+        if counts:
+            complete &= _apply_result(match.zone_id, match.home_team_id, match.away_team_id,
+                                      match.home_score, match.away_score, 1)
+            LeagueTableResult.objects.update_or_create(
+                match_id=match.pk,
+                defaults={
+                    'zone_id': match.zone_id,
+                    'home_team_id': match.home_team_id,
+                    'away_team_id': match.away_team_id,
+                    'home_score': match.home_score,
+                    'away_score': match.away_score,
+                },
+            )
+        else:
+            applied.delete()
+
+        if not complete:
+            for zone_id in zone_ids:
+                rebuild_league_table(zone_id)
+    match_result_changed.send(sender=Match, match=match, zone_ids=zone_ids)
+    return True
+
+
+def withdraw_match_result(match):
+    """
+    Remove whatever ``match`` currently contributes to the league table.
+    Used just before a match is deleted; the caller announces the change
+    once the row is gone. A team without a table row is simply skipped.
+    """
+    with transaction.atomic():
+        applied = LeagueTableResult.objects.select_for_update().filter(match_id=match.pk).first()
+        if not applied:
+            return False
+        _apply_result(applied.zone_id, applied.home_team_id, applied.away_team_id,
+                      applied.home_score, applied.away_score, -1)
+        applied.delete()
+    return True
+
+
+def _side_totals(completed, team, scored, conceded):
+    return completed.values(team_id=F(team)).annotate(
+        played=Count('id'),
+        won=Sum(Case(When(**{f'{scored}__gt': F(conceded)}, then=1), default=0)),
+        drawn=Sum(Case(When(**{scored: F(conceded)}, then=1), default=0)),
+        lost=Sum(Case(When(**{f'{scored}__lt': F(conceded)}, then=1), default=0)),
+        scored=Sum(scored),
+        conceded=Sum(conceded),
+    ).order_by()
+
+
+def expected_standings(zone_id):
+    """
+    Standings of a zone recomputed from its completed Match rows.
+
+    Home and away totals are grouped in SQL and combined with UNION ALL, so
+    the whole zone costs one aggregate query. Returns {team_id: {field: value}}.
+    """
+    completed = Match.objects.filter(zone_id=zone_id, status='completed')
+    home = _side_totals(completed, 'home_team_id', 'home_score', 'away_score')
+    away = _side_totals(completed, 'away_team_id', 'away_score', 'home_score')
+
+    standings = {}
+    for row in home.union(away, all=True):
+        stats = standings.setdefault(row['team_id'], dict.fromkeys(STAT_FIELDS, 0))
+        stats['matches_played'] += row['played']
+        stats['wins'] += row['won']
+        stats['draws'] += row['drawn']
+        stats['losses'] += row['lost']
+        stats['goals_for'] += row['scored']
+        stats['goals_against'] += row['conceded']
+    for stats in standings.values():
+        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+        stats['points'] = stats['wins'] * 3 + stats['draws']
+    return standings
+
+
+FORM_GUIDE_SQL = """
+    SELECT team_id, result FROM (
+        SELECT team_id, result,
+               ROW_NUMBER() OVER (PARTITION BY team_id ORDER BY match_date DESC, id DESC) AS position
+        FROM (
+            SELECT home_team_id AS team_id, id, match_date,
+                   CASE WHEN home_score > away_score THEN 'W'
+                        WHEN home_score < away_score THEN 'L' ELSE 'D' END AS result
+            FROM {table} WHERE zone_id = %s AND status = 'completed'
+            UNION ALL
+            SELECT away_team_id AS team_id, id, match_date,
+                   CASE WHEN away_score > home_score THEN 'W'
+                        WHEN away_score < home_score THEN 'L' ELSE 'D' END AS result
+            FROM {table} WHERE zone_id = %s AND status = 'completed'
+        ) sides
+    ) ranked
+    WHERE position <= %s
+    ORDER BY team_id, position
+"""
+
+
+def form_guides(zone_id, length=5):
+    """
+    Last ``length`` results (most recent first) of every team in a zone.
+    Ranks each team's results with a window function, so the whole zone is
+    a single query.
+    """
+    sql = FORM_GUIDE_SQL.format(table=connection.ops.quote_name(Match._meta.db_table))
+    guides = {}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [zone_id, zone_id, length])
+        for team_id, result in cursor.fetchall():
+            guides[team_id] = guides.get(team_id, '') + result
+    return guides
+
+
+def refresh_form_guides(zone_id):
+    """Rewrite the form column of a zone's table rows whose guide changed."""
+    guides = form_guides(zone_id)
+    stale = []
+    for row in LeagueTable.objects.filter(zone_id=zone_id).only('id', 'team_id', 'form'):
+        form = guides.get(row.team_id, '')
+        if row.form != form:
+            row.form = form
+            stale.append(row)
+    LeagueTable.objects.bulk_update(stale, ['form'], batch_size=500)
+    return len(stale)
+
+
+def rebuild_league_table(zone_id):
+    """
+    Recompute every LeagueTable row of a zone from its completed matches and
+    reset the applied-result ledger to match. Returns the number of rows written.
+    """
+    standings = expected_standings(zone_id)
+    guides = form_guides(zone_id)
+    fields = STAT_FIELDS + ['goal_difference', 'points', 'form', 'last_updated']
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = {row.team_id: row for row in LeagueTable.objects.filter(zone_id=zone_id)}
+        missing = [LeagueTable(team_id=team_id, zone_id=zone_id) for team_id in standings if team_id not in rows]
+        if missing:
+            LeagueTable.objects.bulk_create(missing)
+            rows = {row.team_id: row for row in LeagueTable.objects.filter(zone_id=zone_id)}
+
+        for team_id, row in rows.items():
+            stats = standings.get(team_id, {})
+            for field in STAT_FIELDS + ['goal_difference', 'points']:
+                setattr(row, field, stats.get(field, 0))
+            row.form = guides.get(team_id, '')
+            row.last_updated = now
+        LeagueTable.objects.bulk_update(rows.values(), fields, batch_size=500)
+
+        LeagueTableResult.objects.filter(Q(zone_id=zone_id) | Q(match__zone_id=zone_id)).delete()
+        LeagueTableResult.objects.bulk_create([
+            LeagueTableResult(
+                match_id=match_id,
+                zone_id=zone_id,
+                home_team_id=home_id,
+                away_team_id=away_id,
+                home_score=home_score,
+                away_score=away_score,
+            )
+            for match_id, home_id, away_id, home_score, away_score in Match.objects.filter(
+                zone_id=zone_id, status='completed'
+            ).values_list('id', 'home_team_id', 'away_team_id', 'home_score', 'away_score')
+        ], batch_size=500)
+    invalidate_read_models()
+    return len(rows)
+
+
+def verify_league_table(zone_id):
+    """
+    Compare the stored LeagueTable rows of a zone with the completed matches.
+    Returns a list of (team_id, field, stored, expected) mismatches; an empty
+    list proves the table is consistent with the results.
+    """
+    expected = expected_standings(zone_id)
+    fields = STAT_FIELDS + ['goal_difference', 'points']
+    mismatches = []
+    stored_rows = LeagueTable.objects.filter(zone_id=zone_id).values('team_id', *fields)
+    seen = set()
+    for row in stored_rows:
+        seen.add(row['team_id'])
+        stats = expected.get(row['team_id'], {})
+        for field in fields:
+            if row[field] != stats.get(field, 0):
+                mismatches.append((row['team_id'], field, row[field], stats.get(field, 0)))
+    for team_id in set(expected) - seen:
+        mismatches.append((team_id, 'row', None, expected[team_id]['points']))
+    return mismatches
@@ -1,3 +1,450 @@
+from collections import Counter
+from datetime import date, timedelta
+from itertools import combinations
+
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from fkf_league.testing import isolate_activity_log, make_match, make_team
+from matches import read_models, views
+from matches.models import LeagueTable, LeagueTableResult, Match
+from matches.standings import form_guides, match_result_changed, rebuild_league_table, verify_league_table
+from matches.utils.fixture_generator import generate_fixtures_for_all_zones
+from matches.utils.scheduler import MAX_DAYS_PER_ROUND, build_schedule, matchday_slots, schedule_report
+from teams.models import Zone
+
+
+class LeagueTableEngineTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone A')
+        self.home = make_team(self.zone)
+        self.away = make_team(self.zone)
+
+    def row(self, team):
+        return LeagueTable.objects.get(team=team)
+
+    def test_completed_result_is_applied(self):
+        make_match(self.zone, self.home, self.away, home_score=2, away_score=1, status='completed')
+
+        home, away = self.row(self.home), self.row(self.away)
+        self.assertEqual((home.matches_played, home.wins, home.points, home.goal_difference), (1, 1, 3, 1))
+        self.assertEqual((away.matches_played, away.losses, away.points, away.goal_difference), (1, 1, 0, -1))
+        self.assertEqual(verify_league_table(self.zone.id), [])
+
+    def test_corrected_result_replaces_the_old_one(self):
+        match = make_match(self.zone, self.home, self.away, home_score=2, away_score=1, status='completed')
+        match.away_score = 2
+        match.save()
+
+        home = self.row(self.home)
+        self.assertEqual((home.matches_played, home.wins, home.draws, home.points), (1, 0, 1, 1))
+        self.assertEqual((home.goals_for, home.goals_against), (2, 2))
+        self.assertEqual(LeagueTableResult.objects.count(), 1)
+        self.assertEqual(verify_league_table(self.zone.id), [])
+
+    def test_saving_an_unchanged_result_does_not_count_it_twice(self):
+        match = make_match(self.zone, self.home, self.away, home_score=1, away_score=0, status='completed')
+        match.venue = 'Other Stadium'
+        match.save()
+
+        self.assertEqual(self.row(self.home).matches_played, 1)
+
+    def test_result_withdrawn_when_match_is_postponed(self):
+        match = make_match(self.zone, self.home, self.away, home_score=3, away_score=0, status='completed')
+        match.status = 'postponed'
+        match.save()
+
+        home = self.row(self.home)
+        self.assertEqual((home.matches_played, home.points, home.goals_for), (0, 0, 0))
+        self.assertFalse(LeagueTableResult.objects.exists())
+        self.assertEqual(verify_league_table(self.zone.id), [])
+
+    def test_result_withdrawn_when_match_is_deleted(self):
+        match = make_match(self.zone, self.home, self.away, home_score=0, away_score=1, status='completed')
+        match.delete()
+
+        away = self.row(self.away)
+        self.assertEqual((away.matches_played, away.points), (0, 0))
+        self.assertEqual(verify_league_table(self.zone.id), [])
+
+    def test_reapproved_team_gets_its_results_back_before_a_correction(self):
+        match = make_match(self.zone, self.home, self.away, home_score=2, away_score=1, status='completed')
+        self.home.status = 'pending'
+        self.home.save()
+        self.assertFalse(LeagueTable.objects.filter(team=self.home).exists())
+        self.home.status = 'approved'
+        self.home.save()
+        self.assertEqual(self.row(self.home).points, 3)
+
+        match.away_score = 3
+        match.save()
+
+        home = self.row(self.home)
+        self.assertEqual((home.matches_played, home.wins, home.losses, home.points), (1, 0, 1, 0))
+        self.assertEqual(verify_league_table(self.zone.id), [])
+
+    def test_correction_rebuilds_a_row_deleted_in_the_admin(self):
+        match = make_match(self.zone, self.home, self.away, home_score=2, away_score=1, status='completed')
+        LeagueTable.objects.filter(team=self.home).delete()
+
+        match.home_score = 0
+        match.save()
+
+        home = self.row(self.home)
+        self.assertEqual((home.matches_played, home.losses, home.goals_for, home.points), (1, 1, 0, 0))
+        self.assertEqual(verify_league_table(self.zone.id), [])
+
+    def test_rebuild_repairs_a_drifted_table(self):
+        third = make_team(self.zone)
+        make_match(self.zone, self.home, self.away, days=1, home_score=2, away_score=0, status='completed')
+        make_match(self.zone, self.away, third, days=2, home_score=1, away_score=1, status='completed')
+        LeagueTable.objects.filter(zone=self.zone).update(points=99)
+        self.assertNotEqual(verify_league_table(self.zone.id), [])
+
+        rebuild_league_table(self.zone.id)
+
+        self.assertEqual(verify_league_table(self.zone.id), [])
+        self.assertEqual(self.row(self.home).points, 3)
+        self.assertEqual(self.row(self.away).points, 1)
+
+
+class MatchChangeTrackingTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(name='Zone D')
+        self.other = make_team(zone)
+        self.match = Match.objects.get(pk=make_match(zone, make_team(zone), make_team(zone)).pk)
+
+    def test_changes_are_tracked_until_saved(self):
+        self.assertFalse(self.match.has_changed())
+
+        self.match.venue = 'Kinoru Stadium'
+        self.match.home_team = self.other
+
+        self.assertEqual(self.match.changed_fields, {'venue', 'home_team_id'})
+        self.assertTrue(self.match.has_changed('venue', 'status'))
+        self.assertFalse(self.match.has_changed(*Match.RESULT_FIELDS))
+        self.assertEqual(self.match.previous_value('venue'), 'Stadium')
+        self.match.save()
+        self.assertFalse(self.match.has_changed())
+
+    def test_update_fields_save_only_settles_the_saved_fields(self):
+        self.match.status = 'postponed'
+        self.match.venue = 'Kinoru Stadium'
+
+        self.match.save(update_fields=['status'])
+
+        self.assertEqual(self.match.changed_fields, {'venue'})
+
+    def test_refresh_and_deferred_loads_start_clean(self):
+        self.match.venue = 'Kinoru Stadium'
+        self.match.refresh_from_db()
+        self.assertFalse(self.match.has_changed())
+
+        deferred = Match.objects.only('id', 'status').get(pk=self.match.pk)
+        self.assertFalse(deferred.has_changed())
+
+
+class ReadModelCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['local'].clear()
+        self.addCleanup(caches['local'].clear)
+        self.zone = Zone.objects.create(name='Zone R')
+        self.home = make_team(self.zone)
+        self.away = make_team(self.zone)
+
+    def test_second_read_is_served_from_the_cache(self):
+        first = read_models.league_standings()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(read_models.league_standings(), first)
+        # Only the cache table is read (the default cache is database-backed)
+        self.assertTrue(all('fkf_cache' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(read_models.cache_stats()['league_standings'], {'hits': 1, 'misses': 1})
+        self.assertEqual(read_models.cache_stats()['top_scorers'], {'hits': 0, 'misses': 0})
+
+    def test_result_bumps_the_version(self):
+        self.assertEqual(read_models.league_standings()[0]['table'][0]['points'], 0)
+        version = read_models.current_version()
+
+        make_match(self.zone, self.home, self.away, home_score=3, away_score=0, status='completed')
+
+        self.assertGreater(read_models.current_version(), version)
+        table = read_models.league_standings()[0]['table']
+        self.assertEqual((table[0]['team']['id'], table[0]['points']), (self.home.id, 3))
+        self.assertEqual(read_models.cache_stats()['league_standings'], {'hits': 0, 'misses': 2})
+
+    def test_public_pages_render_the_read_models(self):
+        isolate_activity_log(self)
+        make_match(self.zone, self.home, self.away, home_score=1, away_score=0, status='completed')
+
+        response = self.client.get('/matches/tables/')
+        self.assertContains(response, self.home.team_name)
+        self.assertEqual(self.client.get('/matches/top-scorers/').status_code, 200)
+        self.assertEqual(read_models.cache_stats()['league_standings']['misses'], 1)
+
+
+class FixturesKeysetTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone F')
+        home, away = make_team(self.zone), make_team(self.zone)
+        kickoff = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        # Pairs share a kick-off time, so the id has to break the tie
+        self.matches = [
+            make_match(self.zone, home, away, match_date=kickoff + timedelta(hours=index // 2))
+            for index in range(7)
+        ]
+
+    def ids(self, page):
+        return [match.id for match in page]
+
+    def test_cursors_walk_forward_and_back(self):
+        queryset = Match.objects.all()
+        page, next_cursor, prev_cursor = views._keyset_page(queryset, page_size=3)
+        self.assertEqual(self.ids(page), self.ids(self.matches[:3]))
+        self.assertIsNone(prev_cursor)
+
+        page, next_cursor, prev_cursor = views._keyset_page(queryset, after=next_cursor, page_size=3)
+        self.assertEqual(self.ids(page), self.ids(self.matches[3:6]))
+        middle_prev = prev_cursor
+
+        page, next_cursor, prev_cursor = views._keyset_page(queryset, after=next_cursor, page_size=3)
+        self.assertEqual(self.ids(page), self.ids(self.matches[6:]))
+        self.assertIsNone(next_cursor)
+
+        page, next_cursor, prev_cursor = views._keyset_page(queryset, before=middle_prev, page_size=3)
+        self.assertEqual(self.ids(page), self.ids(self.matches[:3]))
+        self.assertIsNone(prev_cursor)
+
+    def test_bad_cursor_falls_back_to_the_first_page(self):
+        page, _, prev_cursor = views._keyset_page(Match.objects.all(), after='not-a-cursor', page_size=3)
+        self.assertEqual(self.ids(page), self.ids(self.matches[:3]))
+        self.assertIsNone(prev_cursor)
+
+    def test_fixtures_page_links_to_the_next_page(self):
+        isolate_activity_log(self)
+        with mock.patch.object(views._keyset_page, '__defaults__', (None, None, 3)):
+            response = self.client.get('/matches/fixtures/', {'status': 'upcoming', 'zone': self.zone.id})
+            self.assertEqual(self.ids(response.context['upcoming_matches']), self.ids(self.matches[:3]))
+            self.assertEqual(response.context['upcoming_count'], 7)
+
+            response = self.client.get('/matches/fixtures/', {
+                'status': 'upcoming', 'zone': self.zone.id, 'after': response.context['next_cursor'],
+            })
+        self.assertEqual(self.ids(response.context['upcoming_matches']), self.ids(self.matches[3:6]))
+        self.assertIsNotNone(response.context['prev_cursor'])
+        self.assertIn('status=upcoming', response.context['filter_query'])
+        self.assertNotIn('after=', response.context['filter_query'])
+
+
+class LeagueTableRebuildTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone B')
+        self.teams = [make_team(self.zone) for _ in range(4)]
+
+    def play_round_robin(self, zone, teams):
+        for day, (home, away) in enumerate(combinations(teams, 2)):
+            make_match(zone, home, away, days=day, home_score=day % 3, away_score=1, status='completed')
+
+    def test_command_rebuilds_only_the_given_zone(self):
+        other_zone = Zone.objects.create(name='Zone C')
+        other_teams = [make_team(other_zone) for _ in range(2)]
+        self.play_round_robin(self.zone, self.teams)
+        self.play_round_robin(other_zone, other_teams)
+        LeagueTable.objects.update(points=99)
+
+        out = StringIO()
+        call_command('rebuild_league_tables', zone=self.zone.id, stdout=out)
+
+        self.assertIn('Zone B: 4 rows rebuilt', out.getvalue())
+        self.assertEqual(verify_league_table(self.zone.id), [])
+        self.assertNotEqual(verify_league_table(other_zone.id), [])
+
+    def test_rebuild_cost_does_not_grow_with_the_season(self):
+        def rebuild_queries():
+            with CaptureQueriesContext(connection) as queries:
+                rebuild_league_table(self.zone.id)
+            return len(queries)
+
+        self.play_round_robin(self.zone, self.teams[:2])
+        few = rebuild_queries()
+        self.play_round_robin(self.zone, self.teams)
+        self.play_round_robin(self.zone, self.teams)
+
+        self.assertEqual(rebuild_queries(), few)
+        self.assertEqual(verify_league_table(self.zone.id), [])
+        self.assertEqual(LeagueTableResult.objects.filter(zone=self.zone).count(), 13)
+
+
+class FormGuideTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone F')
+        self.home = make_team(self.zone)
+        self.away = make_team(self.zone)
+        self.changes = []
+        match_result_changed.connect(self.record_change)
+        self.addCleanup(match_result_changed.disconnect, self.record_change)
+
+    def record_change(self, sender, match, zone_ids, **kwargs):
+        self.changes.append(match.pk)
+
+    def test_guide_lists_the_last_five_results_most_recent_first(self):
+        scores = [(1, 0), (0, 0), (0, 2), (3, 1), (2, 2), (1, 0), (0, 1)]
+        for day, (home_score, away_score) in enumerate(scores, start=1):
+            make_match(self.zone, self.home, self.away, days=day,
+                       home_score=home_score, away_score=away_score, status='completed')
+        make_match(self.zone, self.home, self.away, days=10)
+
+        with self.assertNumQueries(1):
+            guides = form_guides(self.zone.id)
+
+        self.assertEqual(guides, {self.home.id: 'LWDWL', self.away.id: 'WLDLW'})
+        self.assertEqual(LeagueTable.objects.get(team=self.home).form, 'LWDWL')
+
+    def test_form_follows_corrections_and_deletions(self):
+        first = make_match(self.zone, self.home, self.away, days=1, home_score=1, away_score=0, status='completed')
+        second = make_match(self.zone, self.away, self.home, days=2, home_score=1, away_score=0, status='completed')
+        self.assertEqual(LeagueTable.objects.get(team=self.home).form, 'LW')
+
+        second.home_score = 0
+        second.save()
+        self.assertEqual(LeagueTable.objects.get(team=self.home).form, 'DW')
+
+        first.delete()
+        self.assertEqual(LeagueTable.objects.get(team=self.home).form, 'D')
+
+    def test_edits_that_leave_the_result_alone_do_not_recompute_the_form(self):
+        match = make_match(self.zone, self.home, self.away, home_score=1, away_score=0, status='completed')
+        self.changes.clear()
+
+        match.venue = 'Kinoru Stadium'
+        match.save()
+        match.match_date += timedelta(hours=2)
+        match.save()
+
+        self.assertEqual(self.changes, [])
+
+
+class GenerateAllZonesTests(TestCase):
+    def zone_with_teams(self, name, count, **kwargs):
+        zone = Zone.objects.create(name=name, **kwargs)
+        for _ in range(count):
+            make_team(zone)
+        return zone
+
+    def test_ready_zones_are_generated_in_one_batch(self):
+        north = self.zone_with_teams('North', 4)
+        south = self.zone_with_teams('South', 6)
+        self.zone_with_teams('Lonely', 1)
+        self.zone_with_teams('Done', 4, fixtures_generated=True)
+
+        success, message, generated = generate_fixtures_for_all_zones(max_workers=2)
+
+        self.assertTrue(success)
+        self.assertEqual(generated, {'North': 6, 'South': 15})
+        self.assertEqual(Match.objects.filter(zone=north).count(), 6)
+        self.assertEqual(Match.objects.filter(zone=south).count(), 15)
+        self.assertEqual(Match.objects.count(), 21)
+        self.assertIn('21 fixtures in 2 zones', message)
+        north.refresh_from_db()
+        self.assertTrue(north.fixtures_generated)
+        self.assertIsNotNone(north.season_start_date)
+        self.assertEqual(read_models.fixture_filter_options()['rounds'], [1, 2, 3, 4, 5])
+
+    def test_zone_ids_limit_the_batch(self):
+        north = self.zone_with_teams('North', 4)
+        self.zone_with_teams('South', 4)
+
+        success, _, generated = generate_fixtures_for_all_zones(zone_ids=[north.id])
+
+        self.assertTrue(success)
+        self.assertEqual(generated, {'North': 6})
+        self.assertFalse(Zone.objects.get(name='South').fixtures_generated)
+
+    def test_no_ready_zones(self):
+        self.zone_with_teams('Lonely', 1)
+        self.zone_with_teams('Done', 4, fixtures_generated=True)
+
+        self.assertEqual(
+            generate_fixtures_for_all_zones(),
+            (False, "No zones are ready for fixture generation", {}),
+        )
+        self.assertFalse(Match.objects.exists())
+
+
+class SchedulerTests(TestCase):
+    def assertValidRoundRobin(self, team_ids, rounds, legs):
+        team_ids = list(team_ids)
+        per_leg = len(team_ids) - 1 + len(team_ids) % 2
+        self.assertEqual(len(rounds), per_leg * legs)
+        for pairs in rounds:
+            playing = [team for pair in pairs for team in pair]
+            self.assertEqual(len(playing), len(set(playing)), "a team plays twice in one round")
+            self.assertLessEqual(len(team_ids) - len(playing), 1)
+        meetings = Counter(frozenset(pair) for pairs in rounds for pair in pairs)
+        self.assertEqual(set(meetings), {frozenset(pair) for pair in combinations(team_ids, 2)})
+        self.assertEqual(set(meetings.values()), {legs})
+        if legs == 2:
+            fixtures = Counter(pair for pairs in rounds for pair in pairs)
+            self.assertEqual(set(fixtures.values()), {1}, "second leg must swap home and away")
+
+    def test_single_and_double_round_robins_are_valid(self):
+        for size in range(2, 11):
+            for legs in (1, 2):
+                with self.subTest(size=size, legs=legs):
+                    team_ids = range(1, size + 1)
+                    self.assertValidRoundRobin(team_ids, build_schedule(team_ids, legs=legs, seed=size), legs)
+
+    def test_breaks_are_minimal(self):
+        for size in range(2, 11):
+            for legs in (1, 2):
+                with self.subTest(size=size, legs=legs):
+                    report = schedule_report(build_schedule(range(size), legs=legs, seed=1))
+                    self.assertLessEqual(report['max_breaks_per_team'], legs)
+                    self.assertLessEqual(report['longest_run'], 2)
+                    if legs == 1 and size % 2 == 0:
+                        # De Werra's lower bound for an even single round-robin
+                        self.assertEqual(report['total_breaks'], size - 2)
+
+    def test_teams_sharing_a_ground_are_never_home_together(self):
+        grounds = {1: 'Kinoru Stadium', 2: 'kinoru  stadium', 3: 'Meru Showground', 4: 'Meru Showground'}
+        for seed in range(5):
+            rounds = build_schedule([1, 2, 3, 4, 5, 6], grounds=grounds, seed=seed)
+            self.assertEqual(schedule_report(rounds, grounds)['venue_clashes'], 0)
+
+    def test_third_team_on_a_ground_gets_the_fewest_clashes(self):
+        # Six teams, three on one ground: two clashing matchdays is the minimum
+        grounds = {1: 'Kinoru Stadium', 2: 'Kinoru Stadium', 3: 'Kinoru Stadium'}
+        for seed in range(5):
+            rounds = build_schedule([1, 2, 3, 4, 5, 6], grounds=grounds, seed=seed)
+            self.assertEqual(schedule_report(rounds, grounds)['venue_clashes'], 2)
+
+    def test_matches_over_the_referee_capacity_never_leave_their_weekend(self):
+        rounds = build_schedule(range(10), seed=3)
+        sunday = 6
+        slots, catch_up = matchday_slots(rounds, date(2026, 3, 2), sunday, referee_capacity=1)
 
-# Create your tests here.
+        self.assertEqual(len(slots), 45)
+        self.assertEqual(len(catch_up), 9 * (5 - MAX_DAYS_PER_ROUND))
+        first_day = date(2026, 3, 8)
+        last_round_day = first_day + timedelta(weeks=len(rounds) - 1)
+        per_day = Counter(day for _, day, _, _, _ in slots)
+        self.assertEqual(set(per_day.values()), {1})
+        for slot in slots:
+            round_number, day = slot[:2]
+            week, offset = divmod((day - first_day).days, 7)
+            self.assertLess(offset, MAX_DAYS_PER_ROUND)
+            if slot in catch_up:
+                self.assertGreater(day, last_round_day + timedelta(days=1))
+            else:
+                self.assertEqual(week, round_number - 1)
+        teams_by_week = Counter(
+            ((day - first_day).days // 7, team) for _, day, _, home, away in catch_up for team in (home, away)
+        )
+        self.assertEqual(set(teams_by_week.values()), {1})
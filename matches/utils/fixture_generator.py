@@ -1,15 +1,24 @@
 # matches/utils/fixture_generator.py
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.db import transaction
 from teams.models import Team, Zone
 from matches.models import Match
-import random
+from matches.read_models import invalidate_read_models
+from matches.utils.scheduler import (
+    build_schedule, build_zone_schedule, schedule_report, matchday_slots, kickoff_datetime,
+)
 
-def generate_fixtures_for_zone(zone_id, start_date=None):
+def generate_fixtures_for_zone(zone_id, start_date=None, legs=1, referee_capacity=None):
     """
-    Generate SINGLE round-robin fixtures with alternating home/away
-    Teams alternate home/away matches each round when possible
+    Generate round-robin fixtures for a zone (single by default, double
+    with legs=2). Pairings and home/away come from the season scheduler:
+    at most one home/away break per team per leg, teams sharing a home
+    ground are never both at home on the same matchday, and no matchday
+    gets more matches than ``referee_capacity`` (surplus moves to the day
+    after, then to catch-up matchdays after the last round).
     """
     try:
         zone = Zone.objects.get(id=zone_id)
@@ -25,7 +34,29 @@ def generate_fixtures_for_zone(zone_id, start_date=None):
     if len(team_list) < 2:
         return False, f"Need at least 2 approved teams in zone (has {len(team_list)})"
     
-    # Determine start date (next SUNDAY)
+    # Determine start date (next SUNDAY, moved to the zone's match day)
+    start_date = first_matchday(zone, start_date)
+    
+    fixtures, report = plan_zone_fixtures(zone, team_list, start_date, legs, referee_capacity)
+    
+    # Save fixtures
+    with transaction.atomic():
+        Match.objects.bulk_create([Match(**fixture_data) for fixture_data in fixtures])
+        
+        zone.fixtures_generated = True
+        zone.fixture_generation_date = timezone.now()
+        zone.season_start_date = start_date
+        zone.save()
+    # bulk_create sends no post_save, so the cached round filters don't know
+    invalidate_read_models()
+    
+    # Create summary of home/away distribution
+    summary = create_home_away_summary(fixtures, report)
+    
+    return True, f"✅ Generated {len(fixtures)} fixtures for {zone.name}\n{summary}"
+
+def first_matchday(zone, start_date=None):
+    """First matchday on or after start_date (default: next Sunday) for the zone's match day."""
     if not start_date:
         today = timezone.now().date()
         days_to_sunday = (0 - today.weekday()) % 7
@@ -35,162 +66,117 @@ def generate_fixtures_for_zone(zone_id, start_date=None):
     
     match_day_of_week = getattr(zone, 'match_day_of_week', 0)
     days_to_match_day = (match_day_of_week - start_date.weekday()) % 7
-    start_date = start_date + timedelta(days=days_to_match_day)
-    
-    # Shuffle teams for random fixture order
-    random.shuffle(team_list)
-    n = len(team_list)
-    
-    # Track home/away balance for each team
-    home_away_balance = {team.id: {'home': 0, 'away': 0} for team in team_list}
-    
-    # If odd number of teams, add a BYE
-    if n % 2 == 1:
-        team_list.append(None)
-        n = len(team_list)
-    
-    total_rounds = n - 1 if team_list[-1] is None else n - 1
-    match_dates = []
-    current_date = start_date
+    return start_date + timedelta(days=days_to_match_day)
+
+def generate_fixtures_for_all_zones(zone_ids=None, start_date=None, legs=1, referee_capacity=None, max_workers=None):
+    """
+    Generate fixtures for every zone that has none yet and at least 2
+    approved teams (optionally limited to ``zone_ids``).
     
-    # Generate match dates
-    for round_num in range(total_rounds):
-        match_date = current_date
-        while match_date.weekday() != match_day_of_week:
-            match_date += timedelta(days=1)
-        match_dates.append(match_date)
-        current_date = match_date + timedelta(days=7)
+    Schedules are computed in a process pool, one zone per task, and all
+    Match rows are then written with a single bulk_create in one transaction,
+    so either every zone gets its season or none does. ``referee_capacity``
+    is the number of matches the whole referee pool can cover per matchday;
+    it is shared between zones in proportion to their round sizes.
     
-    fixtures = []
+    Returns (success, message, generated) where generated maps zone name to
+    the number of fixtures created.
+    """
+    zones = Zone.objects.filter(fixtures_generated=False)
+    if zone_ids is not None:
+        zones = zones.filter(id__in=zone_ids)
+    zones = {zone.id: zone for zone in zones}
     
-    # Generate initial round-robin pairings
-    for round_num in range(total_rounds):
-        round_date = match_dates[round_num] if round_num < len(match_dates) else match_dates[-1]
-        
-        # Create pairs for this round
-        for i in range(n // 2):
-            team1 = team_list[i]
-            team2 = team_list[n - 1 - i]
-            
-            if team1 is None or team2 is None:
-                continue  # Skip BYE
-            
-            # Decide home/away based on balance
-            team1_home = home_away_balance[team1.id]['home']
-            team1_away = home_away_balance[team1.id]['away']
-            team2_home = home_away_balance[team2.id]['home']
-            team2_away = home_away_balance[team2.id]['away']
-            
-            # Team with fewer home games gets to be home
-            if team1_home < team2_home or (team1_home == team2_home and team1_away > team2_away):
-                home_team = team1
-                away_team = team2
-            else:
-                home_team = team2
-                away_team = team1
-            
-            # Update balance
-            home_away_balance[home_team.id]['home'] += 1
-            home_away_balance[away_team.id]['away'] += 1
-            
-            # RANDOM KICKOFF TIMES: 1 PM (13:00), 3 PM (15:00), or 5 PM (17:00)
-            kickoff_times = ['13:00', '15:00', '17:00']
-            random_time = random.choice(kickoff_times)
-            
-            # FIX: Use timezone-aware datetime
-            match_datetime = timezone.make_aware(
-                datetime.combine(round_date, datetime.strptime(random_time, '%H:%M').time())
-            )
-            
-            fixtures.append({
-                'zone': zone,
-                'home_team': home_team,
-                'away_team': away_team,
-                'round_number': round_num + 1,
-                'match_date': match_datetime,
-                'kickoff_time': random_time,
-                'venue': getattr(home_team, 'home_ground', None) or f"{home_team.team_name} Home Ground",
-                'status': 'scheduled'
-            })
-        
-        # Rotate teams for next round
-        team_list.insert(1, team_list.pop())
+    teams_by_zone = {}
+    for team in Team.objects.filter(zone_id__in=list(zones), status='approved'):
+        teams_by_zone.setdefault(team.zone_id, []).append(team)
+    eligible = {
+        zone_id: teams_by_zone[zone_id] for zone_id in zones if len(teams_by_zone.get(zone_id, [])) >= 2
+    }
+    if not eligible:
+        return False, "No zones are ready for fixture generation", {}
     
-    # Check and fix home/away balance
-    fixtures = balance_home_away_sequence(fixtures)
+    jobs = [
+        (zone_id, [team.id for team in teams], {team.id: team.home_ground for team in teams}, legs)
+        for zone_id, teams in eligible.items()
+    ]
+    if len(jobs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                schedules = dict(pool.map(build_zone_schedule, jobs))
+        except (OSError, BrokenProcessPool):
+            schedules = dict(map(build_zone_schedule, jobs))
+    else:
+        schedules = dict(map(build_zone_schedule, jobs))
     
-    # Save fixtures
-    with transaction.atomic():
-        match_objects = []
-        for fixture_data in fixtures:
-            match = Match(**fixture_data)
-            match_objects.append(match)
-        
-        Match.objects.bulk_create(match_objects)
-        
+    total_per_round = sum(len(teams) // 2 for teams in eligible.values())
+    all_fixtures = []
+    generated = {}
+    summaries = []
+    now = timezone.now()
+    for zone_id, teams in eligible.items():
+        zone = zones[zone_id]
+        zone_capacity = None
+        if referee_capacity:
+            zone_capacity = max(1, referee_capacity * (len(teams) // 2) // total_per_round)
+        zone_start = first_matchday(zone, start_date)
+        fixtures, report = plan_zone_fixtures(
+            zone, teams, zone_start, legs, zone_capacity, rounds=schedules[zone_id]
+        )
+        all_fixtures.extend(fixtures)
+        generated[zone.name] = len(fixtures)
+        summaries.append(
+            f"{zone.name}: {len(fixtures)} fixtures, {report['total_breaks']} breaks "
+            f"(max {report['max_breaks_per_team']} per team)"
+            + (f", {report['catch_up_matches']} on catch-up matchdays" if report['catch_up_matches'] else "")
+        )
         zone.fixtures_generated = True
-        zone.fixture_generation_date = timezone.now()
-        zone.season_start_date = start_date
-        zone.save()
+        zone.fixture_generation_date = now
+        zone.season_start_date = zone_start
     
-    # Create summary of home/away distribution
-    summary = create_home_away_summary(fixtures)
+    with transaction.atomic():
+        Match.objects.bulk_create([Match(**fixture_data) for fixture_data in all_fixtures], batch_size=500)
+        Zone.objects.bulk_update(
+            [zones[zone_id] for zone_id in eligible],
+            ['fixtures_generated', 'fixture_generation_date', 'season_start_date'],
+        )
+    invalidate_read_models()
     
-    return True, f"✅ Generated {len(fixtures)} fixtures for {zone.name}\n{summary}"
+    return True, f"✅ Generated {len(all_fixtures)} fixtures in {len(eligible)} zones\n" + "\n".join(summaries), generated
 
-def balance_home_away_sequence(fixtures):
+def plan_zone_fixtures(zone, team_list, start_date, legs=1, referee_capacity=None, rounds=None):
     """
-    Ensure no team has too many home or away matches in sequence
+    Compute (without saving) the fixtures of a zone as Match field dicts,
+    plus the scheduler's quality report. ``rounds`` may be passed in when
+    the pairings were already built (e.g. in a worker process).
     """
-    # Group fixtures by team and check sequences
-    team_fixtures = {}
-    for fixture in fixtures:
-        for team_field in ['home_team', 'away_team']:
-            team = fixture[team_field]
-            if team.id not in team_fixtures:
-                team_fixtures[team.id] = []
-            team_fixtures[team.id].append({
-                'round': fixture['round_number'],
-                'is_home': (team_field == 'home_team'),
-                'fixture': fixture
-            })
+    teams_by_id = {team.id: team for team in team_list}
+    grounds = {team.id: team.home_ground for team in team_list}
+    match_day_of_week = getattr(zone, 'match_day_of_week', 0)
     
-    # Check for problematic sequences (3+ home/away in a row)
-    for team_id, matches in team_fixtures.items():
-        matches.sort(key=lambda x: x['round'])
-        
-        current_streak = 0
-        last_status = None
-        
-        for i, match in enumerate(matches):
-            if match['is_home'] == last_status:
-                current_streak += 1
-            else:
-                current_streak = 1
-                last_status = match['is_home']
-            
-            # If 3 in a row, try to swap home/away with another fixture
-            if current_streak >= 3 and i > 0:
-                # Try to swap with a previous match
-                for swap_match in matches[:i]:
-                    if (swap_match['fixture'] != match['fixture'] and 
-                        swap_match['fixture']['home_team'].id != match['fixture']['away_team'].id and
-                        swap_match['fixture']['away_team'].id != match['fixture']['home_team'].id):
-                        
-                        # Swap home/away for this match
-                        temp = match['fixture']['home_team']
-                        match['fixture']['home_team'] = match['fixture']['away_team']
-                        match['fixture']['away_team'] = temp
-                        match['fixture']['venue'] = f"{match['fixture']['home_team'].team_name} Home Ground"
-                        
-                        # Update streak
-                        match['is_home'] = not match['is_home']
-                        break
+    if rounds is None:
+        rounds = build_schedule(list(teams_by_id), legs=legs, grounds=grounds)
+    report = schedule_report(rounds, grounds)
+    slots, catch_up = matchday_slots(rounds, start_date, match_day_of_week, referee_capacity)
+    report['catch_up_matches'] = len(catch_up)
     
-    return fixtures
+    fixtures = []
+    for round_number, day, kickoff, home_id, away_id in slots:
+        home_team = teams_by_id[home_id]
+        fixtures.append({
+            'zone': zone,
+            'home_team': home_team,
+            'away_team': teams_by_id[away_id],
+            'round_number': round_number,
+            'match_date': timezone.make_aware(kickoff_datetime(day, kickoff)),
+            'kickoff_time': kickoff,
+            'venue': getattr(home_team, 'home_ground', None) or f"{home_team.team_name} Home Ground",
+            'status': 'scheduled'
+        })
+    return fixtures, report
 
-def create_home_away_summary(fixtures):
-    """Create a summary of home/away distribution"""
+def create_home_away_summary(fixtures, report=None):
+    """Create a summary of home/away distribution (and breaks, when a scheduler report is given)"""
     team_stats = {}
     
     for fixture in fixtures:
@@ -206,12 +192,37 @@ def create_home_away_summary(fixtures):
         team_stats[away_id]['away'] += 1
     
     summary_lines = ["Home/Away Distribution:"]
+    if report:
+        summary_lines.append(
+            f"  Breaks: {report['total_breaks']} total, at most {report['max_breaks_per_team']} per team; "
+            f"longest home/away run: {report['longest_run']}; shared-ground clashes: {report['venue_clashes']}"
+        )
+        if report.get('catch_up_matches'):
+            summary_lines.append(
+                f"  {report['catch_up_matches']} match(es) over the referee capacity moved to "
+                f"catch-up matchdays after the last round"
+            )
     for team_id, stats in team_stats.items():
         total = stats['home'] + stats['away']
-        summary_lines.append(f"  {stats['name']}: {stats['home']}H/{stats['away']}A (total: {total})")
+        line = f"  {stats['name']}: {stats['home']}H/{stats['away']}A (total: {total})"
+        if report:
+            line = line[:-1] + f", breaks: {report['breaks'].get(team_id, 0)})"
+        summary_lines.append(line)
     
     return "\n".join(summary_lines)
 
+def queue_zone_fixtures(zone_id, user=None, regenerate=False):
+    """
+    Queue (re)generation of a zone's fixtures for the job worker (run_jobs)
+    instead of building the season inside the request. Returns the job.
+    """
+    from admin_dashboard.jobs import enqueue
+
+    if regenerate:
+        return enqueue('regenerate_zone_fixtures', zone_id, user=user,
+                       dedupe_key=f'fixtures:regenerate:zone:{zone_id}')
+    return enqueue('generate_zone_fixtures', zone_id, user=user, dedupe_key=f'fixtures:zone:{zone_id}')
+
 def regenerate_fixtures_for_zone(zone_id):
     """
     Delete existing fixtures and regenerate them
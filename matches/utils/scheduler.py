@@ -0,0 +1,290 @@
+# matches/utils/scheduler.py
+"""
+Season scheduler for zone fixtures.
+
+Builds a round-robin (single or double) in which every team has at most one
+break (two consecutive home or away matches) per leg, keeps teams that share
+a home ground on complementary home/away patterns so their home matches never
+fall on the same matchday, and spreads each round over up to
+MAX_DAYS_PER_ROUND days as the referee capacity requires. Everything is plain Python over team ids; the
+caller turns the result into Match rows.
+
+Only two teams per ground can be kept apart: each team is at home in about
+half the rounds, so with a third team on the ground some matchdays must
+clash. Such teams get the slots sharing the fewest home matchdays with their
+ground-mates, and ``schedule_report`` counts the clashes left
+(``venue_clashes``).
+"""
+import random
+from datetime import datetime, timedelta
+
+KICKOFF_TIMES = ['13:00', '15:00', '17:00']
+# A round is played on its matchday and, when referees are short, the day after
+MAX_DAYS_PER_ROUND = 2
+
+
+def _canonical_rounds(slot_count):
+    """
+    Canonical 1-factorisation of an even number of slots with alternating
+    home/away assignment (de Werra). Every slot except two has exactly one
+    break, which is the minimum possible for a single round-robin.
+    """
+    fixed = slot_count - 1
+    rounds = []
+    for i in range(fixed):
+        pairs = [(i, fixed) if i % 2 == 0 else (fixed, i)]
+        for k in range(1, slot_count // 2):
+            a, b = (i + k) % fixed, (i - k) % fixed
+            pairs.append((a, b) if k % 2 == 1 else (b, a))
+        rounds.append(pairs)
+    return rounds
+
+
+def _patterns(rounds, slot_count):
+    """Home/away pattern per slot: 'H', 'A' or None (bye) for every round."""
+    patterns = {slot: [None] * len(rounds) for slot in range(slot_count)}
+    for index, pairs in enumerate(rounds):
+        for home, away in pairs:
+            patterns[home][index] = 'H'
+            patterns[away][index] = 'A'
+    return patterns
+
+
+def _breaks(pattern):
+    played = [venue for venue in pattern if venue is not None]
+    return sum(1 for first, second in zip(played, played[1:]) if first == second)
+
+
+def _longest_run(pattern):
+    played = [venue for venue in pattern if venue is not None]
+    longest = run = 1 if played else 0
+    for first, second in zip(played, played[1:]):
+        run = run + 1 if first == second else 1
+        longest = max(longest, run)
+    return longest
+
+
+def _slot_rounds(slot_count, legs, bye_slot=None):
+    first_leg = _canonical_rounds(slot_count)
+    if bye_slot is not None:
+        first_leg = [[pair for pair in pairs if bye_slot not in pair] for pairs in first_leg]
+    if legs == 1:
+        return first_leg
+
+    # Second leg mirrors the first. Starting it from a rotated round changes
+    # where the breaks fall across the halfway turn; keep the rotation with
+    # the shortest home/away runs and fewest breaks that does not replay the
+    # last fixture of the first leg straight away.
+    mirrored = [[(away, home) for home, away in pairs] for pairs in first_leg]
+    last = {frozenset(pair) for pair in first_leg[-1]}
+    best = None
+    for shift in range(len(mirrored)):
+        second_leg = mirrored[shift:] + mirrored[:shift]
+        if any(frozenset(pair) in last for pair in second_leg[0]):
+            continue
+        rounds = first_leg + second_leg
+        patterns = _patterns(rounds, slot_count).values()
+        breaks = [_breaks(pattern) for pattern in patterns]
+        score = (max(_longest_run(pattern) for pattern in patterns), max(breaks), sum(breaks))
+        if best is None or score < best[0]:
+            best = (score, rounds)
+    return best[1] if best else first_leg + mirrored
+
+
+def _ground_key(ground):
+    return ' '.join((ground or '').lower().split())
+
+
+def _shared_homes(pattern, other):
+    return sum(1 for a, b in zip(pattern, other) if a == b == 'H')
+
+
+def _assign_slots(team_ids, slot_patterns, grounds, rng):
+    """
+    Map team ids to slots. Teams sharing a home ground are put on slots with
+    complementary patterns (never at home in the same round) two at a time.
+    A third team on a ground, or any once the complementary pairs run out,
+    gets the free slot with the fewest home rounds shared with its
+    ground-mates.
+    """
+    slots = [slot for slot in slot_patterns]
+    complementary = []
+    used = set()
+    for index, slot in enumerate(slots):
+        if slot in used:
+            continue
+        for other in slots[index + 1:]:
+            if other in used:
+                continue
+            if all(
+                a is None or b is None or a != b
+                for a, b in zip(slot_patterns[slot], slot_patterns[other])
+            ):
+                complementary.append((slot, other))
+                used.update((slot, other))
+                break
+    rng.shuffle(complementary)
+
+    by_ground = {}
+    for team_id in team_ids:
+        key = _ground_key(grounds.get(team_id))
+        if key:
+            by_ground.setdefault(key, []).append(team_id)
+
+    assignment = {}
+    free_slots = set(slots)
+    unpaired = []
+    for group in sorted(by_ground.values(), key=len, reverse=True):
+        paired = 0
+        for first, second in zip(group[::2], group[1::2]):
+            if not complementary:
+                break
+            slot_a, slot_b = complementary.pop()
+            assignment[first], assignment[second] = slot_a, slot_b
+            free_slots.difference_update((slot_a, slot_b))
+            paired += 2
+        unpaired.extend((team_id, group) for team_id in group[paired:] if len(group) > 1)
+
+    for team_id, group in unpaired:
+        taken = [slot_patterns[assignment[mate]] for mate in group if mate in assignment]
+        candidates = sorted(free_slots)
+        rng.shuffle(candidates)
+        slot = min(candidates, key=lambda candidate: sum(
+            _shared_homes(slot_patterns[candidate], pattern) for pattern in taken
+        ))
+        assignment[team_id] = slot
+        free_slots.discard(slot)
+
+    remaining_teams = [team_id for team_id in team_ids if team_id not in assignment]
+    remaining_slots = sorted(free_slots)
+    rng.shuffle(remaining_slots)
+    assignment.update(zip(remaining_teams, remaining_slots))
+    return assignment
+
+
+def build_schedule(team_ids, legs=1, grounds=None, seed=None):
+    """
+    Build round-robin pairings for ``team_ids``.
+
+    ``legs`` is 1 (single) or 2 (double round-robin, second leg mirrored).
+    ``grounds`` maps team id -> home ground name and is used to keep teams
+    that share a ground from being at home on the same matchday.
+    Returns a list of rounds, each a list of (home_team_id, away_team_id).
+    """
+    team_ids = list(team_ids)
+    grounds = grounds or {}
+    rng = random.Random(seed)
+    rng.shuffle(team_ids)
+
+    slot_count = len(team_ids) + len(team_ids) % 2
+    bye_slot = slot_count - 1 if len(team_ids) % 2 else None
+    slot_rounds = _slot_rounds(slot_count, legs, bye_slot)
+    patterns = _patterns(slot_rounds, slot_count)
+    if bye_slot is not None:
+        patterns.pop(bye_slot)
+
+    assignment = _assign_slots(team_ids, patterns, grounds, rng)
+    team_at = {slot: team_id for team_id, slot in assignment.items()}
+    return [[(team_at[home], team_at[away]) for home, away in pairs] for pairs in slot_rounds]
+
+
+def build_zone_schedule(job):
+    """
+    build_schedule for one zone, as a process-pool task. ``job`` is
+    (zone_id, team_ids, grounds, legs); returns (zone_id, rounds). Lives here
+    rather than next to the Django code so worker processes import no models.
+    """
+    zone_id, team_ids, grounds, legs = job
+    return zone_id, build_schedule(team_ids, legs=legs, grounds=grounds)
+
+
+def schedule_report(rounds, grounds=None):
+    """
+    Quality metrics for a schedule: breaks per team, longest home/away run,
+    home/away totals and matchdays on which two teams sharing a ground are
+    both at home (unavoidable when three or more teams share one).
+    """
+    grounds = grounds or {}
+    patterns = {}
+    venue_clashes = 0
+    for index, pairs in enumerate(rounds):
+        homes_by_ground = {}
+        for home, away in pairs:
+            patterns.setdefault(home, {})[index] = 'H'
+            patterns.setdefault(away, {})[index] = 'A'
+            key = _ground_key(grounds.get(home))
+            if key:
+                homes_by_ground[key] = homes_by_ground.get(key, 0) + 1
+        venue_clashes += sum(count - 1 for count in homes_by_ground.values() if count > 1)
+
+    breaks = {}
+    longest_run = 0
+    home_away = {}
+    for team_id, by_round in patterns.items():
+        played = [by_round[index] for index in sorted(by_round)]
+        breaks[team_id] = _breaks(played)
+        longest_run = max(longest_run, _longest_run(played))
+        home_away[team_id] = {'home': played.count('H'), 'away': played.count('A')}
+
+    return {
+        'rounds': len(rounds),
+        'matches': sum(len(pairs) for pairs in rounds),
+        'breaks': breaks,
+        'total_breaks': sum(breaks.values()),
+        'max_breaks_per_team': max(breaks.values(), default=0),
+        'longest_run': longest_run,
+        'home_away': home_away,
+        'venue_clashes': venue_clashes,
+    }
+
+
+def matchday_slots(rounds, start_date, match_day_of_week, referee_capacity=None):
+    """
+    Give every match a date and kickoff time. Round r is played on the r-th
+    weekly matchday; when a round has more matches than ``referee_capacity``
+    (matches the referee pool can cover in one day) the surplus spills over
+    to the following day, up to MAX_DAYS_PER_ROUND days, so a round never
+    runs into the week or the next round. Matches that still don't fit are
+    played on catch-up matchdays added after the last round, where no team
+    plays twice in a week. Kickoffs are spread evenly over KICKOFF_TIMES.
+
+    Returns ``(slots, catch_up)``: every match as (round_number, date,
+    kickoff_time, home_id, away_id), and those of them moved to a catch-up
+    matchday.
+    """
+    first_day = start_date + timedelta(days=(match_day_of_week - start_date.weekday()) % 7)
+    per_day = referee_capacity if referee_capacity and referee_capacity > 0 else None
+
+    slots = []
+    surplus = []
+    for index, pairs in enumerate(rounds):
+        matchday = first_day + timedelta(weeks=index)
+        for position, (home, away) in enumerate(pairs):
+            day_offset, day_position = divmod(position, per_day) if per_day else (0, position)
+            if day_offset >= MAX_DAYS_PER_ROUND:
+                surplus.append((index + 1, home, away))
+                continue
+            kickoff = KICKOFF_TIMES[day_position % len(KICKOFF_TIMES)]
+            slots.append((index + 1, matchday + timedelta(days=day_offset), kickoff, home, away))
+
+    catch_up = []
+    weeks = []
+    for round_number, home, away in surplus:
+        for week_index, week in enumerate(weeks):
+            day = next((day for day, count in enumerate(week['counts']) if count < per_day), None)
+            if day is not None and not {home, away} & week['teams']:
+                break
+        else:
+            week_index, day = len(weeks), 0
+            week = {'teams': set(), 'counts': [0] * MAX_DAYS_PER_ROUND}
+            weeks.append(week)
+        week['teams'].update((home, away))
+        kickoff = KICKOFF_TIMES[week['counts'][day] % len(KICKOFF_TIMES)]
+        week['counts'][day] += 1
+        matchday = first_day + timedelta(weeks=len(rounds) + week_index, days=day)
+        catch_up.append((round_number, matchday, kickoff, home, away))
+    return slots + catch_up, catch_up
+
+
+def kickoff_datetime(day, kickoff):
+    return datetime.combine(day, datetime.strptime(kickoff, '%H:%M').time())
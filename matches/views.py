@@ -5,6 +5,8 @@ from django.http import HttpResponseForbidden
 from django.urls import reverse
 from django.views.decorators.http import require_POST
 
+from fkf_league.roles import roles_for
+
 def match_results(request):
     """Public view: List all completed match results"""
     matches = Match.objects.filter(status='completed').order_by('-match_date')
@@ -12,7 +14,7 @@ def match_results(request):
     return render(request, 'matches/match_results.html', context)
 
 def league_admin_required(user):
-    return user.is_superuser or user.groups.filter(name='League Admin').exists()
+    return user.is_superuser or roles_for(user).is_league_admin
 
 @login_required
 @user_passes_test(league_admin_required)
@@ -54,13 +56,13 @@ def admin_edit_league_table(request, table_id):
     return render(request, 'admin_dashboard/edit_league_table.html', context)
 
 def league_manager_required(user):
-    return user.groups.filter(name='League Manager').exists() or user.is_superuser
+    return roles_for(user).in_group('League Manager') or user.is_superuser
 
 @login_required
 @user_passes_test(league_manager_required)
 def league_manager_reschedule(request, match_id):
     match = get_object_or_404(Match, id=match_id)
-    if not (request.user.is_superuser or request.user.groups.filter(name='League Admin').exists()):
+    if not (request.user.is_superuser or roles_for(request.user).is_league_admin):
         messages.error(request, 'Only superusers or league admins can reschedule fixtures.')
         return redirect('matches:match_details', match_id=match_id)
     if request.method == 'POST':
@@ -79,44 +81,75 @@ def league_manager_reschedule(request, match_id):
     return render(request, 'admin_dashboard/league_manager_reschedule.html', context)
 # matches/views.py - UPDATE YOUR FILE
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import Match, LeagueTable, Goal, Card
+from . import read_models
 from teams.models import Zone, Team, Player
 from referees.models import MatchReport
 
 
 def league_tables(request):
     """Display league tables for all zones"""
-    zones = Zone.objects.all()
-    
-    tables = {}
-    for zone in zones:
-        tables[zone] = LeagueTable.objects.filter(zone=zone).order_by(
-            '-points', '-goal_difference', '-goals_for'
-        )[:20]
-    
-    # Get top scorers
-    top_scorers = Player.objects.filter(
-        goals_scored__gt=0
-    ).order_by('-goals_scored')[:10]
-    
-    # Get top goalkeepers by clean sheets
-    goalkeepers = Player.objects.filter(
-        position='GK',
-        matches_played__gt=0
-    ).order_by('-clean_sheets', '-matches_played')[:10]
+    standings = read_models.league_standings()
     
     context = {
-        'tables': tables,
-        'top_scorers': top_scorers,
-        'goalkeepers': goalkeepers,
-        'zones': zones,
+        'tables': standings,
+        'top_scorers': read_models.top_scorers(),
+        'goalkeepers': read_models.goalkeepers(),
+        'zones': [standing['zone'] for standing in standings],
     }
     return render(request, 'matches/league_tables.html', context)
 
 
+FIXTURES_PAGE_SIZE = 50
+
+
+def _encode_cursor(match):
+    return f"{match.match_date.isoformat()}_{match.id}"
+
+
+def _decode_cursor(cursor):
+    try:
+        match_date, match_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(match_date), int(match_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _keyset_page(matches, after=None, before=None, page_size=FIXTURES_PAGE_SIZE):
+    """
+    Fetch one page of ``matches`` ordered by (match_date, id) using keyset
+    pagination: the page boundary is a cursor, not an OFFSET, so every page
+    costs the same however deep it is. Returns (page, next_cursor, prev_cursor).
+    """
+    after_key = _decode_cursor(after) if after else None
+    before_key = _decode_cursor(before) if before and not after_key else None
+    
+    if before_key:
+        match_date, match_id = before_key
+        rows = list(matches.filter(
+            Q(match_date__lt=match_date) | Q(match_date=match_date, id__lt=match_id)
+        ).order_by('-match_date', '-id')[:page_size + 1])
+        has_more_before = len(rows) > page_size
+        page = rows[:page_size][::-1]
+        next_cursor = _encode_cursor(page[-1]) if page else None
+        prev_cursor = _encode_cursor(page[0]) if page and has_more_before else None
+        return page, next_cursor, prev_cursor
+    
+    if after_key:
+        match_date, match_id = after_key
+        matches = matches.filter(
+            Q(match_date__gt=match_date) | Q(match_date=match_date, id__gt=match_id)
+        )
+    rows = list(matches.order_by('match_date', 'id')[:page_size + 1])
+    page = rows[:page_size]
+    next_cursor = _encode_cursor(page[-1]) if len(rows) > page_size else None
+    prev_cursor = _encode_cursor(page[0]) if page and after_key else None
+    return page, next_cursor, prev_cursor
+
+
 def fixtures(request):
     """Display all fixtures with advanced filtering"""
     # Get filter parameters
@@ -128,7 +161,7 @@ def fixtures(request):
     # Base queryset
     matches = Match.objects.select_related(
         'home_team', 'away_team', 'zone'
-    ).order_by('match_date')
+    )
     
     # Apply filters
     if zone_filter and zone_filter != 'all':
@@ -159,33 +192,45 @@ def fixtures(request):
         sunday = saturday + timedelta(days=1)
         matches = matches.filter(match_date__date__in=[saturday, sunday])
     
+    # One page of matches, located by its (match_date, id) boundary
+    page_matches, next_cursor, prev_cursor = _keyset_page(
+        matches, request.GET.get('after'), request.GET.get('before')
+    )
+    
     # Split for display
-    upcoming_matches = matches.filter(status__in=['scheduled', 'ongoing'])
-    completed_matches = matches.filter(status='completed')
+    upcoming_matches = [m for m in page_matches if m.status in ('scheduled', 'ongoing')]
+    completed_matches = [m for m in page_matches if m.status == 'completed']
     
-    # Get all zones for filter dropdown
-    zones = Zone.objects.all()
+    # Zones and rounds for the filter dropdowns (cached)
+    filter_options = read_models.fixture_filter_options()
     
-    # Get unique rounds for filter dropdown
-    rounds = Match.objects.values_list('round_number', flat=True).distinct().order_by('round_number')
+    # Badge counts in a single conditional aggregate
+    counts = Match.objects.aggregate(
+        all_count=Count('id'),
+        upcoming_count=Count('id', filter=Q(status__in=['scheduled', 'ongoing'], match_date__gte=today)),
+        completed_count=Count('id', filter=Q(status='completed')),
+    )
     
-    # Get counts for badges
-    all_count = Match.objects.count()
-    upcoming_count = Match.objects.filter(status__in=['scheduled', 'ongoing'], match_date__gte=today).count()
-    completed_count = Match.objects.filter(status='completed').count()
+    # Pagination links keep the current filters
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
     
     context = {
         'upcoming_matches': upcoming_matches,
         'completed_matches': completed_matches,
-        'zones': zones,
-        'rounds': rounds,
+        'zones': filter_options['zones'],
+        'rounds': filter_options['rounds'],
         'selected_zone': zone_filter,
         'selected_round': round_filter,
         'selected_status': status_filter,
         'selected_date': date_filter,
-        'all_count': all_count,
-        'upcoming_count': upcoming_count,
-        'completed_count': completed_count,
+        'all_count': counts['all_count'],
+        'upcoming_count': counts['upcoming_count'],
+        'completed_count': counts['completed_count'],
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'filter_query': query.urlencode(),
         'today': today.date(),
     }
     return render(request, 'matches/fixtures.html', context)
@@ -220,22 +265,12 @@ def match_details(request, match_id):
 
 def top_scorers(request):
     """Display top scorers"""
-    # Get all players with goals, ordered by goals scored
-    scorers = Player.objects.filter(
-        goals_scored__gt=0
-    ).order_by('-goals_scored')
-    
-    # Group by zone
-    zones = Zone.objects.all()
-    scorers_by_zone = {}
-    
-    for zone in zones:
-        scorers_by_zone[zone] = scorers.filter(team__zone=zone)[:20]
+    board = read_models.scorers_by_zone()
     
     context = {
-        'scorers': scorers,
-        'scorers_by_zone': scorers_by_zone,
-        'zones': zones,
+        'scorers': board['scorers'],
+        'scorers_by_zone': board['zones'],
+        'zones': [entry['zone'] for entry in board['zones']],
     }
     return render(request, 'matches/top_scorers.html', context)
 
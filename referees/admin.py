@@ -36,6 +36,11 @@ class RefereeAdmin(admin.ModelAdmin):
         ('Referee Details', {
             'fields': ('level',)
         }),
+        ('Base Location', {
+            'fields': ('latitude', 'longitude'),
+            'classes': ('collapse',),
+            'description': 'Used to rank officials by travel distance. Leave blank to use the county.'
+        }),
         ('Approval Status', {
             'fields': ('status_badge_display', 'status', 'rejection_reason', 'suspension_reason', 'approved_by', 'approved_at'),
             'classes': ('collapse', 'wide')
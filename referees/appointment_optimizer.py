@@ -0,0 +1,339 @@
+# referees/appointment_optimizer.py
+"""
+Automatic appointment of officials for many matches at once (typically a
+zone round).
+
+Matches are split into time windows (kickoffs closer than MATCH_WINDOW), in
+which an official can take at most one slot. Each window is solved as a
+minimum-cost assignment: officials must be allowed the role by their
+specialization, available on the day and not already appointed elsewhere in
+the window; each appointment costs more the busier the official already is
+and the further they have to travel, which spreads the workload and keeps
+officials close to home. Nothing is saved by
+``plan_appointments``; it returns a diff that the manager accepts (in full
+or in part) through ``apply_appointments``.
+"""
+import heapq
+import time
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from matches.models import Match
+from .assignment import assign
+from .models import MatchOfficials, Referee, RefereeAppointment, RefereeAvailability
+from .proximity import NEAR_RADIUS_KM, referee_distance, venue_location, with_distance
+
+
+# field -> (role for can_be_appointed_as, label, prefix of its confirmation/rejection fields)
+AUTO_ROLES = {
+    'main_referee': ('REFEREE', 'Referee', 'main'),
+    'assistant_1': ('AR1', 'Assistant Referee 1', 'ar1'),
+    'assistant_2': ('AR2', 'Assistant Referee 2', 'ar2'),
+    'fourth_official': ('RESERVE', 'Fourth Official', 'fourth'),
+    'match_commissioner': ('COMMISSIONER', 'Match Commissioner', 'commissioner'),
+}
+DEFAULT_FIELDS = ['main_referee', 'assistant_1', 'assistant_2', 'match_commissioner']
+OFFICIAL_FIELDS = [
+    'main_referee', 'assistant_1', 'assistant_2', 'reserve_referee', 'reserve_assistant',
+    'var', 'avar1', 'avar2', 'fourth_official', 'match_commissioner',
+]
+REJECTED_FLAGS = [
+    'main_rejected', 'ar1_rejected', 'ar2_rejected', 'fourth_rejected',
+    'reserve_rejected', 'var_rejected', 'commissioner_rejected',
+]
+
+# Officials can't take two matches whose kickoffs are closer than this
+MATCH_WINDOW = timedelta(hours=3)
+# Appointments this far back count towards an official's current workload
+LOAD_PERIOD = timedelta(days=28)
+
+LOAD_COST = 10
+# Per 10 km from the official's base to the venue, so ~100 km weighs as much
+# as one extra appointment
+TRAVEL_COST = 1
+# Using e.g. a referee as fourth official when an assistant could do it
+SECONDARY_ROLE_COST = 3
+# Leaving a slot empty always costs more than filling it; required roles most
+UNFILLED_COST = {
+    'main_referee': 100000,
+    'assistant_1': 50000,
+    'assistant_2': 50000,
+    'match_commissioner': 20000,
+    'fourth_official': 5000,
+}
+# Each slot only considers its cheapest candidates. The result is still
+# optimal while a window has no more slots than this (a slot's best official
+# is never ranked below the number of competing slots); beyond that it keeps
+# large windows fast at a negligible cost in quality
+CANDIDATE_LIMIT = 40
+PRIMARY_ROLES = {
+    'REFEREE': {'REFEREE'},
+    'ASSISTANT_REFEREE': {'AR1', 'AR2'},
+    'MATCH_COMMISSIONER': {'COMMISSIONER'},
+}
+
+
+def _time_windows(matches):
+    """Group matches (sorted by kickoff) into chains of overlapping kickoffs."""
+    windows = []
+    for match in sorted(matches, key=lambda m: (m.match_date, m.id)):
+        if windows and match.match_date - windows[-1][-1].match_date < MATCH_WINDOW:
+            windows[-1].append(match)
+        else:
+            windows.append([match])
+    return windows
+
+
+def _appointments_between(start, end):
+    """(match_id, kickoff, referee_id) for every appointment with a kickoff in [start, end]."""
+    return list(RefereeAppointment.objects.filter(
+        match_date__gte=start, match_date__lte=end,
+    ).values_list('match_id', 'match_date', 'referee_id'))
+
+
+def _busy_in(appointments, window_start, window_end, ignore=frozenset()):
+    """Referees with another appointment overlapping [window_start, window_end]."""
+    return {
+        referee_id
+        for match_id, kickoff, referee_id in appointments
+        if window_start - MATCH_WINDOW < kickoff < window_end + MATCH_WINDOW
+        and (match_id, referee_id) not in ignore
+    }
+
+
+def _slot_cost(referee, role, load, distance=None):
+    cost = LOAD_COST * (2 * load + 1)
+    if distance is not None:
+        cost += TRAVEL_COST * int(distance // 10)
+    if referee.specialization and role not in PRIMARY_ROLES.get(referee.specialization, ()):
+        cost += SECONDARY_ROLE_COST
+    return cost
+
+
+def _match_label(match):
+    return f"{match.home_team} vs {match.away_team}"
+
+
+def plan_appointments(matches, fields=None):
+    """
+    Propose officials for the open slots of ``matches``. A slot is open when
+    nobody is appointed to it or its official declined. Returns
+    {'changes': [...], 'unfilled': [...], 'stats': {...}}; every change names
+    the match, the MatchOfficials field and the proposed referee.
+    """
+    started = time.monotonic()
+    fields = [field for field in (fields or DEFAULT_FIELDS) if field in AUTO_ROLES]
+    matches = list(matches)
+    plan = {'changes': [], 'unfilled': [], 'stats': {}}
+    if not matches:
+        plan['stats'] = {'matches': 0, 'slots': 0, 'filled': 0, 'referees_used': 0, 'seconds': 0}
+        return plan
+
+    current = {
+        row['match_id']: row
+        for row in MatchOfficials.objects.filter(match__in=matches).values(
+            'match_id', *OFFICIAL_FIELDS, *REJECTED_FLAGS
+        )
+    }
+    referees = {referee.id: referee for referee in Referee.objects.filter(status='approved', is_active=True)}
+    eligible = {
+        field: {referee.id for referee in referees.values() if referee.can_be_appointed_as(AUTO_ROLES[field][0])}
+        for field in fields
+    }
+    locations = {match.id: venue_location(match) for match in matches}
+    unavailable = set(RefereeAvailability.objects.filter(
+        date__in={match.match_date.date() for match in matches}, is_available=False,
+    ).values_list('referee_id', 'date'))
+
+    first = min(match.match_date for match in matches)
+    last = max(match.match_date for match in matches)
+    appointments = _appointments_between(first - LOAD_PERIOD, last + MATCH_WINDOW)
+    load = {}
+    for _, _, referee_id in appointments:
+        load[referee_id] = load.get(referee_id, 0) + 1
+
+    slot_total = 0
+    used = set()
+    for window in _time_windows(matches):
+        busy = _busy_in(appointments, window[0].match_date, window[-1].match_date)
+        days = {match.match_date.date() for match in window}
+
+        # Travel makes every match's slots cost differently, so each
+        # (match, field) is its own class with a single slot
+        classes = {}
+        for match in window:
+            row = current.get(match.id, {})
+            for field in fields:
+                referee_id = row.get(field)
+                declined = bool(referee_id) and row.get(f'{AUTO_ROLES[field][2]}_rejected', False)
+                if referee_id and not declined:
+                    continue
+                classes[(match.id, field)] = [(match, referee_id if declined else None)]
+                slot_total += 1
+
+        free = [
+            referee for referee in referees.values()
+            if referee.id not in busy and not any((referee.id, day) in unavailable for day in days)
+        ]
+        candidate_costs = {}
+        for key, [(match, declined_id)] in classes.items():
+            field = key[1]
+            role = AUTO_ROLES[field][0]
+            location = locations[match.id]
+            costs = [
+                (_slot_cost(referee, role, load.get(referee.id, 0), referee_distance(referee, location)), referee.id)
+                for referee in free
+                if referee.id != declined_id and referee.id in eligible[field]
+            ]
+            candidate_costs[key] = {
+                referee_id: cost for cost, referee_id in heapq.nsmallest(CANDIDATE_LIMIT, costs)
+            }
+
+        assigned = assign(
+            {key: len(slots) for key, slots in classes.items()},
+            candidate_costs,
+            {key: UNFILLED_COST[key[1]] for key in classes},
+        )
+
+        for key, slots in classes.items():
+            field = key[1]
+            chosen = assigned.get(key, [])
+            for index, (match, previous_id) in enumerate(slots):
+                slot = {
+                    'match_id': match.id,
+                    'match': _match_label(match),
+                    'zone': match.zone.name if match.zone_id else '',
+                    'round_number': match.round_number,
+                    'match_date': match.match_date,
+                    'field': field,
+                    'role': AUTO_ROLES[field][1],
+                    'previous_id': previous_id,
+                    'previous_name': referees[previous_id].full_name if previous_id in referees else '',
+                }
+                if index < len(chosen):
+                    referee = referees[chosen[index]]
+                    load[referee.id] = load.get(referee.id, 0) + 1
+                    used.add(referee.id)
+                    distance = referee_distance(referee, locations[match.id])
+                    slot.update({
+                        'referee_id': referee.id,
+                        'referee_name': referee.full_name,
+                        'distance_km': round(distance) if distance is not None else None,
+                    })
+                    plan['changes'].append(slot)
+                else:
+                    plan['unfilled'].append(slot)
+
+    order = {field: index for index, field in enumerate(OFFICIAL_FIELDS)}
+    for rows in (plan['changes'], plan['unfilled']):
+        rows.sort(key=lambda row: (row['match_date'], row['match_id'], order[row['field']]))
+    plan['stats'] = {
+        'matches': len(matches),
+        'slots': slot_total,
+        'filled': len(plan['changes']),
+        'referees_used': len(used),
+        'max_load': max((load.get(referee_id, 0) for referee_id in used), default=0),
+        'seconds': round(time.monotonic() - started, 2),
+    }
+    return plan
+
+
+def apply_appointments(rows, user=None):
+    """
+    Save accepted plan rows ({'match_id', 'field', 'referee_id'}). Each match
+    is saved (and validated) on its own; availability and double booking are
+    re-checked against the current appointments first, since the plan may
+    be stale. Returns (appointed_count, [error messages]).
+    """
+    by_match = {}
+    for row in rows:
+        if row['field'] in AUTO_ROLES:
+            by_match.setdefault(int(row['match_id']), {})[row['field']] = int(row['referee_id'])
+    if not by_match:
+        return 0, []
+
+    matches = Match.objects.select_related('home_team', 'away_team').in_bulk(list(by_match))
+    existing = {officials.match_id: officials for officials in MatchOfficials.objects.filter(match_id__in=by_match)}
+    referees = Referee.objects.in_bulk({referee_id for fields in by_match.values() for referee_id in fields.values()})
+    kickoffs = [match.match_date for match in matches.values()]
+    appointments = _appointments_between(min(kickoffs) - MATCH_WINDOW, max(kickoffs) + MATCH_WINDOW) if kickoffs else []
+    unavailable = set(RefereeAvailability.objects.filter(
+        referee_id__in=list(referees), date__in={kickoff.date() for kickoff in kickoffs}, is_available=False,
+    ).values_list('referee_id', 'date'))
+
+    appointed = 0
+    errors = []
+    for match_id, fields in by_match.items():
+        match = matches.get(match_id)
+        if match is None:
+            continue
+        busy = _busy_in(appointments, match.match_date, match.match_date,
+                        ignore={(match_id, referee_id) for referee_id in fields.values()})
+        problems = []
+        for field, referee_id in fields.items():
+            referee = referees.get(referee_id)
+            role, label, _ = AUTO_ROLES[field]
+            if referee is None or not referee.can_be_appointed_as(role):
+                problems.append(f"{referee.full_name if referee else 'Unknown referee'} cannot be {label}")
+            elif (referee_id, match.match_date.date()) in unavailable:
+                problems.append(f"{referee.full_name} is unavailable on {match.match_date.date()}")
+            elif referee_id in busy:
+                problems.append(f"{referee.full_name} already has a match at that time")
+        if problems:
+            errors.append(f"{_match_label(match)}: {'; '.join(problems)}")
+            continue
+
+        officials = existing.get(match_id) or MatchOfficials(match=match)
+        for field, referee_id in fields.items():
+            prefix = AUTO_ROLES[field][2]
+            setattr(officials, f'{field}_id', referee_id)
+            # A new official starts unconfirmed, and any earlier decline is void
+            setattr(officials, f'{prefix}_confirmed', False)
+            setattr(officials, f'{prefix}_rejected', False)
+            setattr(officials, f'{prefix}_rejection_reason', '')
+            for timestamp in (f'{prefix}_confirmed_at', f'{prefix}_rejected_at'):
+                if hasattr(officials, timestamp):
+                    setattr(officials, timestamp, None)
+        if not any(getattr(officials, flag) for flag in REJECTED_FLAGS):
+            officials.status = 'APPOINTED'
+        officials.appointment_made_by = user
+        try:
+            with transaction.atomic():
+                officials.save()
+        except ValidationError as error:
+            errors.append(f"{_match_label(match)}: {'; '.join(error.messages)}")
+            continue
+        appointed += len(fields)
+        appointments.extend((match_id, match.match_date, referee_id) for referee_id in fields.values())
+    return appointed, errors
+
+
+def nearest_available(match, role, exclude=(), radius_km=NEAR_RADIUS_KM, limit=5):
+    """
+    Closest officials who could take ``role`` at ``match`` right now: allowed
+    the role, available on the day and free at kickoff. Only the grid cells
+    within ``radius_km`` of the venue are searched, unless nobody there is
+    free. Each returned referee has ``distance_km`` set.
+    """
+    location = venue_location(match)
+    busy = _busy_in(
+        _appointments_between(match.match_date - MATCH_WINDOW, match.match_date + MATCH_WINDOW),
+        match.match_date, match.match_date,
+    )
+    referees = Referee.objects.filter(status='approved', is_active=True).exclude(
+        id__in=busy | set(exclude)
+    ).exclude(
+        id__in=RefereeAvailability.objects.filter(
+            date=match.match_date.date(), is_available=False
+        ).values('referee_id')
+    )
+    for radius in (radius_km, None):
+        candidates = [
+            referee for referee in with_distance(referees, location, radius)
+            if referee.can_be_appointed_as(role)
+        ]
+        if candidates or location is None:
+            break
+    return candidates[:limit]
@@ -7,3 +7,4 @@ class RefereesConfig(AppConfig):
     
     def ready(self):
         import referees.goal_signals  # Register the signals
+        import referees.signals  # Keeps the appointment index in sync
@@ -0,0 +1,105 @@
+# referees/assignment.py
+"""
+Minimum-cost assignment of officials to open slots.
+
+Slots that are interchangeable (same role, same cost for every official)
+are grouped into classes, so the problem becomes a small transportation
+problem: source -> slot class (capacity = open slots) -> official
+(capacity 1) -> sink. It is solved exactly with successive shortest paths
+(Dijkstra with potentials). Leaving a slot empty is allowed at a per-class
+cost, so the solver always returns the cheapest complete plan even when
+there are not enough eligible officials. Plain Python; no Django imports.
+"""
+import heapq
+
+
+class _FlowGraph:
+    def __init__(self, size):
+        self.edges = [[] for _ in range(size)]
+
+    def add_edge(self, source, target, capacity, cost):
+        # [target, remaining capacity, cost, index of reverse edge]
+        self.edges[source].append([target, capacity, cost, len(self.edges[target])])
+        self.edges[target].append([source, 0, -cost, len(self.edges[source]) - 1])
+
+    def min_cost_flow(self, source, sink, required):
+        """Push ``required`` units from source to sink at minimum total cost."""
+        size = len(self.edges)
+        potential = [0] * size
+        pushed = 0
+        while pushed < required:
+            distance = [None] * size
+            distance[source] = 0
+            previous = [None] * size
+            heap = [(0, source)]
+            while heap:
+                dist, node = heapq.heappop(heap)
+                if dist > distance[node]:
+                    continue
+                for index, (target, capacity, cost, _) in enumerate(self.edges[node]):
+                    if capacity <= 0:
+                        continue
+                    candidate = dist + cost + potential[node] - potential[target]
+                    if distance[target] is None or candidate < distance[target]:
+                        distance[target] = candidate
+                        previous[target] = (node, index)
+                        heapq.heappush(heap, (candidate, target))
+            if distance[sink] is None:
+                break
+            for node in range(size):
+                if distance[node] is not None:
+                    potential[node] += distance[node]
+
+            amount = required - pushed
+            node = sink
+            while node != source:
+                parent, index = previous[node]
+                amount = min(amount, self.edges[parent][index][1])
+                node = parent
+            node = sink
+            while node != source:
+                parent, index = previous[node]
+                edge = self.edges[parent][index]
+                edge[1] -= amount
+                self.edges[node][edge[3]][1] += amount
+                node = parent
+            pushed += amount
+        return pushed
+
+
+def assign(slot_counts, candidate_costs, unfilled_costs):
+    """
+    Cheapest assignment of officials to slot classes.
+
+    ``slot_counts`` maps a class key to the number of open slots in it,
+    ``candidate_costs`` maps a class key to {official_id: cost} for the
+    officials eligible for it, and ``unfilled_costs`` gives the cost of
+    leaving one slot of a class empty. Every official is used at most once.
+    Returns {class_key: [official_id, ...]}; a class may get fewer officials
+    than it has slots when leaving them empty was cheaper (or unavoidable).
+    """
+    classes = [key for key, count in slot_counts.items() if count > 0]
+    officials = sorted({official for key in classes for official in candidate_costs.get(key, {})})
+    official_node = {official: 2 + len(classes) + index for index, official in enumerate(officials)}
+    source, sink = 0, 1
+    graph = _FlowGraph(2 + len(classes) + len(officials))
+
+    for index, key in enumerate(classes):
+        class_node = 2 + index
+        graph.add_edge(source, class_node, slot_counts[key], 0)
+        graph.add_edge(class_node, sink, slot_counts[key], unfilled_costs[key])
+        for official, cost in candidate_costs.get(key, {}).items():
+            graph.add_edge(class_node, official_node[official], 1, cost)
+    for official in officials:
+        graph.add_edge(official_node[official], sink, 1, 0)
+
+    graph.min_cost_flow(source, sink, sum(slot_counts[key] for key in classes))
+
+    result = {key: [] for key in classes}
+    node_official = {node: official for official, node in official_node.items()}
+    for index, key in enumerate(classes):
+        for target, capacity, _, _ in graph.edges[2 + index]:
+            # A saturated class -> official edge is an assignment
+            if target in node_official and capacity == 0:
+                result[key].append(node_official[target])
+    return result
@@ -0,0 +1,128 @@
+# referees/exports.py
+"""
+Match officials report exports (Excel and CSV).
+
+Rows are produced from an ``iterator()`` queryset and written out as they
+come: the workbook uses openpyxl's write-only mode (rows go to a temporary
+file, not a cell grid in memory) and the CSV is streamed straight to the
+client, so memory stays flat however long the date range is.
+"""
+import csv
+import tempfile
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from matches.models import Match
+
+
+EXPORT_CHUNK_SIZE = 500
+HEADERS = ['Date', 'Time', 'Match', 'Venue', 'Zone', 'Referee', 'AR1', 'AR2']
+COLUMN_WIDTHS = [12, 10, 35, 25, 15, 20, 20, 20]
+
+
+def report_period(params):
+    """(start_date, end_date) from ``start_date``/``end_date`` params; default the last 30 days."""
+    start_date_str = params.get('start_date')
+    end_date_str = params.get('end_date')
+    if start_date_str and end_date_str:
+        return (datetime.strptime(start_date_str, '%Y-%m-%d').date(),
+                datetime.strptime(end_date_str, '%Y-%m-%d').date())
+    end_date = timezone.now().date()
+    return end_date - timedelta(days=30), end_date
+
+
+def export_matches(start_date, end_date):
+    return Match.objects.filter(
+        match_date__gte=timezone.make_aware(datetime.combine(start_date, time.min)),
+        match_date__lte=timezone.make_aware(datetime.combine(end_date, time.max)),
+    ).select_related(
+        'home_team', 'away_team', 'zone', 'venue_details',
+        'referee__user', 'assistant_referee_1__user', 'assistant_referee_2__user',
+    ).order_by('match_date', 'kickoff_time')
+
+
+def official_name(official):
+    # Only approved referees with a user account are shown
+    if not official or official.status != 'approved' or not official.user:
+        return 'VACANT'
+    return official.user.get_full_name() or f"{official.first_name} {official.last_name}"
+
+
+def venue_label(match):
+    details = getattr(match, 'venue_details', None)
+    return match.venue or (str(details) if details else '') or 'TBD'
+
+
+def appointment_rows(start_date, end_date):
+    """One list of cell values per match, in HEADERS order."""
+    for match in export_matches(start_date, end_date).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            match.match_date.strftime('%Y-%m-%d') if match.match_date else '',
+            str(match.kickoff_time) if match.kickoff_time else 'TBD',
+            f"{match.home_team.team_name} vs {match.away_team.team_name}",
+            venue_label(match),
+            match.zone.name if match.zone else '',
+            official_name(match.referee),
+            official_name(match.assistant_referee_1),
+            official_name(match.assistant_referee_2),
+        ]
+
+
+def report_title(start_date, end_date):
+    return f"FKF Meru League - Match Officials Report ({start_date} to {end_date})"
+
+
+def write_workbook(start_date, end_date):
+    """Write the Excel report to a temporary file and return it, rewound."""
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Match Officials Report")
+    for column, width in enumerate(COLUMN_WIDTHS, 1):
+        ws.column_dimensions[get_column_letter(column)].width = width
+
+    side = Side(style='thin')
+    border = Border(left=side, right=side, top=side, bottom=side)
+    header_fill = PatternFill(start_color="1E3A8A", end_color="1E3A8A", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF", size=12)
+    center = Alignment(horizontal='center', vertical='center')
+
+    def styled(value, **style):
+        cell = WriteOnlyCell(ws, value=value)
+        for name, setting in style.items():
+            setattr(cell, name, setting)
+        return cell
+
+    # Write-only sheets cannot merge cells; the title sits in A1
+    ws.append([styled(report_title(start_date, end_date), font=Font(bold=True, size=14))])
+    ws.append([])
+    ws.append([
+        styled(header, fill=header_fill, font=header_font, alignment=center, border=border)
+        for header in HEADERS
+    ])
+    for row in appointment_rows(start_date, end_date):
+        ws.append([styled(value, border=border) for value in row])
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+class _Echo:
+    """File-like object whose write() just returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(start_date, end_date):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([report_title(start_date, end_date)])
+    yield writer.writerow(HEADERS)
+    for row in appointment_rows(start_date, end_date):
+        yield writer.writerow(row)
@@ -9,7 +9,7 @@ from fkf_league.validators import normalize_kenya_phone
 from fkf_league.constants import KENYA_COUNTIES
 
 from .models import (
-    Referee, MatchReport, MatchOfficials, TeamOfficial,
+    Referee, MatchReport, MatchOfficials, RefereeAppointment, TeamOfficial,
     PlayingKit, MatchVenueDetails, StartingLineup,
     ReservePlayer, Substitution, Caution, Expulsion, MatchGoal, PreMatchMeetingForm
 )
@@ -251,30 +251,20 @@ class MatchOfficialsAppointmentForm(forms.ModelForm):
         excluded_referees = set()
         if match_instance:
             # Find matches in the same round and similar time
-            from matches.models import Match
             from datetime import timedelta
             
             match_date = match_instance.match_date
             time_window_start = match_date - timedelta(hours=2)
             time_window_end = match_date + timedelta(hours=2)
             
-            # Get all matches in same time window
-            overlapping_matches = Match.objects.filter(
-                round_number=match_instance.round_number,
-                match_date__gte=time_window_start,
-                match_date__lte=time_window_end
-            ).exclude(id=match_instance.id)
-            
-            # Collect all appointed referees from these matches
-            for match in overlapping_matches:
-                if hasattr(match, 'officials'):
-                    officials = match.officials
-                    for field in ['main_referee', 'assistant_1', 'assistant_2', 
-                                  'reserve_referee', 'var', 'avar1', 'avar2', 'fourth_official', 
-                                  'match_commissioner']:
-                        referee = getattr(officials, field, None)
-                        if referee:
-                            excluded_referees.add(referee.id)
+            # Referees appointed to other matches of the round in the same time window
+            excluded_referees = set(
+                RefereeAppointment.objects.filter(
+                    match__round_number=match_instance.round_number,
+                    match_date__gte=time_window_start,
+                    match_date__lte=time_window_end,
+                ).exclude(match=match_instance).values_list('referee_id', flat=True)
+            )
         
         # Filter referees by specialization for each role
         # REFEREE role - only REFEREE specialization (can also be VAR, RESERVE)
@@ -299,6 +289,17 @@ class MatchOfficialsAppointmentForm(forms.ModelForm):
             models.Q(specialization='MATCH_COMMISSIONER') | models.Q(specialization__isnull=True)
         ).exclude(id__in=excluded_referees)
         
+        # Nearest referees to the venue first, with the distance in the label
+        if match_instance:
+            from .proximity import venue_location, with_distance
+            location = venue_location(match_instance)
+            referee_specialists = with_distance(referee_specialists, location)
+            assistant_referee_specialists = with_distance(assistant_referee_specialists, location)
+            avar2_specialists = with_distance(avar2_specialists, location)
+            commissioner_specialists = with_distance(commissioner_specialists, location)
+            for field in self.Meta.fields:
+                self.fields[field].label_from_instance = self._label_with_distance
+        
         # Apply filtered querysets to form fields
         self.fields['main_referee'].queryset = referee_specialists
         self.fields['reserve_referee'].queryset = referee_specialists
@@ -312,6 +313,13 @@ class MatchOfficialsAppointmentForm(forms.ModelForm):
         
         self.fields['match_commissioner'].queryset = commissioner_specialists
     
+    @staticmethod
+    def _label_with_distance(referee):
+        distance = getattr(referee, 'distance_km', None)
+        if distance is None:
+            return str(referee)
+        return f"{referee} ({distance:.0f} km)"
+    
     def clean(self):
         """
         Validate that the same official is not appointed to multiple positions
@@ -4,6 +4,7 @@ from django.db.models import F
 from .models import MatchGoal, Caution, Expulsion
 from teams.models import Player
 from matches.models import Match
+from matches.read_models import invalidate_read_models
 
 
 @receiver(post_save, sender=MatchGoal)
@@ -17,6 +18,7 @@ def update_player_goals_on_save(sender, instance, created, **kwargs):
         Player.objects.filter(pk=instance.player.pk).update(
             goals_scored=F('goals_scored') + 1
         )
+        invalidate_read_models()
 
 
 @receiver(post_delete, sender=MatchGoal)
@@ -76,37 +78,52 @@ def update_player_red_cards_on_delete(sender, instance, **kwargs):
         player.save(update_fields=['red_cards'])
 
 
+def _clean_sheet_teams(status, home_team_id, away_team_id, home_score, away_score):
+    """Team ids credited with a clean sheet for a match in the given state."""
+    if status != 'completed':
+        return []
+    teams = []
+    if away_score == 0:
+        teams.append(home_team_id)
+    if home_score == 0:
+        teams.append(away_team_id)
+    return teams
+
+
 @receiver(post_save, sender=Match)
 def update_goalkeeper_clean_sheets(sender, instance, created, **kwargs):
     """
-    Automatically update goalkeeper's clean sheet count when a match score is saved.
-    A goalkeeper gets a clean sheet if:
-    - Their team won or drew AND didn't concede any goals
-    - They played in the match (we'll assume the regular GK played)
+    Keep goalkeepers' clean sheet counts in line with completed results.
+    A team keeps a clean sheet when a completed match ends with it conceding
+    no goals (we assume the registered goalkeepers played). Only saves that
+    change the score or status are considered; the clean sheets credited for
+    the previous state are taken back before those of the new state are given.
     """
-    if not created:  # Only when updating an existing match (score added)
-        # Home team clean sheet - home team conceded 0 goals
-        if instance.away_score == 0 and instance.home_score >= 0:
-            # Find home team's goalkeeper
-            home_goalkeepers = Player.objects.filter(
-                team=instance.home_team,
-                position='GK'
-            )
-            for gk in home_goalkeepers:
-                # Increment clean sheets
-                Player.objects.filter(pk=gk.pk).update(
-                    clean_sheets=F('clean_sheets') + 1
-                )
-        
-        # Away team clean sheet - away team conceded 0 goals
-        if instance.home_score == 0 and instance.away_score >= 0:
-            # Find away team's goalkeeper
-            away_goalkeepers = Player.objects.filter(
-                team=instance.away_team,
-                position='GK'
+    if not created and not instance.has_changed(*Match.RESULT_FIELDS):
+        return
+
+    before = [] if created else _clean_sheet_teams(
+        instance.previous_value('status'),
+        instance.previous_value('home_team_id'),
+        instance.previous_value('away_team_id'),
+        instance.previous_value('home_score'),
+        instance.previous_value('away_score'),
+    )
+    after = _clean_sheet_teams(
+        instance.status, instance.home_team_id, instance.away_team_id,
+        instance.home_score, instance.away_score,
+    )
+
+    for team_id in before:
+        if team_id in after:
+            after.remove(team_id)
+        else:
+            Player.objects.filter(team_id=team_id, position='GK', clean_sheets__gt=0).update(
+                clean_sheets=F('clean_sheets') - 1
             )
-            for gk in away_goalkeepers:
-                # Increment clean sheets
-                Player.objects.filter(pk=gk.pk).update(
-                    clean_sheets=F('clean_sheets') + 1
-                )
+    for team_id in after:
+        Player.objects.filter(team_id=team_id, position='GK').update(
+            clean_sheets=F('clean_sheets') + 1
+        )
+    if before or after:
+        invalidate_read_models()
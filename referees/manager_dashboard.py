@@ -0,0 +1,179 @@
+# referees/manager_dashboard.py
+"""
+Data for the Referees Manager dashboard.
+
+Matches are classified by their officials in SQL (a Case over the LEFT JOIN
+to MatchOfficials) instead of loading every upcoming match and inspecting
+``match.officials`` in Python. The whole dashboard is built in a handful of
+queries, returned by one endpoint and cached briefly; saving or deleting
+officials or a match drops the cached copy.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Q, Value, When
+from django.utils import timezone
+
+from matches.models import Match
+from .models import Referee
+
+
+CACHE_KEY = 'referees:manager_dashboard'
+CACHE_TTL = 60
+APPOINTMENT_WINDOW_DAYS = 4
+URGENT_LIMIT = 10
+APPOINTED_LIMIT = 15
+REFEREE_LIMIT = 10
+# Confirmations are due this many days before the match
+CONFIRMATION_DAYS = 2
+# Appointed matches with a declined official stay listed, flagged for a replacement
+STATUS_DISPLAY = {
+    'confirmed': 'Confirmed',
+    'declined': 'Official Declined',
+    'pending': 'Pending Confirmation',
+}
+
+DECLINED = (
+    Q(officials__main_rejected=True) | Q(officials__ar1_rejected=True) |
+    Q(officials__ar2_rejected=True) | Q(officials__fourth_rejected=True) |
+    Q(officials__reserve_rejected=True) | Q(officials__var_rejected=True) |
+    Q(officials__commissioner_rejected=True)
+)
+
+
+def with_officials_state(matches):
+    """
+    Annotate ``officials_state`` on a Match queryset: 'needs_officials' (no
+    MatchOfficials), 'declined' (someone declined), 'confirmed', 'pending'
+    (appointed, awaiting confirmation) or 'other'.
+    """
+    return matches.annotate(officials_state=Case(
+        When(officials__isnull=True, then=Value('needs_officials')),
+        When(DECLINED, then=Value('declined')),
+        When(officials__status='CONFIRMED', then=Value('confirmed')),
+        When(officials__status='APPOINTED', then=Value('pending')),
+        default=Value('other'),
+        output_field=CharField(),
+    ))
+
+
+def upcoming_matches(now=None):
+    """Scheduled matches inside the appointment window, classified, soonest first."""
+    now = now or timezone.now()
+    return with_officials_state(Match.objects.filter(
+        match_date__gte=now,
+        match_date__lte=now + timedelta(days=APPOINTMENT_WINDOW_DAYS),
+        status='scheduled',
+    )).order_by('match_date')
+
+
+def available_referees(day):
+    """Approved, active referees not marked unavailable on ``day``."""
+    return Referee.objects.filter(status='approved', is_active=True).exclude(
+        availabilities__date=day, availabilities__is_available=False,
+    )
+
+
+def _stats(now):
+    today = timezone.localdate(now)
+    upcoming = Q(match_date__gte=now)
+    appointed = upcoming & Q(officials__status='APPOINTED')
+    deadline_on = lambda day: Q(match_date__date=day + timedelta(days=CONFIRMATION_DAYS))
+    # Today's matches include those that kicked off earlier today
+    totals = Match.objects.filter(upcoming | Q(match_date__date=today)).aggregate(
+        needs_officials=Count('id', filter=upcoming & Q(
+            status='scheduled',
+            match_date__lte=now + timedelta(days=APPOINTMENT_WINDOW_DAYS),
+        ) & ~Q(officials__status='CONFIRMED')),
+        pending_confirmation=Count('id', filter=appointed),
+        today_matches=Count('id', filter=Q(status='scheduled', match_date__date=today)),
+        deadline_today=Count('id', filter=appointed & deadline_on(today)),
+        deadline_tomorrow=Count('id', filter=appointed & deadline_on(today + timedelta(days=1))),
+        deadline_week=Count('id', filter=appointed & Q(
+            match_date__date__gte=today + timedelta(days=CONFIRMATION_DAYS),
+            match_date__date__lte=today + timedelta(days=7 + CONFIRMATION_DAYS),
+        )),
+    )
+    totals['available_referees'] = available_referees(today).count()
+    return totals
+
+
+def _match_data(match, today):
+    return {
+        'id': match.id,
+        'date': match.match_date.strftime('%d/%m/%Y'),
+        'time': match.kickoff_time or 'TBD',
+        'home_team': match.home_team.team_name,
+        'away_team': match.away_team.team_name,
+        'venue': match.venue,
+        'zone': match.zone.name,
+        'round': match.round_number,
+        'days_until_match': (timezone.localdate(match.match_date) - today).days,
+        'match_status': match.status,
+        'start_time': match.start_time.isoformat() if match.start_time else None,
+    }
+
+
+def _official_name(referee):
+    return referee.full_name if referee else None
+
+
+def build_dashboard(now=None):
+    """The whole dashboard as a JSON-ready dict."""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+
+    urgent = []
+    appointed = []
+    matches = upcoming_matches(now).select_related(
+        'home_team', 'away_team', 'zone',
+        'officials__main_referee', 'officials__assistant_1', 'officials__assistant_2',
+    )
+    for match in matches:
+        data = _match_data(match, today)
+        if match.officials_state == 'needs_officials':
+            if len(urgent) < URGENT_LIMIT:
+                data['status'] = 'Needs Officials'
+                urgent.append(data)
+        elif len(appointed) < APPOINTED_LIMIT:
+            officials = match.officials
+            data.update({
+                'referee': _official_name(officials.main_referee),
+                'ar1': _official_name(officials.assistant_1),
+                'ar2': _official_name(officials.assistant_2),
+                'status': officials.status,
+                'officials_state': match.officials_state,
+                'status_display': STATUS_DISPLAY.get(match.officials_state, 'Pending Confirmation'),
+            })
+            appointed.append(data)
+
+    referees = [
+        {
+            'id': referee.id,
+            'name': referee.full_name,
+            'initials': f"{referee.first_name[:1]}{referee.last_name[:1]}",
+            'level': referee.get_level_display() or 'Not set',
+            'county': referee.county or 'Not set',
+        }
+        for referee in available_referees(today)[:REFEREE_LIMIT]
+    ]
+
+    return {
+        'stats': _stats(now),
+        'urgent_matches': urgent,
+        'appointed_matches': appointed,
+        'available_referees': referees,
+        'generated_at': now.isoformat(),
+    }
+
+
+def dashboard_data():
+    data = cache.get(CACHE_KEY)
+    if data is None:
+        data = build_dashboard()
+        cache.set(CACHE_KEY, data, CACHE_TTL)
+    return data
+
+
+def invalidate_dashboard():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:54
+
+from django.db import migrations, models
+
+from fkf_league.geo import cell_for, county_location
+
+
+def backfill_base_locations(apps, schema_editor):
+    Referee = apps.get_model('referees', 'Referee')
+    referees = list(Referee.objects.exclude(county__isnull=True).exclude(county=''))
+    for referee in referees:
+        location = county_location(referee.county)
+        if location:
+            referee.base_latitude, referee.base_longitude = location
+            referee.geo_cell = cell_for(*location)
+    Referee.objects.bulk_update(referees, ['base_latitude', 'base_longitude', 'geo_cell'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('referees', '0020_squadeditrequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='referee',
+            name='base_latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='referee',
+            name='base_longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='referee',
+            name='geo_cell',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='referee',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text="Leave blank to use the county's location", max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='referee',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.RunPython(backfill_base_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of RefereeAppointment.FIELD_ROLES
+FIELD_ROLES = {
+    'main_referee': ('REFEREE', 'main'),
+    'assistant_1': ('AR1', 'ar1'),
+    'assistant_2': ('AR2', 'ar2'),
+    'reserve_referee': ('RESERVE', 'reserve'),
+    'reserve_assistant': ('RESERVE_AR', None),
+    'var': ('VAR', 'var'),
+    'avar1': ('AVAR1', None),
+    'avar2': ('AVAR2', None),
+    'fourth_official': ('RESERVE', 'fourth'),
+    'match_commissioner': ('COMMISSIONER', 'commissioner'),
+}
+
+
+def build_appointment_index(apps, schema_editor):
+    MatchOfficials = apps.get_model('referees', 'MatchOfficials')
+    RefereeAppointment = apps.get_model('referees', 'RefereeAppointment')
+    rows = []
+    for officials in MatchOfficials.objects.select_related('match').iterator():
+        for field, (role, prefix) in FIELD_ROLES.items():
+            referee_id = getattr(officials, f'{field}_id')
+            if referee_id:
+                rows.append(RefereeAppointment(
+                    referee_id=referee_id,
+                    match_id=officials.match_id,
+                    officials_id=officials.pk,
+                    field=field,
+                    role=role,
+                    confirmed=bool(prefix and getattr(officials, f'{prefix}_confirmed')),
+                    rejected=bool(prefix and getattr(officials, f'{prefix}_rejected')),
+                    match_date=officials.match.match_date,
+                ))
+    RefereeAppointment.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0010_match_date_id_idx'),
+        ('referees', '0021_referee_base_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefereeAppointment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=30)),
+                ('role', models.CharField(choices=[('REFEREE', 'Referee'), ('AR1', 'Assistant Referee 1'), ('AR2', 'Assistant Referee 2'), ('RESERVE', 'Reserve Referee'), ('RESERVE_AR', 'Reserve Assistant Referee'), ('VAR', 'Video Assistant Referee'), ('AVAR1', 'Assistant VAR 1'), ('AVAR2', 'Assistant VAR 2'), ('COMMISSIONER', 'Match Commissioner')], max_length=20)),
+                ('confirmed', models.BooleanField(default=False)),
+                ('rejected', models.BooleanField(default=False)),
+                ('match_date', models.DateTimeField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='official_appointments', to='matches.match')),
+                ('officials', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='index_rows', to='referees.matchofficials')),
+                ('referee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_index', to='referees.referee')),
+            ],
+            options={
+                'ordering': ['match_date'],
+                'indexes': [models.Index(fields=['referee', 'match_date'], name='appointment_referee_date_idx'), models.Index(fields=['match_date', 'referee'], name='appointment_date_referee_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='refereeappointment',
+            constraint=models.UniqueConstraint(fields=('officials', 'field'), name='unique_appointment_per_role'),
+        ),
+        migrations.RunPython(build_appointment_index, migrations.RunPython.noop),
+    ]
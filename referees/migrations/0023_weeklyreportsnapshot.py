@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:01
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('referees', '0022_refereeappointment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('view', models.CharField(max_length=30)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='weeklyreportsnapshot',
+            constraint=models.UniqueConstraint(fields=('start_date', 'end_date', 'view'), name='unique_weekly_report_snapshot'),
+        ),
+    ]
@@ -2,9 +2,11 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from fkf_league.validators import validate_kenya_phone
 from fkf_league.constants import KENYA_COUNTIES
+from fkf_league.geo import cell_for, county_location
 from datetime import timedelta
 import random
 import string
@@ -108,6 +110,15 @@ class Referee(models.Model):
         verbose_name="National ID Number"
     )
     
+    # Base Location (for travel distance to venues)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True,
+                                   help_text="Leave blank to use the county's location")
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    # Resolved base location and its grid cell (spatial index), kept in sync on save
+    base_latitude = models.FloatField(null=True, blank=True, editable=False)
+    base_longitude = models.FloatField(null=True, blank=True, editable=False)
+    geo_cell = models.CharField(max_length=16, blank=True, db_index=True, editable=False)
+    
     # Status Management
     is_active = models.BooleanField(default=False)
     status = models.CharField(
@@ -148,6 +159,22 @@ class Referee(models.Model):
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+    @property
+    def base_location(self):
+        """(lat, lon) of the referee's own coordinates, else of their county"""
+        if self.latitude is not None and self.longitude is not None:
+            return float(self.latitude), float(self.longitude)
+        return county_location(self.county)
+    
+    def save(self, *args, **kwargs):
+        location = self.base_location
+        self.base_latitude, self.base_longitude = location or (None, None)
+        self.geo_cell = cell_for(*location) if location else ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude', 'county'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'base_latitude', 'base_longitude', 'geo_cell'}
+        super().save(*args, **kwargs)
+    
     def generate_unique_id(self):
         """Generate unique referee ID: REF-YYYY-XXXX"""
         while True:
@@ -280,6 +307,20 @@ class MatchOfficials(models.Model):
         ('COMMISSIONER', 'Match Commissioner'),
     ]
     
+    # Every role field with the label used in validation messages
+    OFFICIAL_FIELDS = [
+        ('main_referee', 'Referee'),
+        ('assistant_1', 'Assistant Referee 1'),
+        ('assistant_2', 'Assistant Referee 2'),
+        ('reserve_referee', 'Reserve Referee'),
+        ('reserve_assistant', 'Reserve Assistant Referee'),
+        ('var', 'VAR'),
+        ('avar1', 'AVAR 1'),
+        ('avar2', 'AVAR 2'),
+        ('fourth_official', 'Reserve Referee'),
+        ('match_commissioner', 'Match Commissioner'),
+    ]
+    
     APPOINTMENT_STATUS = [
         ('PENDING', 'Pending Appointment'),
         ('APPOINTED', 'Appointed - Awaiting Confirmation'),
@@ -462,48 +503,35 @@ class MatchOfficials(models.Model):
                 )
         
         # Rule 2: Round sequencing - Must complete appointments for previous round first
+        # (one query: the first few previous-round matches without officials)
         if self.match and hasattr(self.match, 'round_number') and self.match.round_number > 1:
             from matches.models import Match
             previous_round = self.match.round_number - 1
             
-            # Get all matches from previous round in same zone
-            previous_round_matches = Match.objects.filter(
-                zone=self.match.zone,
-                round_number=previous_round
-            ).exclude(status__in=['cancelled', 'postponed'])
+            unappointed_matches = list(
+                Match.objects.filter(
+                    zone_id=self.match.zone_id,
+                    round_number=previous_round,
+                    officials__isnull=True,
+                ).exclude(
+                    status__in=['cancelled', 'postponed']
+                ).select_related('home_team', 'away_team').order_by('match_date', 'id')[:4]
+            )
             
-            # Check if all previous round matches have officials appointed
-            if previous_round_matches.exists():
-                unappointed_matches = []
-                for prev_match in previous_round_matches:
-                    if not hasattr(prev_match, 'officials') or prev_match.officials is None:
-                        unappointed_matches.append(prev_match)
-                
-                if unappointed_matches:
-                    match_info = [f"{m.home_team} vs {m.away_team}" for m in unappointed_matches[:3]]
-                    raise ValidationError(
-                        f"Cannot appoint for Round {self.match.round_number} yet. "
-                        f"Complete all appointments for Round {previous_round} first. "
-                        f"Unappointed matches: {', '.join(match_info)}"
-                        f"{' and more...' if len(unappointed_matches) > 3 else ''}"
-                    )
+            if unappointed_matches:
+                match_info = [f"{m.home_team} vs {m.away_team}" for m in unappointed_matches[:3]]
+                raise ValidationError(
+                    f"Cannot appoint for Round {self.match.round_number} yet. "
+                    f"Complete all appointments for Round {previous_round} first. "
+                    f"Unappointed matches: {', '.join(match_info)}"
+                    f"{' and more...' if len(unappointed_matches) > 3 else ''}"
+                )
         
         # Rule 3: Check referee approval status (from Document 1)
-        officials = [
-            (self.main_referee, 'Referee'),
-            (self.assistant_1, 'Assistant Referee 1'),
-            (self.assistant_2, 'Assistant Referee 2'),
-            (self.reserve_referee, 'Reserve Referee'),
-            (self.reserve_assistant, 'Reserve Assistant Referee'),
-            (self.var, 'VAR'),
-            (self.avar1, 'AVAR 1'),
-            (self.avar2, 'AVAR 2'),
-            (self.fourth_official, 'Reserve Referee'),
-            (self.match_commissioner, 'Match Commissioner'),
-        ]
+        officials = self._appointed_referees()
         
         for referee, role in officials:
-            if referee and not referee.can_be_appointed():
+            if not referee.can_be_appointed():
                 raise ValidationError(
                     f"{referee.full_name} cannot be appointed as {role}. "
                     f"Status: {referee.get_status_display()}, Active: {referee.is_active}"
@@ -512,29 +540,53 @@ class MatchOfficials(models.Model):
         # Rule 4: No duplicate appointments (from both)
         referee_roles = {}
         for referee, role in officials:
-            if referee:
-                if referee in referee_roles:
+            if referee.id in referee_roles:
+                raise ValidationError(
+                    f"{referee.full_name} cannot be both "
+                    f"{referee_roles[referee.id]} and {role}"
+                )
+            referee_roles[referee.id] = role
+        
+        # Rule 5: Check availability (from Document 1) - all officials in one query
+        if officials and self.match and self.match.match_date:
+            match_date = self.match.match_date.date()
+            unavailable = {
+                entry.referee_id: entry
+                for entry in RefereeAvailability.objects.filter(
+                    referee_id__in=referee_roles, date=match_date, is_available=False
+                )
+            }
+            for referee, role in officials:
+                if referee.id in unavailable:
                     raise ValidationError(
-                        f"{referee.full_name} cannot be both "
-                        f"{referee_roles[referee]} and {role}"
+                        f"{referee.full_name} is unavailable on {match_date}. "
+                        f"Reason: {unavailable[referee.id].reason}"
                     )
-                referee_roles[referee] = role
+    
+    def _appointed_referees(self):
+        """
+        (referee, role label) for every filled role, in OFFICIAL_FIELDS order.
+        Referees not already loaded on the instance are fetched in one query;
+        an id that no longer exists is a validation error.
+        """
+        missing = {}
+        for field, _ in self.OFFICIAL_FIELDS:
+            referee_id = getattr(self, f'{field}_id')
+            if referee_id and not self._meta.get_field(field).is_cached(self):
+                missing[referee_id] = field
+        loaded = Referee.objects.in_bulk(list(missing)) if missing else {}
         
-        # Rule 5: Check availability (from Document 1)
-        if self.match and self.match.match_date:
-            for referee, role in officials:
-                if referee:
-                    unavailable = RefereeAvailability.objects.filter(
-                        referee=referee,
-                        date=self.match.match_date.date(),
-                        is_available=False
-                    ).first()
-                    
-                    if unavailable:
-                        raise ValidationError(
-                            f"{referee.full_name} is unavailable on {self.match.match_date.date()}. "
-                            f"Reason: {unavailable.reason}"
-                        )
+        officials = []
+        for field, role in self.OFFICIAL_FIELDS:
+            referee_id = getattr(self, f'{field}_id')
+            if not referee_id:
+                continue
+            if referee_id in missing:
+                if referee_id not in loaded:
+                    raise ValidationError({field: f"Referee {referee_id} does not exist."})
+                setattr(self, field, loaded[referee_id])
+            officials.append((getattr(self, field), role))
+        return officials
     
     def save(self, *args, **kwargs):
         """Save with optional validation bypass"""
@@ -549,9 +601,13 @@ class MatchOfficials(models.Model):
                 self.status = 'CONFIRMED'
         
         if validate:
-            self.full_clean()
+            # Officials are checked (and loaded) together in clean(), not one
+            # foreign-key lookup per role
+            self.full_clean(exclude=[field for field, _ in self.OFFICIAL_FIELDS])
         
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        RefereeAppointment.sync(self, created=adding)
     
     @property
     def can_appoint(self):
@@ -639,6 +695,94 @@ class MatchOfficials(models.Model):
         return None
 
 
+class RefereeAppointment(models.Model):
+    """
+    One row per (referee, match, role), kept in sync by MatchOfficials.save().
+    Denormalized so "my appointments", clash checks and workload counts are
+    single indexed lookups instead of an OR across the ten role columns.
+    """
+    # field -> (role code, prefix of its confirmed/rejected flags or None)
+    FIELD_ROLES = {
+        'main_referee': ('REFEREE', 'main'),
+        'assistant_1': ('AR1', 'ar1'),
+        'assistant_2': ('AR2', 'ar2'),
+        'reserve_referee': ('RESERVE', 'reserve'),
+        'reserve_assistant': ('RESERVE_AR', None),
+        'var': ('VAR', 'var'),
+        'avar1': ('AVAR1', None),
+        'avar2': ('AVAR2', None),
+        'fourth_official': ('RESERVE', 'fourth'),
+        'match_commissioner': ('COMMISSIONER', 'commissioner'),
+    }
+    
+    referee = models.ForeignKey(Referee, on_delete=models.CASCADE, related_name='appointment_index')
+    match = models.ForeignKey('matches.Match', on_delete=models.CASCADE, related_name='official_appointments')
+    officials = models.ForeignKey(MatchOfficials, on_delete=models.CASCADE, related_name='index_rows')
+    field = models.CharField(max_length=30)
+    role = models.CharField(max_length=20, choices=MatchOfficials.OFFICIAL_ROLES)
+    confirmed = models.BooleanField(default=False)
+    rejected = models.BooleanField(default=False)
+    match_date = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['match_date']
+        constraints = [
+            models.UniqueConstraint(fields=['officials', 'field'], name='unique_appointment_per_role'),
+        ]
+        indexes = [
+            models.Index(fields=['referee', 'match_date'], name='appointment_referee_date_idx'),
+            models.Index(fields=['match_date', 'referee'], name='appointment_date_referee_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.referee_id} as {self.role} in match {self.match_id}"
+    
+    @classmethod
+    def rows_for(cls, officials, match_date):
+        rows = []
+        for field, (role, prefix) in cls.FIELD_ROLES.items():
+            referee_id = getattr(officials, f'{field}_id')
+            if referee_id:
+                rows.append(cls(
+                    referee_id=referee_id,
+                    match_id=officials.match_id,
+                    officials_id=officials.pk,
+                    field=field,
+                    role=role,
+                    confirmed=bool(prefix and getattr(officials, f'{prefix}_confirmed')),
+                    rejected=bool(prefix and getattr(officials, f'{prefix}_rejected')),
+                    match_date=match_date,
+                ))
+        return rows
+    
+    @classmethod
+    def sync(cls, officials, created=False):
+        """Replace the index rows of one MatchOfficials (at most two queries)."""
+        if not created:
+            cls.objects.filter(officials_id=officials.pk).delete()
+        cls.objects.bulk_create(cls.rows_for(officials, officials.match.match_date))
+
+
+class WeeklyReportSnapshot(models.Model):
+    """
+    Stored weekly report for a period that is over (see referees.weekly_report).
+    ``view`` is 'manager', 'public' or 'referee:<id>'.
+    """
+    start_date = models.DateField()
+    end_date = models.DateField()
+    view = models.CharField(max_length=30)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['start_date', 'end_date', 'view'], name='unique_weekly_report_snapshot'),
+        ]
+    
+    def __str__(self):
+        return f"{self.view} report {self.start_date} - {self.end_date}"
+
+
 class TeamOfficial(models.Model):
     """Team officials for a match"""
     POSITION_CHOICES = [
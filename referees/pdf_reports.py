@@ -0,0 +1,291 @@
+# referees/pdf_reports.py
+"""
+PDF documents rendered by the background worker and cached by content.
+
+Each document is identified by a digest of its inputs: the kind, its
+parameters and a fingerprint of the rows it is built from (counts and last
+``updated_at`` values, or the rendered values of rows that have no
+``updated_at``). The rendered file is stored under that digest, so a download
+is a file read when nothing changed and a new render when something did; the
+file it replaces is deleted once the new one is stored. Requests never run
+reportlab; they queue a 'render_pdf' job and show a waiting page until the
+file exists.
+"""
+import hashlib
+import io
+import json
+from datetime import date
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponseNotModified
+from django.shortcuts import render
+from django.utils.html import escape
+
+from .exports import export_matches, official_name, venue_label
+
+
+PDF_DIR = 'reports/pdf'
+# Bump when the layout changes so cached files are not served
+RENDER_VERSION = 2
+
+
+def _appointments_fingerprint(params):
+    start_date = date.fromisoformat(params['start_date'])
+    end_date = date.fromisoformat(params['end_date'])
+    return export_matches(start_date, end_date).order_by().aggregate(
+        matches=Count('id'),
+        matches_updated=Max('updated_at'),
+        referee_updated=Max('referee__updated_at'),
+        ar1_updated=Max('assistant_referee_1__updated_at'),
+        ar2_updated=Max('assistant_referee_2__updated_at'),
+    )
+
+
+def _match_report_fingerprint(params):
+    from .models import Caution, Expulsion, MatchGoal, MatchReport
+
+    fingerprint = MatchReport.objects.filter(id=params['report_id']).aggregate(
+        report_updated=Max('updated_at'),
+        match_updated=Max('match__updated_at'),
+        match_id=Max('match_id'),
+    )
+    # Goals and cards have no updated_at: fingerprint the values the PDF shows
+    player = ['player__first_name', 'player__last_name', 'team__team_name']
+    fingerprint['goals'] = list(MatchGoal.objects.filter(match_id=fingerprint['match_id']).order_by('id').values_list(
+        'id', 'minute', 'goal_type', *player
+    ))
+    for name, model in [('cautions', Caution), ('expulsions', Expulsion)]:
+        fingerprint[name] = list(model.objects.filter(match_id=fingerprint['match_id']).order_by('id').values_list(
+            'id', 'minute', 'reason', *player
+        ))
+    return fingerprint
+
+
+def pdf_digest(kind, params):
+    """Content address of a document: changes whenever its inputs do."""
+    fingerprint = FINGERPRINTS[kind](params)
+    payload = json.dumps([RENDER_VERSION, kind, params, fingerprint], sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def pdf_key(kind, params):
+    """Folder of one document: its successive renders replace each other there."""
+    payload = json.dumps([kind, params], sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def pdf_path(kind, params, digest):
+    return f'{PDF_DIR}/{pdf_key(kind, params)}/{digest}.pdf'
+
+
+def delete_superseded(kind, params, digest):
+    """Remove the earlier renders of a document; returns how many were deleted."""
+    folder = f'{PDF_DIR}/{pdf_key(kind, params)}'
+    try:
+        _, files = default_storage.listdir(folder)
+    except FileNotFoundError:
+        return 0
+    superseded = [name for name in files if name != f'{digest}.pdf']
+    for name in superseded:
+        default_storage.delete(f'{folder}/{name}')
+    return len(superseded)
+
+
+def _table_style(colors):
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1E3A8A')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ])
+
+
+def _title_style():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    return ParagraphStyle(
+        'CustomTitle',
+        parent=getSampleStyleSheet()['Heading1'],
+        fontSize=16,
+        textColor=colors.HexColor('#1E3A8A'),
+        spaceAfter=20,
+        alignment=1  # Center
+    )
+
+
+def _render(elements, pagesize):
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesize, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def render_appointments_pdf(params):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    start_date = date.fromisoformat(params['start_date'])
+    end_date = date.fromisoformat(params['end_date'])
+
+    data = [['Date', 'Time', 'Match', 'Venue', 'Referee', 'AR1', 'AR2']]
+    for match in export_matches(start_date, end_date).iterator(chunk_size=500):
+        data.append([
+            match.match_date.strftime('%d/%m/%Y') if match.match_date else '',
+            str(match.kickoff_time)[:5] if match.kickoff_time else 'TBD',
+            f"{match.home_team.team_name}\nvs\n{match.away_team.team_name}",
+            venue_label(match),
+            official_name(match.referee),
+            official_name(match.assistant_referee_1),
+            official_name(match.assistant_referee_2)
+        ])
+
+    table = Table(data, colWidths=[0.8*inch, 0.6*inch, 2*inch, 1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+    table.setStyle(_table_style(colors))
+    return _render([
+        Paragraph(f"FKF Meru League - Match Officials Report<br/>{start_date} to {end_date}", _title_style()),
+        Spacer(1, 0.2*inch),
+        table,
+    ], landscape(A4))
+
+
+def render_match_report_pdf(params):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    from .models import MatchReport
+
+    report = MatchReport.objects.select_related(
+        'match__home_team', 'match__away_team', 'match__zone', 'referee'
+    ).get(id=params['report_id'])
+    match = report.match
+    styles = getSampleStyleSheet()
+
+    elements = [
+        Paragraph(f"FKF Meru League - Match Report #{report.id}", _title_style()),
+        Paragraph(
+            f"<b>{escape(match.home_team.team_name)} {match.home_score} - {match.away_score} "
+            f"{escape(match.away_team.team_name)}</b>", styles['Heading2']
+        ),
+        Paragraph(
+            f"{match.match_date.strftime('%d/%m/%Y')} {escape(match.kickoff_time or '')} | "
+            f"{escape(venue_label(match))} | {escape(match.zone.name if match.zone else '')} | "
+            f"Round {escape(report.round_number or match.round_number or '-')}",
+            styles['Normal']
+        ),
+        Paragraph(f"Referee: {escape(report.referee.full_name)} | Status: {report.get_status_display()}", styles['Normal']),
+        Spacer(1, 0.2*inch),
+    ]
+
+    sections = [
+        ('Goals', ['Minute', 'Team', 'Player', 'Type'], [
+            [f"{goal.minute}'", goal.team.team_name, str(goal.player), goal.get_goal_type_display()]
+            for goal in match.match_goals.select_related('team', 'player')
+        ]),
+        ('Cautions', ['Minute', 'Team', 'Player', 'Reason'], [
+            [f"{caution.minute}'", caution.team.team_name, str(caution.player), caution.reason]
+            for caution in match.cautions.select_related('team', 'player')
+        ]),
+        ('Expulsions', ['Minute', 'Team', 'Player', 'Reason'], [
+            [f"{expulsion.minute}'", expulsion.team.team_name, str(expulsion.player), expulsion.reason]
+            for expulsion in match.expulsions.select_related('team', 'player')
+        ]),
+    ]
+    for heading, headers, rows in sections:
+        elements.append(Paragraph(heading, styles['Heading3']))
+        if rows:
+            table = Table([headers] + rows, colWidths=[0.8*inch, 1.8*inch, 2*inch, 2.4*inch])
+            table.setStyle(_table_style(colors))
+            elements.append(table)
+        else:
+            elements.append(Paragraph('None recorded.', styles['Normal']))
+        elements.append(Spacer(1, 0.15*inch))
+
+    for heading, text in [
+        ('Penalties Not Converted', report.penalties_not_converted),
+        ('Serious Incidents', report.serious_incidents),
+        ("Referee's Comments", report.referee_comments),
+    ]:
+        if text:
+            elements.append(Paragraph(heading, styles['Heading3']))
+            elements.append(Paragraph(escape(text).replace('\n', '<br/>'), styles['Normal']))
+
+    return _render(elements, A4)
+
+
+FINGERPRINTS = {
+    'appointments': _appointments_fingerprint,
+    'match_report': _match_report_fingerprint,
+}
+RENDERERS = {
+    'appointments': render_appointments_pdf,
+    'match_report': render_match_report_pdf,
+}
+
+
+def render_pdf(kind, params):
+    """Background task: render a document and store it under its digest."""
+    if kind not in RENDERERS:
+        return False, f"Unknown PDF kind: {kind}"
+    digest = pdf_digest(kind, params)
+    path = pdf_path(kind, params, digest)
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(RENDERERS[kind](params)))
+    delete_superseded(kind, params, digest)
+    return True, f"Rendered {path}", digest
+
+
+def pdf_response(request, kind, params, filename):
+    """
+    The cached PDF (304 when the client already has it), or a waiting page
+    while a worker renders it.
+    """
+    from admin_dashboard.jobs import enqueue
+    from admin_dashboard.models import BackgroundJob
+
+    digest = pdf_digest(kind, params)
+    etag = f'"{digest}"'
+    path = pdf_path(kind, params, digest)
+    if default_storage.exists(path):
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                default_storage.open(path, 'rb'), as_attachment=True,
+                filename=filename, content_type='application/pdf',
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return response
+
+    dedupe_key = f'pdf:{digest}'
+    job = BackgroundJob.objects.filter(dedupe_key=dedupe_key).order_by('-created_at').first()
+    if job is None or job.status == 'succeeded' or (job.status == 'failed' and request.GET.get('retry')):
+        job = enqueue('render_pdf', kind, params, user=request.user, dedupe_key=dedupe_key)
+    query = request.GET.copy()
+    query.pop('retry', None)
+    return render(request, 'referees/pdf_pending.html', {
+        'job': job,
+        'filename': filename,
+        'refresh_url': f"{request.path}?{query.urlencode()}",
+    }, status=202)
@@ -0,0 +1,63 @@
+# referees/proximity.py
+"""
+Travel distance between referees and match venues.
+
+A venue is the home team's ground (Team.latitude/longitude); a referee's
+base is their own coordinates or, failing that, their county. Referees keep
+their resolved base and its grid cell (see fkf_league.geo) on the row, so a
+candidate list can be narrowed by cell and ordered by distance in the same
+query.
+"""
+import math
+
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import Sqrt
+
+from fkf_league.geo import KM_PER_DEGREE, cells_within, distance_km
+
+
+# Default search radius when looking for officials near a venue
+NEAR_RADIUS_KM = 100
+
+
+def venue_location(match):
+    """(lat, lon) of the match venue, or None when the home ground has no coordinates."""
+    team = match.home_team
+    if team is None or team.latitude is None or team.longitude is None:
+        return None
+    return float(team.latitude), float(team.longitude)
+
+
+def _distance_expression(location):
+    # Equirectangular approximation; well within 1% at the distances
+    # referees travel, and it runs on every database backend
+    latitude, longitude = location
+    lon_scale = math.cos(math.radians(latitude))
+    d_lat = F('base_latitude') - Value(latitude)
+    d_lon = (F('base_longitude') - Value(longitude)) * Value(lon_scale)
+    return ExpressionWrapper(
+        Sqrt(d_lat * d_lat + d_lon * d_lon) * Value(KM_PER_DEGREE),
+        output_field=FloatField(),
+    )
+
+
+def with_distance(referees, location, radius_km=None):
+    """
+    Annotate ``distance_km`` on a Referee queryset and order it nearest
+    first (referees without a base location last). With ``radius_km`` only
+    referees in the grid cells around the location are returned.
+    """
+    if location is None:
+        return referees.annotate(distance_km=Value(None, output_field=FloatField()))
+    if radius_km is not None:
+        referees = referees.filter(geo_cell__in=cells_within(*location, radius_km))
+    return referees.annotate(distance_km=_distance_expression(location)).order_by(
+        F('distance_km').asc(nulls_last=True), 'last_name', 'first_name'
+    )
+
+
+def referee_distance(referee, location):
+    """Distance in km from a referee's base to ``location``, or None if either is unknown."""
+    if location is None or referee.base_latitude is None or referee.base_longitude is None:
+        return None
+    return distance_km((referee.base_latitude, referee.base_longitude), location)
@@ -0,0 +1,40 @@
+# referees/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from matches.models import Match
+from .manager_dashboard import invalidate_dashboard
+from .models import MatchOfficials, RefereeAppointment
+from .weekly_report import invalidate_snapshots
+
+
+@receiver(post_save, sender=Match)
+def keep_appointment_dates_in_sync(sender, instance, created, **kwargs):
+    """Rescheduling a match moves its officials' appointment index rows with it."""
+    if created or not instance.has_changed('match_date'):
+        return
+    RefereeAppointment.objects.filter(match=instance).update(match_date=instance.match_date)
+
+
+@receiver(post_save, sender=MatchOfficials)
+@receiver(post_delete, sender=MatchOfficials)
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def refresh_manager_dashboard(sender, instance, **kwargs):
+    """Appointments made or cancelled and matches moved or removed change the cached payload."""
+    invalidate_dashboard()
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def drop_weekly_report_snapshots(sender, instance, **kwargs):
+    """Any change to a match invalidates the stored reports covering its old and new dates."""
+    today = timezone.localdate()
+    days = {
+        timezone.localdate(value)
+        for value in (instance.match_date, instance.previous_value('match_date'))
+        if value
+    }
+    # Snapshots only cover periods that ended before today
+    invalidate_snapshots(*(day for day in days if day < today))
@@ -1,3 +1,538 @@
-from django.test import TestCase
+import csv
+import io
+import random
+import tempfile
+from datetime import date, datetime, time, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.urls import reverse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from admin_dashboard.jobs import run_pending_jobs
+from admin_dashboard.models import BackgroundJob
+from fkf_league.geo import cell_for, cells_within, distance_km
+from fkf_league.testing import isolate_activity_log, make_match, make_referee, make_team
+from matches.models import Match
+from referees.appointment_optimizer import nearest_available
+from referees.assignment import assign
+from referees.exports import HEADERS, appointment_rows
+from referees.forms import MatchOfficialsAppointmentForm
+from referees.manager_dashboard import CACHE_KEY, build_dashboard, dashboard_data
+from referees.models import (
+    MatchGoal, MatchOfficials, MatchReport, Referee, RefereeAppointment, RefereeAvailability, WeeklyReportSnapshot,
+)
+from referees.pdf_reports import PDF_DIR, pdf_digest, pdf_key
+from referees.proximity import referee_distance, with_distance
+from referees.weekly_report import report_data
+from teams.models import Player, Zone
+
+
+def plan_cost(plan, slot_counts, candidate_costs, unfilled_costs):
+    cost = 0
+    for key, count in slot_counts.items():
+        officials = plan.get(key, [])
+        cost += sum(candidate_costs[key][official] for official in officials)
+        cost += (count - len(officials)) * unfilled_costs[key]
+    return cost
+
+
+def brute_force_cost(slot_counts, candidate_costs, unfilled_costs):
+    """Cheapest cost over every way of filling (or leaving empty) each slot."""
+    slots = [key for key, count in slot_counts.items() for _ in range(count)]
+
+    def best(position, used):
+        if position == len(slots):
+            return 0
+        key = slots[position]
+        cheapest = unfilled_costs[key] + best(position + 1, used)
+        for official, cost in candidate_costs.get(key, {}).items():
+            if official not in used:
+                cheapest = min(cheapest, cost + best(position + 1, used | {official}))
+        return cheapest
+
+    return best(0, frozenset())
+
+
+class AssignmentSolverTests(SimpleTestCase):
+    def test_matches_brute_force_on_small_instances(self):
+        rng = random.Random(2024)
+        for case in range(200):
+            with self.subTest(case=case):
+                classes = [f'class{index}' for index in range(rng.randint(1, 3))]
+                officials = list(range(rng.randint(1, 5)))
+                slot_counts = {key: rng.randint(1, 2) for key in classes}
+                candidate_costs = {
+                    key: {official: rng.randint(0, 20) for official in officials if rng.random() < 0.7}
+                    for key in classes
+                }
+                unfilled_costs = {key: rng.randint(5, 30) for key in classes}
+
+                plan = assign(slot_counts, candidate_costs, unfilled_costs)
+
+                assigned = [official for officials_of_class in plan.values() for official in officials_of_class]
+                self.assertEqual(len(assigned), len(set(assigned)), "an official was used twice")
+                for key, officials_of_class in plan.items():
+                    self.assertLessEqual(len(officials_of_class), slot_counts[key])
+                    self.assertTrue(set(officials_of_class) <= set(candidate_costs[key]))
+                self.assertEqual(
+                    plan_cost(plan, slot_counts, candidate_costs, unfilled_costs),
+                    brute_force_cost(slot_counts, candidate_costs, unfilled_costs),
+                )
+
+    def test_greedy_choice_is_not_taken_when_it_costs_more_overall(self):
+        # Official 1 is cheapest for both roles, but only official 1 can
+        # referee; giving them the assistant slot would leave 'main' empty.
+        slot_counts = {'main': 1, 'assistant': 1}
+        candidate_costs = {'main': {1: 5}, 'assistant': {1: 1, 2: 4}}
+        unfilled_costs = {'main': 100, 'assistant': 100}
+
+        self.assertEqual(assign(slot_counts, candidate_costs, unfilled_costs), {'main': [1], 'assistant': [2]})
+
+    def test_slot_left_empty_when_no_one_is_eligible(self):
+        plan = assign({'commissioner': 2}, {'commissioner': {7: 3}}, {'commissioner': 50})
+
+        self.assertEqual(plan, {'commissioner': [7]})
+
+
+class GeoGridTests(SimpleTestCase):
+    NAIROBI = (-1.2921, 36.8219)
+    KIAMBU = (-1.1714, 36.8356)
+    MOMBASA = (-4.0435, 39.6682)
+
+    def test_distance_km(self):
+        self.assertAlmostEqual(distance_km(self.NAIROBI, self.MOMBASA), 440, delta=5)
+        self.assertEqual(distance_km(self.NAIROBI, self.NAIROBI), 0)
+
+    def test_cells_within_cover_every_point_in_the_radius(self):
+        cells = set(cells_within(*self.NAIROBI, 50))
+        self.assertIn(cell_for(*self.NAIROBI), cells)
+        self.assertIn(cell_for(*self.KIAMBU), cells)
+        self.assertNotIn(cell_for(*self.MOMBASA), cells)
+        # Points just inside the radius in every direction
+        for d_lat, d_lon in ((0.44, 0), (-0.44, 0), (0, 0.44), (0, -0.44)):
+            self.assertIn(cell_for(self.NAIROBI[0] + d_lat, self.NAIROBI[1] + d_lon), cells)
+
+    def test_missing_coordinates_have_no_cell(self):
+        self.assertEqual(cell_for(None, 36.8), '')
+
+
+class ProximityTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(name='Zone N')
+        home = make_team(zone, latitude=GeoGridTests.NAIROBI[0], longitude=GeoGridTests.NAIROBI[1])
+        self.match = make_match(zone, home, make_team(zone), days=1)
+        self.far = make_referee(county='mombasa')
+        self.near = make_referee(county='kiambu')
+        self.exact = make_referee(county='mombasa', latitude=-1.30, longitude=36.80)
+        self.unknown = make_referee()
+
+    def test_base_location_and_cell_are_kept_on_the_row(self):
+        self.assertEqual(self.exact.geo_cell, cell_for(-1.30, 36.80))
+        self.assertEqual(self.near.geo_cell, cell_for(*GeoGridTests.KIAMBU))
+        self.assertEqual(self.unknown.geo_cell, '')
+
+        self.unknown.county = 'nairobi'
+        self.unknown.save(update_fields=['county'])
+        self.unknown.refresh_from_db()
+        self.assertEqual(self.unknown.geo_cell, cell_for(*GeoGridTests.NAIROBI))
+
+    def test_candidates_are_ordered_by_distance_in_one_query(self):
+        with self.assertNumQueries(1):
+            ranked = list(with_distance(Referee.objects.all(), GeoGridTests.NAIROBI))
+
+        self.assertEqual(ranked, [self.exact, self.near, self.far, self.unknown])
+        self.assertAlmostEqual(
+            ranked[2].distance_km, referee_distance(self.far, GeoGridTests.NAIROBI), delta=5,
+        )
+        self.assertIsNone(ranked[3].distance_km)
+        nearby = with_distance(Referee.objects.all(), GeoGridTests.NAIROBI, radius_km=50)
+        self.assertEqual(list(nearby), [self.exact, self.near])
+
+    def test_nearest_available_widens_the_search_when_nobody_is_near(self):
+        self.assertEqual(nearest_available(self.match, 'REFEREE', exclude=[self.exact.id]), [self.near])
+        self.assertEqual(
+            nearest_available(self.match, 'REFEREE', exclude=[self.exact.id, self.near.id]),
+            [self.far, self.unknown],
+        )
+
+
+class MatchOfficialsValidationTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone V')
+        teams = [make_team(self.zone) for _ in range(4)]
+        self.previous_round = [
+            make_match(self.zone, teams[0], teams[1], days=1, round_number=1),
+            make_match(self.zone, teams[2], teams[3], days=1, round_number=1),
+        ]
+        self.match = make_match(self.zone, teams[1], teams[0], days=2, round_number=2)
+        self.referees = [make_referee() for _ in MatchOfficials.OFFICIAL_FIELDS]
+
+    def officials(self, count=len(MatchOfficials.OFFICIAL_FIELDS), **kwargs):
+        fields = {
+            f'{field}_id': referee.id
+            for (field, _), referee in zip(MatchOfficials.OFFICIAL_FIELDS[:count], self.referees)
+        }
+        fields.update(kwargs)
+        return MatchOfficials(match=self.match, **fields)
+
+    def staff_previous_round(self):
+        for match in self.previous_round:
+            MatchOfficials.objects.create(match=match)
+
+    def test_query_count_does_not_depend_on_the_number_of_officials(self):
+        self.staff_previous_round()
+        # Previous round, the referees in one batch, their availability
+        with self.assertNumQueries(3):
+            self.officials(count=1).clean()
+        with self.assertNumQueries(3):
+            self.officials().clean()
+
+    def test_previous_round_must_be_appointed_first(self):
+        with self.assertRaisesMessage(ValidationError, 'Complete all appointments for Round 1 first'):
+            self.officials(count=1).clean()
+
+    def test_conflicts_are_reported(self):
+        self.staff_previous_round()
+        RefereeAvailability.objects.create(
+            referee=self.referees[3], date=self.match.match_date.date(), is_available=False, reason='Injured',
+        )
+        Referee.objects.filter(pk=self.referees[4].pk).update(status='suspended')
+        cases = [
+            ('unavailable', self.officials(count=4), 'Reason: Injured'),
+            ('suspended', self.officials(count=5, reserve_referee_id=None), 'cannot be appointed as'),
+            ('duplicate', self.officials(count=1, var_id=self.referees[0].id), 'cannot be both'),
+        ]
+        for case, officials, message in cases:
+            with self.subTest(case=case), self.assertRaisesMessage(ValidationError, message):
+                officials.clean()
+
+        with self.assertRaises(ValidationError) as raised:
+            self.officials(count=1, var_id=99999).clean()
+        self.assertIn('var', raised.exception.message_dict)
+
+
+class AppointmentIndexTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone I')
+        self.match = make_match(self.zone, make_team(self.zone), make_team(self.zone), days=1)
+        self.referees = [make_referee() for _ in range(3)]
+
+    def index(self):
+        return set(RefereeAppointment.objects.values_list('referee_id', 'role', 'confirmed', 'match_date'))
+
+    def test_rows_follow_the_appointment(self):
+        first, second, third = self.referees
+        officials = MatchOfficials.objects.create(match=self.match, main_referee=first, assistant_1=second)
+        kickoff = self.match.match_date
+        self.assertEqual(self.index(), {(first.id, 'REFEREE', False, kickoff), (second.id, 'AR1', False, kickoff)})
+
+        officials.main_confirmed = True
+        officials.assistant_1 = third
+        officials.save()
+        self.assertEqual(self.index(), {(first.id, 'REFEREE', True, kickoff), (third.id, 'AR1', False, kickoff)})
+
+        self.match.match_date = kickoff + timedelta(days=1)
+        self.match.save()
+        self.assertEqual(
+            set(RefereeAppointment.objects.values_list('match_date', flat=True)), {self.match.match_date},
+        )
+
+        officials.delete()
+        self.assertFalse(RefereeAppointment.objects.exists())
+
+    def test_form_hides_referees_busy_at_the_same_time(self):
+        busy, free, _ = self.referees
+        clash = make_match(self.zone, make_team(self.zone), make_team(self.zone), match_date=self.match.match_date)
+        MatchOfficials.objects.create(match=clash, main_referee=busy)
+
+        form = MatchOfficialsAppointmentForm(instance=MatchOfficials.objects.create(match=self.match))
+
+        choices = set(form.fields['main_referee'].queryset)
+        self.assertNotIn(busy, choices)
+        self.assertIn(free, choices)
+
+    def test_referee_dashboard_reads_the_index(self):
+        isolate_activity_log(self)
+        user = User.objects.create_user('referee-user', 'referee@example.com', 'x')
+        user.groups.add(Group.objects.create(name='Referee'))
+        referee = make_referee(user=user)
+        MatchOfficials.objects.create(match=self.match, var=referee)
+        self.client.force_login(user)
+
+        response = self.client.get('/referees/dashboard/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['role'] for entry in response.context['pending_confirmation']], ['VAR'])
+
+
+class CleanSheetTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(name='Zone K')
+        self.home, self.away = make_team(zone), make_team(zone)
+        self.home_keeper = self.keeper(self.home, '20000001')
+        self.away_keeper = self.keeper(self.away, '20000002')
+        self.match = make_match(zone, self.home, self.away)
+
+    def keeper(self, team, id_number):
+        return Player.objects.create(
+            team=team, first_name='Keeper', last_name=id_number, id_number=id_number,
+            date_of_birth=date(2000, 1, 1), position='GK', jersey_number=1,
+        )
+
+    def clean_sheets(self):
+        self.home_keeper.refresh_from_db()
+        self.away_keeper.refresh_from_db()
+        return self.home_keeper.clean_sheets, self.away_keeper.clean_sheets
+
+    def test_clean_sheets_follow_the_result(self):
+        self.match.status, self.match.home_score, self.match.away_score = 'completed', 1, 0
+        self.match.save()
+        self.assertEqual(self.clean_sheets(), (1, 0))
+
+        # Saving again without a result change credits nothing twice
+        self.match.venue = 'Kinoru Stadium'
+        self.match.save()
+        self.assertEqual(self.clean_sheets(), (1, 0))
+
+        self.match.home_score = 0
+        self.match.save(update_fields=['home_score'])
+        self.assertEqual(self.clean_sheets(), (1, 1))
+
+        self.match.away_score = 2
+        self.match.save()
+        self.assertEqual(self.clean_sheets(), (0, 1))
+
+        self.match.status = 'postponed'
+        self.match.save()
+        self.assertEqual(self.clean_sheets(), (0, 0))
+
+
+class WeeklyReportSnapshotTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone W')
+        self.home, self.away = make_team(self.zone), make_team(self.zone)
+        today = timezone.localdate()
+        self.start, self.end = today - timedelta(days=14), today - timedelta(days=1)
+
+    def report(self):
+        return report_data(self.start, self.end, 'manager')
+
+    def test_past_period_is_served_from_its_snapshot(self):
+        make_match(self.zone, self.home, self.away, days=-10, kickoff_time='15:00:00')
+        report = self.report()
+        self.assertEqual(WeeklyReportSnapshot.objects.count(), 1)
+        self.assertEqual(report['matches'][0]['time'], '15:00')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.report(), report)
+
+    def test_period_reaching_today_is_not_stored(self):
+        report_data(self.start, timezone.localdate(), 'manager')
+        self.assertFalse(WeeklyReportSnapshot.objects.exists())
+
+    def test_changed_result_drops_the_snapshot(self):
+        match = make_match(self.zone, self.home, self.away, days=-10)
+        self.report()
+
+        match.home_score = 2
+        match.save()
+
+        self.assertFalse(WeeklyReportSnapshot.objects.exists())
+        self.assertEqual(self.report()['matches'][0]['scores']['home'], 2)
+
+    def test_reschedule_drops_snapshots_covering_either_date(self):
+        match = make_match(self.zone, self.home, self.away, days=-20)
+        cases = [('moved into the period', -5), ('moved out of the period', -30)]
+        for case, days in cases:
+            with self.subTest(case=case):
+                self.report()
+                self.assertTrue(WeeklyReportSnapshot.objects.exists())
+
+                match.match_date = timezone.now() + timedelta(days=days)
+                match.save()
+
+                self.assertFalse(WeeklyReportSnapshot.objects.exists())
+
+    def test_snapshot_leaves_out_who_asked(self):
+        isolate_activity_log(self)
+        make_match(self.zone, self.home, self.away, days=-10)
+        self.client.force_login(User.objects.create_user('report-admin', password='x', is_staff=True))
+        url = reverse('referees:generate_weekly_report')
+        query = {'start_date': self.start.isoformat(), 'end_date': self.end.isoformat()}
+
+        response = self.client.get(url, query)
+
+        self.assertEqual(response.json()['user_role'], 'admin')
+        self.assertNotIn('user_role', WeeklyReportSnapshot.objects.get().data)
+        self.assertEqual(self.client.get(url, query).json(), response.json())
+
+
+class AppointmentExportTests(TestCase):
+    def setUp(self):
+        isolate_activity_log(self)
+        zone = Zone.objects.create(name='Zone X')
+        self.home, self.away = make_team(zone), make_team(zone)
+        user = User.objects.create_user('export-ref', first_name='Jane', last_name='Mwiti')
+        referee = make_referee(user=user)
+        for days in range(3):
+            make_match(zone, self.home, self.away, days=-days, kickoff_time='15:00', referee=referee)
+        today = timezone.localdate()
+        self.query = {'start_date': (today - timedelta(days=5)).isoformat(), 'end_date': today.isoformat()}
+        self.client.force_login(User.objects.create_user('exporter', password='x'))
+
+    def test_rows_come_from_one_query(self):
+        today = timezone.localdate()
+        with self.assertNumQueries(1):
+            rows = list(appointment_rows(today - timedelta(days=5), today))
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0][2:], [
+            f'{self.home.team_name} vs {self.away.team_name}', 'Stadium', 'Zone X', 'Jane Mwiti', 'VACANT', 'VACANT',
+        ])
+
+    def test_csv_is_streamed(self):
+        response = self.client.get(reverse('referees:export_appointments_csv'), self.query)
+
+        self.assertTrue(response.streaming)
+        lines = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertIn('Match Officials Report', lines[0][0])
+        self.assertEqual(lines[1], HEADERS)
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[2][5], 'Jane Mwiti')
+
+    def test_excel_is_written_row_by_row(self):
+        import openpyxl
+
+        response = self.client.get(reverse('referees:export_appointments_excel'), self.query)
+
+        sheet = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        self.assertIn('Match Officials Report', sheet['A1'].value)
+        self.assertEqual([cell.value for cell in sheet[3]], HEADERS)
+        self.assertTrue(sheet['A3'].font.bold)
+        self.assertEqual(sheet.max_row, 6)
+
+
+class PdfReportTests(TestCase):
+    def setUp(self):
+        isolate_activity_log(self)
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        zone = Zone.objects.create(name='Zone P')
+        self.home, self.away = make_team(zone), make_team(zone)
+        self.match = make_match(zone, self.home, self.away, days=-1, kickoff_time='15:00')
+        self.client.force_login(User.objects.create_user('pdf-staff', password='x', is_staff=True))
+
+    def stored_files(self, kind, params):
+        try:
+            return default_storage.listdir(f'{PDF_DIR}/{pdf_key(kind, params)}')[1]
+        except FileNotFoundError:
+            return []
+
+    def test_appointments_pdf_is_rendered_once_and_revalidated(self):
+        today = timezone.localdate()
+        query = {'start_date': (today - timedelta(days=5)).isoformat(), 'end_date': today.isoformat()}
+        url = reverse('referees:export_appointments_pdf')
+
+        self.assertEqual(self.client.get(url, query).status_code, 202)
+        self.assertEqual(self.client.get(url, query).status_code, 202)
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+        run_pending_jobs()
+
+        response = self.client.get(url, query)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, query, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A changed match is a new document: rendered again, the old file dropped
+        self.match.home_score = 3
+        self.match.save()
+        self.assertEqual(self.client.get(url, query, HTTP_IF_NONE_MATCH=etag).status_code, 202)
+        self.assertEqual(BackgroundJob.objects.count(), 2)
+        run_pending_jobs()
+        response = self.client.get(url, query, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(self.stored_files('appointments', query)), 1)
+
+    def test_match_report_digest_follows_goals_and_cards(self):
+        report = MatchReport.objects.create(match=self.match, referee=make_referee())
+        params = {'report_id': report.id}
+        scorer = Player.objects.create(
+            team=self.home, first_name='Striker', last_name='One', id_number='30000001',
+            date_of_birth=date(2000, 1, 1), position='FW', jersey_number=9,
+        )
+        digests = [pdf_digest('match_report', params)]
+
+        goal = MatchGoal.objects.create(match=self.match, team=self.home, player=scorer, minute=10, jersey_number=9)
+        digests.append(pdf_digest('match_report', params))
+        goal.minute = 11
+        goal.save()
+        digests.append(pdf_digest('match_report', params))
+
+        self.assertEqual(len(set(digests)), 3)
+        self.assertEqual(digests[-1], pdf_digest('match_report', params))
+
+    def test_match_report_pdf_is_rendered_by_the_worker(self):
+        report = MatchReport.objects.create(
+            match=self.match, referee=make_referee(last_name='B & C'), referee_comments='Fine <b>\nday',
+        )
+        url = reverse('referees:match_report_pdf', args=[report.id])
+
+        self.assertEqual(self.client.get(url).status_code, 202)
+        run_pending_jobs()
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, BackgroundJob.objects.get().error)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class ManagerDashboardTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Zone R')
+        self.home = make_team(self.zone)
+        self.away = make_team(self.zone)
+        self.now = timezone.make_aware(datetime.combine(timezone.localdate(), time(12)))
+
+    def match_at(self, offset, **kwargs):
+        return make_match(self.zone, self.home, self.away, match_date=self.now + offset, **kwargs)
+
+    def test_today_counts_matches_that_already_kicked_off(self):
+        self.match_at(timedelta(hours=-3))
+        self.match_at(timedelta(hours=4))
+        self.match_at(timedelta(days=1))
+
+        self.assertEqual(build_dashboard(self.now)['stats']['today_matches'], 2)
+
+    def test_match_with_a_declined_official_stays_listed(self):
+        declined = self.match_at(timedelta(days=1))
+        MatchOfficials.objects.create(match=declined, status='APPOINTED', ar1_rejected=True)
+        confirmed = self.match_at(timedelta(days=2))
+        MatchOfficials.objects.create(match=confirmed, status='CONFIRMED')
+        unstaffed = self.match_at(timedelta(days=3))
+
+        data = build_dashboard(self.now)
+
+        self.assertEqual([match['id'] for match in data['urgent_matches']], [unstaffed.id])
+        self.assertEqual(
+            [(match['id'], match['status_display']) for match in data['appointed_matches']],
+            [(declined.id, 'Official Declined'), (confirmed.id, 'Confirmed')],
+        )
+
+    def test_cached_payload_is_dropped_when_appointments_or_matches_change(self):
+        match = self.match_at(timedelta(days=1))
+        officials = MatchOfficials.objects.create(match=match, status='APPOINTED')
+        changes = [
+            ('appointment cancelled', officials.delete),
+            ('match rescheduled', lambda: Match.objects.get(pk=match.pk).save()),
+            ('match deleted', match.delete),
+        ]
+        for change, apply in changes:
+            with self.subTest(change=change):
+                dashboard_data()
+                self.assertIsNotNone(cache.get(CACHE_KEY))
+                apply()
+                self.assertIsNone(cache.get(CACHE_KEY))
@@ -15,6 +15,7 @@ urlpatterns = [
     path('profile/', views.referee_profile, name='referee_profile'),
     path('availability/', views.referee_availability, name='referee_availability'),
     path('report/<int:report_id>/', views.view_report, name='view_report'),
+    path('report/<int:report_id>/pdf/', views.match_report_pdf, name='match_report_pdf'),
     
     # Referee Actions
     path('match/<int:match_id>/confirm/', views.confirm_appointment, name='confirm_appointment'),
@@ -56,6 +57,7 @@ urlpatterns = [
     path('matches/needing-officials/', views.matches_needing_officials, name='matches_needing_officials'),
     path('match/<int:match_id>/appoint/', views.appoint_match_officials, name='appoint_match_officials'),
     path('match/<int:match_id>/replace/<str:role>/', views.replace_referee, name='replace_referee'),
+    path('officials/auto-appoint/', views.auto_appoint_officials, name='auto_appoint_officials'),
     
     # Admin Management
     path('admin/dashboard/', views.admin_referee_dashboard, name='admin_referee_dashboard'),
@@ -72,6 +74,7 @@ urlpatterns = [
     path('api/recent-appointments/', views.api_recent_appointments, name='api_recent_appointments'),
     path('api/available-referees-today/', views.api_available_referees_today, name='api_available_referees_today'),
     path('api/manager-stats/', views.api_manager_stats, name='api_manager_stats'),
+    path('api/manager-dashboard/', views.api_manager_dashboard, name='api_manager_dashboard'),
     path('api/generate-weekly-report/', views.generate_weekly_report, name='generate_weekly_report'),
     
     # HTML Display for Weekly Report
@@ -79,5 +82,6 @@ urlpatterns = [
     
     # Export Endpoints
     path('export/excel/', views.export_appointments_excel, name='export_appointments_excel'),
+    path('export/csv/', views.export_appointments_csv, name='export_appointments_csv'),
     path('export/pdf/', views.export_appointments_pdf, name='export_appointments_pdf'),
 ]
\ No newline at end of file
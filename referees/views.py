@@ -8,10 +8,11 @@ from datetime import timedelta
 from matches.models import Match
 from .models import MatchOfficials, MatchReport, SquadEditRequest
 from tournaments.models import TournamentMatchOfficials, TournamentMatch
+from fkf_league.roles import roles_for
 
 def referees_manager_required(user):
     """Check if user is in Referees Manager group or is staff"""
-    return user.groups.filter(name='Referees Manager').exists() or user.is_staff
+    return roles_for(user).is_referees_manager or user.is_staff
 
 @login_required
 @permission_required('referees.appoint_referees', raise_exception=True)
@@ -159,7 +160,7 @@ from datetime import datetime, timedelta
 from django.utils import timezone
 from matches.models import Match
 from .models import (
-    Referee, MatchReport, MatchOfficials, TeamOfficial, PlayingKit,
+    Referee, MatchReport, MatchOfficials, RefereeAppointment, TeamOfficial, PlayingKit,
     MatchVenueDetails, StartingLineup, ReservePlayer, 
     Substitution, Caution, Expulsion, MatchGoal, RefereeAvailability,
     MatchdaySquad
@@ -297,11 +298,11 @@ def reject_referee(request, referee_id):
 def referee_dashboard(request):
     """Referee dashboard - only for approved referees"""
     # Check if user is a Referees Manager - redirect to manager dashboard
-    if request.user.groups.filter(name='Referees Manager').exists():
+    if roles_for(request.user).is_referees_manager:
         return redirect('referees:matches_needing_officials')
     
     # Check if user is in Referee group
-    if not request.user.groups.filter(name='Referee').exists():
+    if not roles_for(request.user).is_referee:
         messages.error(request, "Access denied. You are not registered as a referee.")
         return redirect('frontend:home')
     
@@ -314,14 +315,9 @@ def referee_dashboard(request):
             ))
             return redirect('frontend:home')
 
-        appointments = MatchOfficials.objects.filter(
-            Q(main_referee=referee) | Q(assistant_1=referee) |
-            Q(assistant_2=referee) | Q(fourth_official=referee) |
-            Q(reserve_referee=referee) | Q(reserve_assistant=referee) |
-            Q(var=referee) | Q(avar1=referee) | Q(match_commissioner=referee)
-        ).select_related('match', 'match__home_team', 'match__away_team', 'match__zone').order_by('match__match_date')
-
-        print(f"DEBUG: Found {appointments.count()} appointments for referee {referee.full_name}")
+        appointments = RefereeAppointment.objects.filter(referee=referee).select_related(
+            'officials', 'match', 'match__home_team', 'match__away_team', 'match__zone'
+        ).order_by('match_date')
 
         upcoming_matches = []
         pending_confirmation = []
@@ -329,34 +325,11 @@ def referee_dashboard(request):
         completed_matches = []
         today = timezone.now().date()
 
-        for appointment in appointments:
-            match = appointment.match
-            role = "Unknown"
-            confirmed = False
-            if appointment.main_referee == referee:
-                role = "REFEREE"
-                confirmed = appointment.main_confirmed
-            elif appointment.assistant_1 == referee:
-                role = "AR1"
-                confirmed = appointment.ar1_confirmed
-            elif appointment.assistant_2 == referee:
-                role = "AR2"
-                confirmed = appointment.ar2_confirmed
-            elif appointment.fourth_official == referee:
-                role = "RESERVE"
-                confirmed = appointment.fourth_confirmed
-            elif appointment.reserve_referee == referee:
-                role = "RESERVE"
-                confirmed = appointment.reserve_confirmed
-            elif appointment.var == referee:
-                role = "VAR"
-                confirmed = appointment.var_confirmed
-            elif appointment.avar1 == referee:
-                role = "AVAR1"
-                confirmed = False
-            elif appointment.match_commissioner == referee:
-                role = "COMMISSIONER"
-                confirmed = appointment.commissioner_confirmed
+        for entry in appointments:
+            appointment = entry.officials
+            match = entry.match
+            role = entry.role
+            confirmed = entry.confirmed
 
             def get_official_display_name(official):
                 if not official:
@@ -400,8 +373,6 @@ def referee_dashboard(request):
             else:
                 completed_matches.append(match_info)
 
-        print(f"DEBUG: Pending: {len(pending_confirmation)}, Current: {len(current_matches)}, Upcoming: {len(upcoming_matches)}, Completed: {len(completed_matches)}")
-
         pending_reports = MatchReport.objects.filter(
             referee=referee,
             status='draft'
@@ -416,7 +387,7 @@ def referee_dashboard(request):
         )
         is_suspended = referee.status == 'suspended'
         suspension_reason = referee.suspension_reason if is_suspended else None
-        is_manager = request.user.groups.filter(name='Referees Manager').exists()
+        is_manager = roles_for(request.user).is_referees_manager
         
         # Get pending squad edit requests for matches where this referee is appointed
         match_ids = appointments.values_list('match_id', flat=True)
@@ -951,12 +922,19 @@ def replace_referee(request, match_id, role):
         
         return redirect('referees:appoint_match_officials', match_id=match.id)
     
-    # Get available referees (excluding current one)
-    available_referees = Referee.objects.filter(
-        status='approved',
-        is_active=True
-    ).exclude(
-        id=current_referee.id if current_referee else None
+    # Get available referees (excluding current one), nearest to the venue first
+    from .appointment_optimizer import nearest_available
+    from .proximity import venue_location, with_distance
+    
+    available_referees = with_distance(
+        Referee.objects.filter(status='approved', is_active=True).exclude(
+            id=current_referee.id if current_referee else None
+        ),
+        venue_location(match),
+    )
+    suggested_referees = nearest_available(
+        match, 'RESERVE' if role == 'FOURTH' else role,
+        exclude=[current_referee.id] if current_referee else [], limit=3,
     )
     
     context = {
@@ -966,6 +944,7 @@ def replace_referee(request, match_id, role):
         'role_name': role_info['name'],
         'current_referee': current_referee,
         'available_referees': available_referees,
+        'suggested_referees': suggested_referees,
         'match_date': match.match_date.date(),
     }
     
@@ -979,11 +958,13 @@ def matches_needing_officials(request):
     # Get matches within 4 days that don't have officials or are pending
     four_days_from_now = timezone.now() + timezone.timedelta(days=4)
     
-    matches = Match.objects.filter(
+    # Appointment state is worked out in SQL (see manager_dashboard.with_officials_state)
+    from .manager_dashboard import with_officials_state
+    matches = with_officials_state(Match.objects.filter(
         match_date__lte=four_days_from_now,
         match_date__gte=timezone.now(),
         status='scheduled'
-    ).select_related('home_team', 'away_team', 'zone').prefetch_related('officials').order_by('round_number', 'match_date')
+    )).select_related('home_team', 'away_team', 'zone', 'officials').order_by('round_number', 'match_date')
     
     # Categorize matches by appointment status
     needs_officials = []
@@ -993,23 +974,12 @@ def matches_needing_officials(request):
     declined_appointments = []
     
     for match in matches:
-        if not hasattr(match, 'officials') or match.officials is None:
+        if match.officials_state == 'needs_officials':
             # Only add to needs_officials if no appointment exists
             match.has_declined = False
             needs_officials.append(match)
         else:
-            # Check if any officials have declined
-            has_declined = any([
-                match.officials.main_rejected,
-                match.officials.ar1_rejected,
-                match.officials.ar2_rejected,
-                match.officials.fourth_rejected,
-                match.officials.reserve_rejected,
-                match.officials.var_rejected,
-                match.officials.commissioner_rejected
-            ])
-            
-            if has_declined:
+            if match.officials_state == 'declined':
                 # Add declined reasons to match object for display
                 match.has_declined = True
                 match.declined_roles = []
@@ -1064,10 +1034,10 @@ def matches_needing_officials(request):
                     })
                 declined_appointments.append(match)
                 # DO NOT add to needs_officials - keep them separate
-            elif match.officials.status == 'APPOINTED':
+            elif match.officials_state == 'pending':
                 appointed_matches.append(match)
                 pending_confirmation.append(match)
-            elif match.officials.status == 'CONFIRMED':
+            elif match.officials_state == 'confirmed':
                 appointed_matches.append(match)
                 confirmed_matches.append(match)
     
@@ -1109,6 +1079,66 @@ def matches_needing_officials(request):
     
     return render(request, 'referees/matches_needing_officials.html', context)
 
+
+# ========== AUTO-APPOINT OFFICIALS ==========
+@login_required
+@permission_required('referees.appoint_referees', raise_exception=True)
+def auto_appoint_officials(request):
+    """Propose officials for every open slot of a zone round and apply the accepted ones"""
+    from teams.models import Zone
+    from .appointment_optimizer import DEFAULT_FIELDS, apply_appointments, plan_appointments
+
+    if request.method == 'POST':
+        rows = []
+        for value in request.POST.getlist('appointments'):
+            try:
+                match_id, field, referee_id = value.split(':')
+                rows.append({'match_id': int(match_id), 'field': field, 'referee_id': int(referee_id)})
+            except ValueError:
+                continue
+        if not rows:
+            messages.warning(request, "⚠️ No appointments were selected.")
+            return redirect(request.get_full_path())
+
+        appointed, errors = apply_appointments(rows, user=request.user)
+        if appointed:
+            messages.success(request, f"✅ {appointed} official(s) appointed.")
+        for error in errors:
+            messages.error(request, f"❌ {error}")
+        return redirect('referees:matches_needing_officials')
+
+    # Officials can only be appointed within 4 days of the match
+    now = timezone.now()
+    matches = Match.objects.filter(
+        match_date__gte=now,
+        match_date__lte=now + timedelta(days=4),
+        status='scheduled',
+    ).select_related('home_team', 'away_team', 'zone')
+
+    zone_id = request.GET.get('zone', '')
+    round_number = request.GET.get('round', '')
+    include_fourth = request.GET.get('include_fourth') == '1'
+    if zone_id.isdigit():
+        matches = matches.filter(zone_id=zone_id)
+    if round_number.isdigit():
+        matches = matches.filter(round_number=round_number)
+
+    fields = DEFAULT_FIELDS + (['fourth_official'] if include_fourth else [])
+    plan = plan_appointments(matches, fields=fields)
+
+    context = {
+        'plan': plan,
+        'zones': Zone.objects.order_by('name'),
+        'rounds': sorted(set(
+            Match.objects.filter(match_date__gte=now, match_date__lte=now + timedelta(days=4), status='scheduled')
+            .values_list('round_number', flat=True)
+        )),
+        'selected_zone': zone_id,
+        'selected_round': round_number,
+        'include_fourth': include_fourth,
+    }
+    return render(request, 'referees/auto_appoint.html', context)
+
 # ========== REFEREE AVAILABILITY ==========
 @login_required
 def referee_availability(request):
@@ -1265,93 +1295,24 @@ def admin_referee_dashboard(request):
 @require_GET
 def api_urgent_matches(request):
     """API: Get urgent matches needing officials (without appointments)"""
-    from django.utils.dateformat import format
-    from datetime import datetime
-    
-    today = timezone.localdate()
-    four_days_from_now = today + timedelta(days=4)
-    
-    # Get matches that don't have ANY officials appointed yet
-    from matches.models import Match
-    all_matches = Match.objects.filter(
-        match_date__date__lte=four_days_from_now,
-        match_date__date__gte=today,
-        status='scheduled'
-    ).prefetch_related('officials').order_by('match_date')
-    
-    # Filter to only include matches without appointments
-    matches_needing_officials = []
-    for match in all_matches:
-        if not hasattr(match, 'officials') or match.officials is None:
-            matches_needing_officials.append(match)
-    
-    # Limit to 10
-    matches = matches_needing_officials[:10]
-    
-    matches_data = []
-    for match in matches:
-        match_date = match.match_date.date() if hasattr(match.match_date, 'date') else match.match_date
-        days_until = (match_date - today).days
-        
-        matches_data.append({
-            'id': match.id,
-            'date': match.match_date.strftime('%d/%m/%Y'),
-            'time': match.kickoff_time or 'TBD',
-            'home_team': match.home_team.team_name,
-            'away_team': match.away_team.team_name,
-            'venue': match.venue,
-            'zone': match.zone.name,
-            'days_until_match': days_until,
-            'status': 'Needs Officials',
-        })
-    
-    return JsonResponse({'matches': matches_data})
+    from .manager_dashboard import dashboard_data
+    return JsonResponse({'matches': dashboard_data()['urgent_matches']})
 
 @login_required
 @permission_required('referees.appoint_referees', raise_exception=True)
 @require_GET
 def api_appointed_matches(request):
     """API: Get all matches with officials appointed"""
-    from django.utils.dateformat import format
-    from datetime import datetime
-    
-    today = timezone.localdate()
-    four_days_from_now = today + timedelta(days=4)
-    
-    # Get all matches within 4 days that have appointments
-    from matches.models import Match
-    all_matches = Match.objects.filter(
-        match_date__date__lte=four_days_from_now,
-        match_date__date__gte=today,
-        status='scheduled'
-    ).prefetch_related('officials').order_by('match_date')
-    
-    # Filter to only include matches WITH appointments
-    appointed_matches = []
-    for match in all_matches:
-        if hasattr(match, 'officials') and match.officials is not None:
-            appointed_matches.append(match)
-    
-    matches_data = []
-    for match in appointed_matches[:15]:  # Limit to 15 most recent
-        officials = match.officials
-        
-        matches_data.append({
-            'id': match.id,
-            'date': match.match_date.strftime('%d/%m/%Y'),
-            'time': match.kickoff_time or 'TBD',
-            'home_team': match.home_team.team_name,
-            'away_team': match.away_team.team_name,
-            'zone': match.zone.name,
-            'round': match.round_number,
-            'referee': officials.main_referee.full_name if officials.main_referee else None,
-            'ar1': officials.assistant_1.full_name if officials.assistant_1 else None,
-            'ar2': officials.assistant_2.full_name if officials.assistant_2 else None,
-            'status': officials.status,
-            'status_display': 'Confirmed' if officials.status == 'CONFIRMED' else 'Pending Confirmation',
-        })
-    
-    return JsonResponse({'matches': matches_data})
+    from .manager_dashboard import dashboard_data
+    return JsonResponse({'matches': dashboard_data()['appointed_matches']})
+
+@login_required
+@permission_required('referees.appoint_referees', raise_exception=True)
+@require_GET
+def api_manager_dashboard(request):
+    """API: Everything the Referees Manager dashboard shows, in one response"""
+    from .manager_dashboard import dashboard_data
+    return JsonResponse(dashboard_data())
 
 @login_required
 @permission_required('referees.appoint_referees', raise_exception=True)
@@ -1386,96 +1347,17 @@ def api_recent_appointments(request):
 @require_GET
 def api_available_referees_today(request):
     """API: Get referees available today"""
-    today = timezone.now().date()
-    
-    # Get referees who are not marked unavailable today
-    available_referees = Referee.objects.filter(
-        status='approved',
-        is_active=True
-    ).exclude(
-        availabilities__date=today,
-        availabilities__is_available=False
-    )[:10]
-    
-    referees_data = []
-    for referee in available_referees:
-        referees_data.append({
-            'id': referee.id,
-            'name': referee.full_name,
-            'initials': f"{referee.first_name[0]}{referee.last_name[0]}",
-            'level': referee.get_level_display() or 'Not set',
-            'county': referee.county or 'Not set',
-        })
-    
-    return JsonResponse({'referees': referees_data})
+    from .manager_dashboard import dashboard_data
+    return JsonResponse({'referees': dashboard_data()['available_referees']})
 
 @login_required
 @permission_required('referees.appoint_referees', raise_exception=True)
 @require_GET
 def api_manager_stats(request):
     """API: Get dashboard statistics for Referees Manager"""
-    today = timezone.now().date()
-    tomorrow = today + timedelta(days=1)
-    next_week = today + timedelta(days=7)
-    now = timezone.now()
-    
-    # Matches needing officials (within 4 days)
-    four_days_from_now = now + timedelta(days=4)
-    needs_officials = Match.objects.filter(
-        match_date__lte=four_days_from_now,
-        match_date__gte=now,
-        status='scheduled'
-    ).exclude(officials__status='CONFIRMED').count()
-    
-    # Matches pending confirmation
-    pending_confirmation = Match.objects.filter(
-        officials__status='APPOINTED',
-        match_date__gte=now
-    ).count()
-    
-    # Available referees
-    available_referees = Referee.objects.filter(
-        status='approved',
-        is_active=True
-    ).exclude(
-        availabilities__date=today,
-        availabilities__is_available=False
-    ).count()
-    
-    # Today's matches
-    today_matches = Match.objects.filter(
-        match_date__date=today,
-        status='scheduled'
-    ).count()
-    
-    # Deadlines
-    appointed_matches = Match.objects.filter(
-        officials__status='APPOINTED',
-        match_date__gte=now
-    ).select_related('officials')
-
-    deadline_today = 0
-    deadline_tomorrow = 0
-    deadline_week = 0
-    for match in appointed_matches:
-        if hasattr(match, 'officials') and match.officials:
-            deadline = match.officials.confirmation_deadline
-            if deadline == today:
-                deadline_today += 1
-            if deadline == tomorrow:
-                deadline_tomorrow += 1
-            if today <= deadline <= next_week:
-                deadline_week += 1
-    
-    return JsonResponse({
-        'needs_officials': needs_officials,
-        'pending_confirmation': pending_confirmation,
-        'available_referees': available_referees,
-        'today_matches': today_matches,
-        'deadline_today': deadline_today,
-        'deadline_tomorrow': deadline_tomorrow,
-        'deadline_week': deadline_week,
-    })
+    from .manager_dashboard import dashboard_data
+    return JsonResponse(dashboard_data()['stats'])
+
 @login_required
 def submit_comprehensive_report(request, match_id):
     """
@@ -1629,38 +1511,10 @@ def submit_comprehensive_report(request, match_id):
         # Handle full-time score submission explicitly
         if 'submit_score' in request.POST and score_form.is_valid():
             score_form.save()
-            # Mark match completed
-            Match.objects.filter(pk=match.pk).update(status='completed')
-            # Update simple league table stats for both teams
-            from matches.models import LeagueTable
-            home = match.home_team
-            away = match.away_team
-            hs = match.home_score
-            ascore = match.away_score
-            home_table, _ = LeagueTable.objects.get_or_create(team=home, zone=home.zone)
-            away_table, _ = LeagueTable.objects.get_or_create(team=away, zone=away.zone)
-            # Only apply if not previously completed (basic safeguard)
-            home_table.matches_played += 1
-            away_table.matches_played += 1
-            home_table.goals_for += hs
-            home_table.goals_against += ascore
-            away_table.goals_for += ascore
-            away_table.goals_against += hs
-            if hs > ascore:
-                home_table.wins += 1
-                away_table.losses += 1
-            elif hs < ascore:
-                away_table.wins += 1
-                home_table.losses += 1
-            else:
-                home_table.draws += 1
-                away_table.draws += 1
-            home_table.goal_difference = home_table.goals_for - home_table.goals_against
-            away_table.goal_difference = away_table.goals_for - away_table.goals_against
-            home_table.calculate_points()
-            away_table.calculate_points()
-            home_table.save()
-            away_table.save()
+            # Mark match completed; the standings engine applies (or corrects)
+            # this result in the league table via the Match post_save signal.
+            match.status = 'completed'
+            match.save(update_fields=['status', 'updated_at'])
             messages.success(request, "Full-time score saved and league table updated.")
             return redirect('referees:submit_comprehensive_report', match_id=match.id)
 
@@ -1952,7 +1806,7 @@ def view_prematch_form(request, form_id):
     
     # Check access permissions
     is_main_referee = False
-    is_manager = request.user.is_staff or request.user.groups.filter(name='Referees Manager').exists()
+    is_manager = request.user.is_staff or roles_for(request.user).is_referees_manager
     is_admin = request.user.is_staff
     
     try:
@@ -2074,7 +1928,7 @@ def pending_prematch_forms_manager(request):
     """List of pre-match forms pending manager approval"""
     from .models import PreMatchMeetingForm
     
-    if not (request.user.is_staff or request.user.groups.filter(name='Referees Manager').exists()):
+    if not (request.user.is_staff or roles_for(request.user).is_referees_manager):
         messages.error(request, "Access denied.")
         return redirect('referees:referee_dashboard')
     
@@ -2091,7 +1945,7 @@ def pending_prematch_forms_manager(request):
 def pending_reports(request):
     """List of reports pending approval (Manager only)"""
     # Check if user is a referees manager or admin
-    if not (request.user.is_staff or request.user.groups.filter(name='Referees Manager').exists()):
+    if not (request.user.is_staff or roles_for(request.user).is_referees_manager):
         messages.error(request, "Only managers can access this page.")
         return redirect('referees:referee_dashboard')
     
@@ -2115,7 +1969,7 @@ def pending_reports(request):
 @login_required
 def approve_report(request, report_id):
     """Approve a match report (Manager only)"""
-    if not (request.user.is_staff or request.user.groups.filter(name='Referees Manager').exists()):
+    if not (request.user.is_staff or roles_for(request.user).is_referees_manager):
         messages.error(request, "Only managers can approve reports.")
         return redirect('referees:referee_dashboard')
     
@@ -2141,7 +1995,7 @@ def approve_report(request, report_id):
 @login_required
 def reject_report(request, report_id):
     """Reject a match report (Manager only)"""
-    if not (request.user.is_staff or request.user.groups.filter(name='Referees Manager').exists()):
+    if not (request.user.is_staff or roles_for(request.user).is_referees_manager):
         messages.error(request, "Only managers can reject reports.")
         return redirect('referees:referee_dashboard')
     
@@ -2177,7 +2031,7 @@ def report_detail_view(request, report_id):
     match = report.match
     
     # Check permissions
-    is_manager = request.user.is_staff or request.user.groups.filter(name='Referees Manager').exists()
+    is_manager = request.user.is_staff or roles_for(request.user).is_referees_manager
     is_referee = hasattr(request.user, 'referee_profile') and request.user.referee_profile == report.referee
     
     if not (is_manager or is_referee):
@@ -2339,132 +2193,19 @@ def generate_weekly_report(request):
             end_date = timezone.now().date()
             start_date = end_date - timedelta(days=30)
         
-        from matches.models import Match
+        from .weekly_report import report_data as weekly_report_data
         
         # Check user role
-        user_groups = [g.name for g in request.user.groups.all()]
-        
-        # Check if user is in Referee Managers group
-        is_manager = any('manager' in g.name.lower() for g in request.user.groups.all()) or \
-                    request.user.groups.filter(name='Referee Managers').exists()
-        
+        roles = roles_for(request.user)
+        user_groups = sorted(roles.group_names)
+        is_manager = any('manager' in name.lower() for name in user_groups)
         is_admin = request.user.is_staff or request.user.is_superuser
-        
-        # Check if user has a referee profile
-        has_referee_profile = hasattr(request.user, 'referee_profile')
-        
-        # Convert dates to timezone-aware datetime objects for filtering
-        from datetime import datetime as dt, time
-        start_datetime = timezone.make_aware(dt.combine(start_date, time.min))
-        end_datetime = timezone.make_aware(dt.combine(end_date, time.max))
-        
-        # Get matches in date range
-        matches = Match.objects.filter(
-            match_date__gte=start_datetime,
-            match_date__lte=end_datetime
-        ).select_related(
-            'home_team', 'away_team', 'zone',
-            'referee', 'assistant_referee_1', 'assistant_referee_2'
-        ).order_by('match_date', 'kickoff_time')
+        referee_profile = roles.referee_profile
         
         if is_manager or is_admin:
             # MANAGER VIEW: Show comprehensive overview
-            
-            # Helper function to get official's name
-            def get_official_name(official):
-                if not official:
-                    return None
-                if hasattr(official, 'user'):
-                    return official.user.get_full_name()
-                elif hasattr(official, 'get_full_name'):
-                    return official.get_full_name()
-                return str(official)
-            
-            # Analyze match status
-            total_matches = matches.count()
-            fully_assigned = 0
-            partially_assigned = 0
-            unassigned = 0
-            
-            matches_data = []
-            for match in matches:
-                # Check assignment status
-                has_referee = match.referee is not None
-                has_ar1 = match.assistant_referee_1 is not None
-                has_ar2 = match.assistant_referee_2 is not None
-                
-                if has_referee and has_ar1 and has_ar2:
-                    fully_assigned += 1
-                    assignment_status = 'fully_assigned'
-                elif has_referee or has_ar1 or has_ar2:
-                    partially_assigned += 1
-                    assignment_status = 'partially_assigned'
-                else:
-                    unassigned += 1
-                    assignment_status = 'unassigned'
-                
-                # Get team names safely
-                home_team_name = match.home_team.team_name if match.home_team else 'Unknown'
-                away_team_name = match.away_team.team_name if match.away_team else 'Unknown'
-                
-                # Format date safely
-                if hasattr(match.match_date, 'isoformat'):
-                    match_date_str = match.match_date.isoformat()
-                else:
-                    match_date_str = str(match.match_date)
-                
-                # Format kickoff_time (it's a CharField, not TimeField)
-                kickoff_time_str = ''
-                if match.kickoff_time:
-                    # Clean up the time string
-                    time_str = str(match.kickoff_time).strip()
-                    if time_str:
-                        # Remove any seconds if present (HH:MM:SS -> HH:MM)
-                        if ':' in time_str:
-                            parts = time_str.split(':')
-                            if len(parts) >= 2:
-                                kickoff_time_str = f"{parts[0]}:{parts[1]}"
-                
-                match_info = {
-                    'id': match.id,
-                    'date': match_date_str,
-                    'time': kickoff_time_str,
-                    'venue': match.venue if hasattr(match, 'venue') else '',
-                    'venue_details': match.venue_details if hasattr(match, 'venue_details') else '',
-                    'zone': match.zone.name if match.zone else '',
-                    'teams': f"{home_team_name} vs {away_team_name}",
-                    'home_team': {
-                        'id': match.home_team.id if match.home_team else None,
-                        'name': home_team_name,
-                        'code': match.home_team.team_code if match.home_team else ''
-                    },
-                    'away_team': {
-                        'id': match.away_team.id if match.away_team else None,
-                        'name': away_team_name,
-                        'code': match.away_team.team_code if match.away_team else ''
-                    },
-                    'assignment_status': assignment_status,
-                    'officials': {
-                        'referee': get_official_name(match.referee),
-                        'assistant_referee_1': get_official_name(match.assistant_referee_1),
-                        'assistant_referee_2': get_official_name(match.assistant_referee_2)
-                    },
-                    'scores': {
-                        'home': match.home_score,
-                        'away': match.away_score
-                    },
-                    'status': match.status,
-                    'needs_attention': assignment_status in ['partially_assigned', 'unassigned']
-                }
-                matches_data.append(match_info)
-            
-            # Count officials needed
-            needs_referee = sum(1 for m in matches if m.referee is None)
-            needs_ar1 = sum(1 for m in matches if m.assistant_referee_1 is None)
-            needs_ar2 = sum(1 for m in matches if m.assistant_referee_2 is None)
-            
-            report_data = {
-                'report_type': 'manager_overview',
+            report_data = weekly_report_data(start_date, end_date, 'manager')
+            report_data.update({
                 'user_role': 'manager' if is_manager else 'admin',
                 'user_info': {
                     'username': request.user.username,
@@ -2472,170 +2213,18 @@ def generate_weekly_report(request):
                     'is_staff': request.user.is_staff,
                     'is_superuser': request.user.is_superuser
                 },
-                'date_range': {
-                    'start': start_date.isoformat(),
-                    'end': end_date.isoformat(),
-                    'days': (end_date - start_date).days + 1
-                },
-                'summary': {
-                    'total_matches': total_matches,
-                    'fully_assigned': fully_assigned,
-                    'partially_assigned': partially_assigned,
-                    'unassigned': unassigned,
-                    'officials_needed': {
-                        'referees': needs_referee,
-                        'assistant_referee_1': needs_ar1,
-                        'assistant_referee_2': needs_ar2,
-                        'total': needs_referee + needs_ar1 + needs_ar2
-                    }
-                },
-                'matches': matches_data,
-                'matches_needing_attention': [
-                    m for m in matches_data if m['needs_attention']
-                ]
-            }
-            
-        elif has_referee_profile:
+            })
+        elif referee_profile:
             # REFEREE VIEW: Show only their assignments
-            referee_profile = request.user.referee_profile
-            
-            # Filter matches for this referee
-            referee_matches = matches.filter(
-                models.Q(referee=referee_profile) |
-                models.Q(assistant_referee_1=referee_profile) |
-                models.Q(assistant_referee_2=referee_profile)
-            )
-            
-            # Helper function to get official's name
-            def get_official_name(official):
-                if not official:
-                    return None
-                if hasattr(official, 'user'):
-                    return official.user.get_full_name()
-                elif hasattr(official, 'get_full_name'):
-                    return official.get_full_name()
-                return str(official)
-            
-            assignments = []
-            for match in referee_matches:
-                # Determine the referee's role in this match
-                if match.referee == referee_profile:
-                    role = 'referee'
-                elif match.assistant_referee_1 == referee_profile:
-                    role = 'assistant_referee_1'
-                else:
-                    role = 'assistant_referee_2'
-                
-                # Get other officials (excluding self)
-                other_officials = {}
-                if match.referee and match.referee != referee_profile:
-                    other_officials['referee'] = get_official_name(match.referee)
-                if match.assistant_referee_1 and match.assistant_referee_1 != referee_profile:
-                    other_officials['assistant_referee_1'] = get_official_name(match.assistant_referee_1)
-                if match.assistant_referee_2 and match.assistant_referee_2 != referee_profile:
-                    other_officials['assistant_referee_2'] = get_official_name(match.assistant_referee_2)
-                
-                # Get team names safely
-                home_team_name = match.home_team.team_name if match.home_team else 'Unknown'
-                away_team_name = match.away_team.team_name if match.away_team else 'Unknown'
-                
-                # Format kickoff_time
-                kickoff_time_str = ''
-                if match.kickoff_time:
-                    time_str = str(match.kickoff_time).strip()
-                    if time_str and ':' in time_str:
-                        parts = time_str.split(':')
-                        if len(parts) >= 2:
-                            kickoff_time_str = f"{parts[0]}:{parts[1]}"
-                
-                assignment_info = {
-                    'id': match.id,
-                    'date': match.match_date.isoformat() if hasattr(match.match_date, 'isoformat') else str(match.match_date),
-                    'time': kickoff_time_str,
-                    'venue': match.venue if hasattr(match, 'venue') else '',
-                    'venue_details': match.venue_details if hasattr(match, 'venue_details') else '',
-                    'zone': match.zone.name if match.zone else '',
-                    'teams': f"{home_team_name} vs {away_team_name}",
-                    'your_role': role.replace('_', ' ').title(),
-                    'other_officials': other_officials,
-                    'scores': {
-                        'home': match.home_score,
-                        'away': match.away_score
-                    },
-                    'status': match.status,
-                    'match_status': 'completed' if match.status == 'completed' else 'upcoming'
-                }
-                assignments.append(assignment_info)
-            
-            # Count by role
-            as_referee = sum(1 for a in assignments if a['your_role'] == 'Referee')
-            as_ar1 = sum(1 for a in assignments if a['your_role'] == 'Assistant Referee 1')
-            as_ar2 = sum(1 for a in assignments if a['your_role'] == 'Assistant Referee 2')
-            
-            report_data = {
-                'report_type': 'referee_assignments',
+            report_data = weekly_report_data(start_date, end_date, 'referee', referee=referee_profile)
+            report_data.update({
                 'user_role': 'referee',
-                'date_range': {
-                    'start': start_date.isoformat(),
-                    'end': end_date.isoformat()
-                },
                 'referee_name': request.user.get_full_name(),
-                'referee_id': referee_profile.id,
-                'summary': {
-                    'total_assignments': len(assignments),
-                    'as_referee': as_referee,
-                    'as_assistant_referee_1': as_ar1,
-                    'as_assistant_referee_2': as_ar2,
-                    'completed': sum(1 for a in assignments if a['match_status'] == 'completed'),
-                    'upcoming': sum(1 for a in assignments if a['match_status'] == 'upcoming')
-                },
-                'assignments': assignments
-            }
-            
+            })
         else:
             # REGULAR USER VIEW
-            matches_data = []
-            for match in matches:
-                home_team_name = match.home_team.team_name if match.home_team else 'Unknown'
-                away_team_name = match.away_team.team_name if match.away_team else 'Unknown'
-                
-                # Format kickoff_time
-                kickoff_time_str = ''
-                if match.kickoff_time:
-                    time_str = str(match.kickoff_time).strip()
-                    if time_str and ':' in time_str:
-                        parts = time_str.split(':')
-                        if len(parts) >= 2:
-                            kickoff_time_str = f"{parts[0]}:{parts[1]}"
-                
-                match_info = {
-                    'id': match.id,
-                    'date': match.match_date.isoformat() if hasattr(match.match_date, 'isoformat') else str(match.match_date),
-                    'time': kickoff_time_str,
-                    'venue': match.venue if hasattr(match, 'venue') else '',
-                    'venue_details': match.venue_details if hasattr(match, 'venue_details') else '',
-                    'zone': match.zone.name if match.zone else '',
-                    'teams': f"{home_team_name} vs {away_team_name}",
-                    'scores': {
-                        'home': match.home_score,
-                        'away': match.away_score
-                    },
-                    'status': match.status
-                }
-                matches_data.append(match_info)
-            
-            report_data = {
-                'report_type': 'public_schedule',
-                'user_role': 'public',
-                'date_range': {
-                    'start': start_date.isoformat(),
-                    'end': end_date.isoformat()
-                },
-                'summary': {
-                    'total_matches': len(matches_data)
-                },
-                'matches': matches_data
-            }
+            report_data = weekly_report_data(start_date, end_date, 'public')
+            report_data['user_role'] = 'public'
         
         return JsonResponse(report_data, safe=False)
         
@@ -2659,223 +2248,57 @@ def weekly_report_display(request):
 @login_required
 def export_appointments_excel(request):
     """Export appointments to Excel"""
-    import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from django.http import HttpResponse
-    from datetime import datetime as dt, time
-    
-    start_date_str = request.GET.get('start_date')
-    end_date_str = request.GET.get('end_date')
-    
-    if start_date_str and end_date_str:
-        start_date = dt.strptime(start_date_str, '%Y-%m-%d').date()
-        end_date = dt.strptime(end_date_str, '%Y-%m-%d').date()
-    else:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-    
-    # Convert to timezone-aware datetime
-    start_datetime = timezone.make_aware(dt.combine(start_date, time.min))
-    end_datetime = timezone.make_aware(dt.combine(end_date, time.max))
-    
-    # Get matches
-    matches = Match.objects.filter(
-        match_date__gte=start_datetime,
-        match_date__lte=end_datetime
-    ).select_related(
-        'home_team', 'away_team', 'zone',
-        'referee', 'assistant_referee_1', 'assistant_referee_2'
-    ).order_by('match_date', 'kickoff_time')
-    
-    # Helper function to get official's name (only approved with user accounts)
-    def get_official_name(official):
-        if not official:
-            return 'VACANT'
-        # Only show referee if approved, has user account, and not suspended
-        if hasattr(official, 'status') and official.status != 'approved':
-            return 'VACANT'
-        if hasattr(official, 'user') and official.user:
-            return official.user.get_full_name() or f"{official.first_name} {official.last_name}"
-        # If no user account, referee is not yet activated
-        return 'VACANT'
-    
-    # Create workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Match Officials Report"
-    
-    # Styling
-    header_fill = PatternFill(start_color="1E3A8A", end_color="1E3A8A", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Title
-    ws.merge_cells('A1:H1')
-    title_cell = ws['A1']
-    title_cell.value = f"FKF Meru League - Match Officials Report ({start_date} to {end_date})"
-    title_cell.font = Font(bold=True, size=14)
-    title_cell.alignment = Alignment(horizontal='center')
-    
-    # Headers
-    headers = ['Date', 'Time', 'Match', 'Venue', 'Zone', 'Referee', 'AR1', 'AR2']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-    
-    # Data
-    row = 4
-    for match in matches:
-        ws.cell(row=row, column=1).value = match.match_date.strftime('%Y-%m-%d') if match.match_date else ''
-        ws.cell(row=row, column=2).value = str(match.kickoff_time) if match.kickoff_time else 'TBD'
-        ws.cell(row=row, column=3).value = f"{match.home_team.team_name} vs {match.away_team.team_name}"
-        ws.cell(row=row, column=4).value = match.venue or match.venue_details or 'TBD'
-        ws.cell(row=row, column=5).value = match.zone.name if match.zone else ''
-        ws.cell(row=row, column=6).value = get_official_name(match.referee)
-        ws.cell(row=row, column=7).value = get_official_name(match.assistant_referee_1)
-        ws.cell(row=row, column=8).value = get_official_name(match.assistant_referee_2)
-        
-        # Apply borders
-        for col in range(1, 9):
-            ws.cell(row=row, column=col).border = border
-        
-        row += 1
-    
-    # Column widths
-    ws.column_dimensions['A'].width = 12
-    ws.column_dimensions['B'].width = 10
-    ws.column_dimensions['C'].width = 35
-    ws.column_dimensions['D'].width = 25
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 20
-    ws.column_dimensions['G'].width = 20
-    ws.column_dimensions['H'].width = 20
-    
-    # Response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    from django.http import FileResponse
+    from .exports import report_period, write_workbook
+    
+    start_date, end_date = report_period(request.GET)
+    return FileResponse(
+        write_workbook(start_date, end_date),
+        as_attachment=True,
+        filename=f"Match_Officials_Report_{start_date}_{end_date}.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     )
-    response['Content-Disposition'] = f'attachment; filename="Match_Officials_Report_{start_date}_{end_date}.xlsx"'
-    wb.save(response)
+
+
+@login_required
+def export_appointments_csv(request):
+    """Export appointments to CSV, streamed row by row"""
+    from django.http import StreamingHttpResponse
+    from .exports import csv_lines, report_period
+    
+    start_date, end_date = report_period(request.GET)
+    response = StreamingHttpResponse(csv_lines(start_date, end_date), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="Match_Officials_Report_{start_date}_{end_date}.csv"'
     return response
 
 
 @login_required
 def export_appointments_pdf(request):
-    """Export appointments to PDF"""
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from django.http import HttpResponse
-    from datetime import datetime as dt, time
-    import io
-    
-    start_date_str = request.GET.get('start_date')
-    end_date_str = request.GET.get('end_date')
-    
-    if start_date_str and end_date_str:
-        start_date = dt.strptime(start_date_str, '%Y-%m-%d').date()
-        end_date = dt.strptime(end_date_str, '%Y-%m-%d').date()
-    else:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-    
-    # Convert to timezone-aware datetime
-    start_datetime = timezone.make_aware(dt.combine(start_date, time.min))
-    end_datetime = timezone.make_aware(dt.combine(end_date, time.max))
-    
-    # Get matches
-    matches = Match.objects.filter(
-        match_date__gte=start_datetime,
-        match_date__lte=end_datetime
-    ).select_related(
-        'home_team', 'away_team', 'zone',
-        'referee', 'assistant_referee_1', 'assistant_referee_2'
-    ).order_by('match_date', 'kickoff_time')
-    
-    # Helper function to get official's name (only approved with user accounts)
-    def get_official_name(official):
-        if not official:
-            return 'VACANT'
-        # Only show referee if approved, has user account, and not suspended
-        if hasattr(official, 'status') and official.status != 'approved':
-            return 'VACANT'
-        if hasattr(official, 'user') and official.user:
-            return official.user.get_full_name() or f"{official.first_name} {official.last_name}"
-        # If no user account, referee is not yet activated
-        return 'VACANT'
-    
-    # Create PDF
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), topMargin=0.5*inch, bottomMargin=0.5*inch)
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#1E3A8A'),
-        spaceAfter=20,
-        alignment=1  # Center
+    """Export appointments to PDF (rendered by the background worker)"""
+    from .exports import report_period
+    from .pdf_reports import pdf_response
+    
+    start_date, end_date = report_period(request.GET)
+    return pdf_response(
+        request, 'appointments',
+        {'start_date': start_date.isoformat(), 'end_date': end_date.isoformat()},
+        f"Match_Officials_Report_{start_date}_{end_date}.pdf",
     )
+
+
+@login_required
+def match_report_pdf(request, report_id):
+    """Printable PDF of a match report (rendered by the background worker)"""
+    from .pdf_reports import pdf_response
     
-    # Title
-    title = Paragraph(f"FKF Meru League - Match Officials Report<br/>{start_date} to {end_date}", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Table data
-    data = [['Date', 'Time', 'Match', 'Venue', 'Referee', 'AR1', 'AR2']]
+    report = get_object_or_404(MatchReport.objects.select_related('referee'), id=report_id)
+    is_manager = request.user.is_staff or roles_for(request.user).is_referees_manager
+    is_referee = report.referee.user_id == request.user.id
+    if not (is_manager or is_referee):
+        messages.error(request, "You don't have permission to view this report.")
+        return redirect('referees:referee_dashboard')
     
-    for match in matches:
-        data.append([
-            match.match_date.strftime('%d/%m/%Y') if match.match_date else '',
-            str(match.kickoff_time)[:5] if match.kickoff_time else 'TBD',
-            f"{match.home_team.team_name}\nvs\n{match.away_team.team_name}",
-            match.venue or match.venue_details or 'TBD',
-            get_official_name(match.referee),
-            get_official_name(match.assistant_referee_1),
-            get_official_name(match.assistant_referee_2)
-        ])
-    
-    # Create table
-    table = Table(data, colWidths=[0.8*inch, 0.6*inch, 2*inch, 1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1E3A8A')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-    ]))
-    
-    elements.append(table)
-    
-    # Build PDF
-    doc.build(elements)
-    
-    # Response
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="Match_Officials_Report_{start_date}_{end_date}.pdf"'
-    return response
+    return pdf_response(request, 'match_report', {'report_id': report.id}, f"Match_Report_{report.id}.pdf")
 @login_required
 @permission_required('referees.submit_match_report', raise_exception=True)
 def view_report(request, report_id):
@@ -0,0 +1,207 @@
+# referees/weekly_report.py
+"""
+Weekly officials report, with snapshots for past periods.
+
+A report covering only days that are over cannot change unless a match in
+it changes, so its JSON is stored in WeeklyReportSnapshot keyed by (start,
+end, view) and served from there. Saving or deleting a match drops the
+snapshots whose range covers its date (before and after a reschedule).
+Reports that reach today or later are always built fresh. User-specific
+fields (who is asking) are added on top of the stored data, never stored.
+"""
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+
+from matches.models import Match
+from .models import WeeklyReportSnapshot
+
+
+def _kickoff(match):
+    # kickoff_time is free text; keep HH:MM when it looks like a time
+    parts = str(match.kickoff_time or '').strip().split(':')
+    return f"{parts[0]}:{parts[1]}" if len(parts) >= 2 else ''
+
+
+def _official_name(official):
+    if not official:
+        return None
+    if official.user_id:
+        return official.user.get_full_name() or official.full_name
+    return official.full_name
+
+
+def _base_match_data(match):
+    home_team_name = match.home_team.team_name if match.home_team else 'Unknown'
+    away_team_name = match.away_team.team_name if match.away_team else 'Unknown'
+    details = getattr(match, 'venue_details', None)
+    return {
+        'id': match.id,
+        'date': match.match_date.isoformat(),
+        'time': _kickoff(match),
+        'venue': match.venue,
+        'venue_details': str(details) if details else '',
+        'zone': match.zone.name if match.zone else '',
+        'teams': f"{home_team_name} vs {away_team_name}",
+        'scores': {
+            'home': match.home_score,
+            'away': match.away_score
+        },
+        'status': match.status,
+    }
+
+
+def _matches(start_date, end_date):
+    return Match.objects.filter(
+        match_date__gte=timezone.make_aware(datetime.combine(start_date, time.min)),
+        match_date__lte=timezone.make_aware(datetime.combine(end_date, time.max)),
+    ).select_related(
+        'home_team', 'away_team', 'zone', 'venue_details',
+        'referee__user', 'assistant_referee_1__user', 'assistant_referee_2__user',
+    ).order_by('match_date', 'kickoff_time')
+
+
+def _date_range(start_date, end_date, with_days=False):
+    date_range = {'start': start_date.isoformat(), 'end': end_date.isoformat()}
+    if with_days:
+        date_range['days'] = (end_date - start_date).days + 1
+    return date_range
+
+
+def build_manager_report(start_date, end_date):
+    counts = {'fully_assigned': 0, 'partially_assigned': 0, 'unassigned': 0}
+    needs = {'referees': 0, 'assistant_referee_1': 0, 'assistant_referee_2': 0}
+    matches_data = []
+    for match in _matches(start_date, end_date):
+        officials = (match.referee, match.assistant_referee_1, match.assistant_referee_2)
+        if all(officials):
+            assignment_status = 'fully_assigned'
+        elif any(officials):
+            assignment_status = 'partially_assigned'
+        else:
+            assignment_status = 'unassigned'
+        counts[assignment_status] += 1
+        for key, official in zip(needs, officials):
+            needs[key] += official is None
+
+        match_info = _base_match_data(match)
+        match_info.update({
+            'home_team': {
+                'id': match.home_team_id,
+                'name': match.home_team.team_name if match.home_team else 'Unknown',
+                'code': match.home_team.team_code if match.home_team else ''
+            },
+            'away_team': {
+                'id': match.away_team_id,
+                'name': match.away_team.team_name if match.away_team else 'Unknown',
+                'code': match.away_team.team_code if match.away_team else ''
+            },
+            'assignment_status': assignment_status,
+            'officials': {
+                'referee': _official_name(match.referee),
+                'assistant_referee_1': _official_name(match.assistant_referee_1),
+                'assistant_referee_2': _official_name(match.assistant_referee_2)
+            },
+            'needs_attention': assignment_status != 'fully_assigned',
+        })
+        matches_data.append(match_info)
+
+    return {
+        'report_type': 'manager_overview',
+        'date_range': _date_range(start_date, end_date, with_days=True),
+        'summary': {
+            'total_matches': len(matches_data),
+            **counts,
+            'officials_needed': {**needs, 'total': sum(needs.values())},
+        },
+        'matches': matches_data,
+        'matches_needing_attention': [m for m in matches_data if m['needs_attention']],
+    }
+
+
+def build_referee_report(start_date, end_date, referee):
+    roles = {
+        'referee_id': 'Referee',
+        'assistant_referee_1_id': 'Assistant Referee 1',
+        'assistant_referee_2_id': 'Assistant Referee 2',
+    }
+    assignments = []
+    for match in _matches(start_date, end_date).filter(
+        Q(referee=referee) | Q(assistant_referee_1=referee) | Q(assistant_referee_2=referee)
+    ):
+        role = next(label for field, label in roles.items() if getattr(match, field) == referee.id)
+        other_officials = {
+            field[:-3]: _official_name(getattr(match, field[:-3]))
+            for field in roles
+            if getattr(match, field) and getattr(match, field) != referee.id
+        }
+        assignment_info = _base_match_data(match)
+        assignment_info.update({
+            'your_role': role,
+            'other_officials': other_officials,
+            'match_status': 'completed' if match.status == 'completed' else 'upcoming',
+        })
+        assignments.append(assignment_info)
+
+    return {
+        'report_type': 'referee_assignments',
+        'date_range': _date_range(start_date, end_date),
+        'referee_id': referee.id,
+        'summary': {
+            'total_assignments': len(assignments),
+            'as_referee': sum(1 for a in assignments if a['your_role'] == 'Referee'),
+            'as_assistant_referee_1': sum(1 for a in assignments if a['your_role'] == 'Assistant Referee 1'),
+            'as_assistant_referee_2': sum(1 for a in assignments if a['your_role'] == 'Assistant Referee 2'),
+            'completed': sum(1 for a in assignments if a['match_status'] == 'completed'),
+            'upcoming': sum(1 for a in assignments if a['match_status'] == 'upcoming')
+        },
+        'assignments': assignments,
+    }
+
+
+def build_public_report(start_date, end_date):
+    matches_data = [_base_match_data(match) for match in _matches(start_date, end_date)]
+    return {
+        'report_type': 'public_schedule',
+        'date_range': _date_range(start_date, end_date),
+        'summary': {'total_matches': len(matches_data)},
+        'matches': matches_data,
+    }
+
+
+def report_data(start_date, end_date, view, referee=None):
+    """
+    Report for ``view`` ('manager', 'referee' or 'public'). Past periods
+    come from (and are saved to) a snapshot.
+    """
+    view_key = f'referee:{referee.id}' if view == 'referee' else view
+    is_past = end_date < timezone.localdate()
+    if is_past:
+        snapshot = WeeklyReportSnapshot.objects.filter(
+            start_date=start_date, end_date=end_date, view=view_key
+        ).values_list('data', flat=True).first()
+        if snapshot is not None:
+            return snapshot
+
+    if view == 'manager':
+        data = build_manager_report(start_date, end_date)
+    elif view == 'referee':
+        data = build_referee_report(start_date, end_date, referee)
+    else:
+        data = build_public_report(start_date, end_date)
+
+    if is_past:
+        WeeklyReportSnapshot.objects.update_or_create(
+            start_date=start_date, end_date=end_date, view=view_key, defaults={'data': data}
+        )
+    return data
+
+
+def invalidate_snapshots(*dates):
+    """Drop the snapshots whose range covers any of ``dates``."""
+    covering = Q()
+    for day in {day for day in dates if day}:
+        covering |= Q(start_date__lte=day, end_date__gte=day)
+    if covering:
+        WeeklyReportSnapshot.objects.filter(covering).delete()
@@ -2,31 +2,25 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import Team, Player, Zone, LeagueSettings, TransferRequest, TransferHistory, TeamOfficial
 from import_export.admin import ImportExportModelAdmin
-from matches.utils.fixture_generator import generate_fixtures_for_zone, regenerate_fixtures_for_zone
+from matches.utils.fixture_generator import queue_zone_fixtures
 from matches.models import Match
 
 # ⬇⬇⬇ NEW ADMIN ACTIONS FOR FIXTURE GENERATION ⬇⬇⬇
 @admin.action(description="⚽ GENERATE FIXTURES for selected zones")
 def action_generate_fixtures(modeladmin, request, queryset):
-    """Super Admin: Manually generate fixtures for zones"""
+    """Super Admin: Queue fixture generation for zones"""
     for zone in queryset:
-        success, message = generate_fixtures_for_zone(zone.id)
-        if success:
-            modeladmin.message_user(request, message)
-        else:
-            modeladmin.message_user(request, f"❌ {zone.name}: {message}", level='error')
+        job = queue_zone_fixtures(zone.id, user=request.user)
+        modeladmin.message_user(request, f"⏳ {zone.name}: fixture generation queued (job #{job.id})")
 
 @admin.action(description="🔄 REGENERATE FIXTURES (delete & recreate)")
 def action_regenerate_fixtures(modeladmin, request, queryset):
-    """Super Admin: Delete and regenerate fixtures"""
+    """Super Admin: Queue deletion and regeneration of fixtures"""
     for zone in queryset:
-        success, message = regenerate_fixtures_for_zone(zone.id)
-        if success:
-            modeladmin.message_user(request, message)
-        else:
-            modeladmin.message_user(request, f"❌ {zone.name}: {message}", level='error')
+        job = queue_zone_fixtures(zone.id, user=request.user, regenerate=True)
+        modeladmin.message_user(request, f"⏳ {zone.name}: fixture regeneration queued (job #{job.id})")
 
-@admin.action(description="✅ APPROVE teams & auto-generate if zone ready")
+@admin.action(description="✅ APPROVE teams & queue fixtures if zone ready")
 def action_approve_teams(modeladmin, request, queryset):
     """Approve teams and trigger fixture generation if zone ready"""
     for team in queryset:
@@ -41,7 +35,8 @@ def action_approve_teams(modeladmin, request, queryset):
     for zone in zones_with_updated_teams:
         approved_count = Team.objects.filter(zone=zone, status='approved').count()
         if approved_count >= 4 and not zone.fixtures_generated:
-            generate_fixtures_for_zone(zone.id)
+            job = queue_zone_fixtures(zone.id, user=request.user)
+            modeladmin.message_user(request, f"⏳ {zone.name}: fixture generation queued (job #{job.id})")
     
     modeladmin.message_user(request, f"✅ Approved {queryset.count()} teams")
 # ⬆⬆⬆ NEW ADMIN ACTIONS FOR FIXTURE GENERATION ⬆⬆⬆
@@ -58,23 +53,17 @@ class ZoneAdmin(admin.ModelAdmin):
     # actions = ['generate_fixtures', 'regenerate_fixtures']
     
     def generate_fixtures(self, request, queryset):
-        """Super Admin: Manually generate fixtures for zones"""
+        """Super Admin: Queue fixture generation for zones"""
         for zone in queryset:
-            success, message = generate_fixtures_for_zone(zone.id)
-            if success:
-                self.message_user(request, message)
-            else:
-                self.message_user(request, f"❌ {zone.name}: {message}", level='error')
+            job = queue_zone_fixtures(zone.id, user=request.user)
+            self.message_user(request, f"⏳ {zone.name}: fixture generation queued (job #{job.id})")
     generate_fixtures.short_description = "⚽ GENERATE FIXTURES for selected zones"
     
     def regenerate_fixtures(self, request, queryset):
-        """Super Admin: Delete and regenerate fixtures"""
+        """Super Admin: Queue deletion and regeneration of fixtures"""
         for zone in queryset:
-            success, message = regenerate_fixtures_for_zone(zone.id)
-            if success:
-                self.message_user(request, message)
-            else:
-                self.message_user(request, f"❌ {zone.name}: {message}", level='error')
+            job = queue_zone_fixtures(zone.id, user=request.user, regenerate=True)
+            self.message_user(request, f"⏳ {zone.name}: fixture regeneration queued (job #{job.id})")
     regenerate_fixtures.short_description = "🔄 REGENERATE FIXTURES (delete & recreate)"
     
     def approved_teams_display(self, obj):
@@ -3,10 +3,11 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render
 from .models import Team, Player, Zone
+from fkf_league.roles import roles_for
 
 def admin_or_league_manager_required(user):
     """Check if user is staff or in League Admin or League Manager group"""
-    return user.is_staff or user.groups.filter(name__in=['League Admin', 'League Manager']).exists()
+    return user.is_staff or roles_for(user).in_group('League Admin', 'League Manager')
 
 @login_required
 @user_passes_test(admin_or_league_manager_required)
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, **kwargs):
+    from .search import PLAYER_INDEX
+    PLAYER_INDEX.ensure()
 
 
 class TeamsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'teams'
+
+    def ready(self):
+        # Full-text index and its triggers live outside the migrations
+        post_migrate.connect(ensure_search_index, sender=self)
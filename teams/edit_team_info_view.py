@@ -2,10 +2,11 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from .models import Team
+from fkf_league.roles import roles_for
 from .forms_edit import TeamEditForm
 
 def league_admin_or_manager(user):
-    return user.is_staff or user.groups.filter(name__in=['League Admin', 'League Manager']).exists()
+    return user.is_staff or roles_for(user).in_group('League Admin', 'League Manager')
 
 @login_required
 @user_passes_test(league_admin_or_manager)
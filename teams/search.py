@@ -0,0 +1,12 @@
+# teams/search.py
+"""Full-text index over player names, ID and licence numbers (see fkf_league.search)."""
+from fkf_league.search import FtsIndex
+
+from .models import Player
+
+
+# Trigram tokens so part of an ID or licence number still matches
+PLAYER_INDEX = FtsIndex(
+    'player_fts', Player, ['first_name', 'last_name', 'id_number', 'fkf_license_number'],
+    tokenize='trigram',
+)
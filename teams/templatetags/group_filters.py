@@ -1,5 +1,7 @@
 from django import template
 
+from fkf_league.roles import roles_for
+
 register = template.Library()
 
 def parse_group_list(value):
@@ -16,4 +18,14 @@ def has_group(user, group_names):
     if user.is_anonymous:
         return False
     group_list = parse_group_list(group_names)
-    return user.groups.filter(name__in=group_list).exists()
+    return roles_for(user).in_group(*group_list)
+
+@register.filter
+def has_any_group(user):
+    """
+    Usage: {% if user|has_any_group %}
+    Returns True if user belongs to at least one group.
+    """
+    if user.is_anonymous:
+        return False
+    return bool(roles_for(user).group_names)
@@ -1,3 +1,105 @@
+from datetime import date
+
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.db import connection
+from django.template import Context, Template
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from fkf_league.roles import roles_for
+from fkf_league.testing import make_team
+from teams.models import Player, Zone
+from teams.search import PLAYER_INDEX
+
+
+class PlayerSearchIndexTests(TestCase):
+    def setUp(self):
+        PLAYER_INDEX.ensure()
+        self.team = make_team(Zone.objects.create(name='Zone S'))
+
+    def player(self, first_name, last_name, id_number, jersey_number, **kwargs):
+        return Player(
+            team=self.team, first_name=first_name, last_name=last_name, id_number=id_number,
+            date_of_birth=date(2000, 1, 1), position='FW', jersey_number=jersey_number, **kwargs
+        )
+
+    def found(self, text):
+        return sorted(PLAYER_INDEX.filter(Player.objects.all(), text).values_list('last_name', flat=True))
+
+    def test_index_follows_bulk_create_update_and_delete(self):
+        Player.objects.bulk_create([
+            self.player('Brian', 'Mwiti', '31234567', 9, fkf_license_number='FKF-2026-0042'),
+            self.player('Kevin', 'Murithi', '29876543', 10),
+        ])
+        self.assertEqual(self.found('mwit'), ['Mwiti'])
+        # Trigram tokens match inside ID and licence numbers
+        self.assertEqual(self.found('2026-004'), ['Mwiti'])
+        self.assertEqual(self.found('987654'), ['Murithi'])
+
+        Player.objects.filter(last_name='Murithi').update(last_name='Gitonga')
+        self.assertEqual(self.found('murithi'), [])
+        self.assertEqual(self.found('gitonga'), ['Gitonga'])
+
+        Player.objects.filter(last_name='Mwiti').delete()
+        self.assertEqual(self.found('mwiti'), [])
+        self.assertEqual([player.last_name for player in PLAYER_INDEX.search('kevin')], ['Gitonga'])
+
+
+class UserRolesTests(TestCase):
+    TEMPLATE = Template(
+        '{% load group_filters %}{% for _ in items %}'
+        '{% if user|has_group:"League Admin,Referee" %}A{% endif %}{% if user|has_any_group %}G{% endif %}'
+        '{% endfor %}'
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user('roles-user', password='x')
+        self.league_admin = Group.objects.create(name='League Admin')
+
+    def render(self, user, count):
+        return self.TEMPLATE.render(Context({'user': user, 'items': range(count)}))
+
+    def test_groups_are_read_once_per_user_object(self):
+        self.user.groups.add(self.league_admin)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.render(self.user, 5), 'AG' * 5)
+            self.assertTrue(roles_for(self.user).is_league_admin)
+            self.assertFalse(roles_for(self.user).is_referee)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(AnonymousUser(), 3), '')
+
+    def test_group_changes_drop_the_cached_roles(self):
+        self.assertFalse(roles_for(self.user).is_league_admin)
+
+        self.user.groups.add(self.league_admin)
+        self.assertTrue(roles_for(self.user).is_league_admin)
+
+        self.user.groups.remove(self.league_admin)
+        self.assertFalse(roles_for(self.user).is_league_admin)
+
+        self.user.groups.set([self.league_admin])
+        self.assertEqual(roles_for(self.user).group_names, {'League Admin'})
+        self.user.groups.clear()
+        self.assertEqual(roles_for(self.user).group_names, frozenset())
+
+    def test_managed_team_is_loaded_once(self):
+        team = make_team(Zone.objects.create(name='Zone M'), manager=self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(roles_for(self.user).managed_team, team)
+            self.assertEqual(roles_for(self.user).managed_team, team)
+
+    def test_page_reads_the_groups_once(self):
+        zone = Zone.objects.create(name='Zone T')
+        for _ in range(3):
+            make_team(zone)
+        self.user.groups.add(self.league_admin)
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('matches:league_tables'))
 
-# Create your tests here.
+        # Every table row checks the League Admin group
+        self.assertContains(response, 'title="Edit League Table"', count=3)
+        group_queries = [query for query in queries.captured_queries if 'auth_user_groups' in query['sql']]
+        self.assertEqual(len(group_queries), 1)
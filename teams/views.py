@@ -7,13 +7,15 @@ from django.db.models import Q
 from django.db import models
 from django.urls import reverse
 from .models import Team, Player, Zone, LeagueSettings, TransferRequest, TeamOfficial
+from .search import PLAYER_INDEX
 from .forms import TeamRegistrationForm, PlayerRegistrationForm, TeamKitForm
 from .officials_forms import TeamOfficialForm
 from payments.models import Payment
+from fkf_league.roles import roles_for
 
 def admin_or_league_manager_required(user):
     """Check if user is staff or in League Admin or League Manager group"""
-    return user.is_staff or user.groups.filter(name__in=['League Admin', 'League Manager']).exists()
+    return user.is_staff or roles_for(user).in_group('League Admin', 'League Manager')
 
 def team_registration(request):
     # Check if team registration is open
@@ -332,7 +334,7 @@ def all_teams(request):
         messages.error(request, "Please log in to access this page.")
         return redirect('login')
 
-    if not (request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name__in=['League Admin', 'League Manager']).exists()):
+    if not (request.user.is_staff or request.user.is_superuser or roles_for(request.user).in_group('League Admin', 'League Manager')):
         messages.error(request, "You don't have permission to access this page.")
         return redirect('dashboard')
 
@@ -1146,12 +1148,7 @@ def admin_manage_players(request):
     
     # Apply filters
     if search_query:
-        players = players.filter(
-            models.Q(first_name__icontains=search_query) |
-            models.Q(last_name__icontains=search_query) |
-            models.Q(id_number__icontains=search_query) |
-            models.Q(fkf_license_number__icontains=search_query)
-        )
+        players = PLAYER_INDEX.filter(players, search_query)
     
     if team_filter:
         players = players.filter(team_id=team_filter)
@@ -1261,6 +1258,34 @@ def admin_unsuspend_player(request, player_id):
     return render(request, 'teams/admin_unsuspend_player.html', context)
 
 
+@login_required
+@user_passes_test(admin_or_league_manager_required)
+def api_search_players(request):
+    """Players matching ?q= (name, ID or FKF license number), best match first"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        limit = 20
+    players = PLAYER_INDEX.search(query, limit, Player.objects.select_related('team')) if query else []
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {
+                'id': player.id,
+                'name': player.full_name,
+                'team': player.team.team_name,
+                'position': player.get_position_display(),
+                'jersey_number': player.jersey_number,
+                'id_number': player.id_number,
+                'fkf_license_number': player.fkf_license_number,
+                'is_suspended': player.is_suspended,
+            }
+            for player in players
+        ],
+    })
+
+
 @login_required
 @user_passes_test(admin_or_league_manager_required)
 def admin_edit_player(request, player_id):
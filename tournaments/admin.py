@@ -14,6 +14,7 @@ from .models import (
     TournamentMatchdaySquad,
     TournamentSquadPlayer,
 )
+from .standings import recompute_tournament_standings
 
 
 class TournamentTeamRegistrationInline(admin.TabularInline):
@@ -33,6 +34,12 @@ class TournamentAdmin(admin.ModelAdmin):
     search_fields = ['name']
     prepopulated_fields = {'slug': ('name',)}
     inlines = [TournamentTeamRegistrationInline, TournamentGroupInline]
+    actions = ['recompute_standings']
+
+    @admin.action(description="📊 Recompute group standings from results")
+    def recompute_standings(self, request, queryset):
+        rows = sum(recompute_tournament_standings(tournament) for tournament in queryset)
+        self.message_user(request, f"✅ Recomputed {rows} standing rows")
 
 
 @admin.register(TournamentTeamRegistration)
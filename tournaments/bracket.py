@@ -0,0 +1,231 @@
+# tournaments/bracket.py
+"""
+Knockout bracket engine.
+
+Every knockout match knows the match its winner feeds into (``next_match``
+and ``next_match_slot``), so recording a result advances the winner with a
+single UPDATE. Byes are resolved when the bracket is generated: a team with
+a bye is written straight into its second-round slot. The rendered bracket
+is kept in the cache as plain dicts and dropped whenever a match changes.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+
+from .models import TournamentMatch
+
+
+# Stage of a round by the number of teams still in it
+STAGE_BY_TEAMS = {
+    2: 'final',
+    4: 'semi_final',
+    8: 'quarter_final',
+    16: 'round_of_16',
+    32: 'round_of_32',
+    64: 'round_of_64',
+}
+STAGE_ORDER = [stage for stage, _ in TournamentMatch.STAGE_CHOICES]
+# Once the next match has started its teams are fixed
+STARTED_STATUSES = ('live', 'completed')
+CACHE_TTL = 300
+
+
+def stage_for(teams_in_round):
+    # There is no stage name for rounds bigger than 64; they share round_of_64
+    return STAGE_BY_TEAMS.get(teams_in_round, 'round_of_64')
+
+
+def _bye_positions(pair_count, byes):
+    # Spread byes over alternate pairs first so two bye teams don't meet
+    # in the second round unless there are more byes than that allows
+    return set(sorted(range(pair_count), key=lambda k: (k % 2, k))[:byes])
+
+
+def link_rounds(rounds):
+    """
+    Feeder links between consecutive rounds: entry i of a round feeds slot
+    'home' (even i) or 'away' (odd i) of match i // 2 in the next round.
+    Entries may be TournamentMatch objects or, for byes, the registration
+    itself, which is placed in its slot immediately. Returns a list of
+    (match, next_match, slot) for the matches.
+    """
+    links = []
+    for current, following in zip(rounds, rounds[1:]):
+        for index, entry in enumerate(current):
+            target = following[index // 2]
+            slot = 'home' if index % 2 == 0 else 'away'
+            if isinstance(entry, TournamentMatch):
+                links.append((entry, target, slot))
+            else:
+                setattr(target, f'{slot}_team', entry)
+    return links
+
+
+def build_knockout(tournament, teams, first_date, interval, venue, first_match_number=1):
+    """
+    Build an unsaved single-elimination bracket for ``teams`` (in seeding
+    order). Returns (fixtures, links) for ``save_bracket``.
+    """
+    bracket_size = 2
+    while bracket_size < len(teams):
+        bracket_size *= 2
+    pair_count = bracket_size // 2
+    bye_positions = _bye_positions(pair_count, bracket_size - len(teams))
+
+    match_num = first_match_number
+    remaining = iter(teams)
+    first_round = []
+    for position in range(pair_count):
+        home = next(remaining)
+        if position in bye_positions:
+            # Bye – home team advances straight into the next round
+            first_round.append(home)
+            continue
+        first_round.append(TournamentMatch(
+            tournament=tournament,
+            stage=stage_for(bracket_size),
+            match_number=match_num,
+            home_team=home,
+            away_team=next(remaining),
+            match_date=first_date,
+            venue=venue,
+        ))
+        match_num += 1
+
+    rounds = [first_round]
+    round_date = first_date
+    teams_in_round = pair_count
+    while teams_in_round >= 2:
+        round_date += timedelta(days=interval)
+        placeholders = []
+        for _ in range(teams_in_round // 2):
+            placeholders.append(TournamentMatch(
+                tournament=tournament,
+                stage=stage_for(teams_in_round),
+                match_number=match_num,
+                match_date=round_date,
+                venue=venue,
+            ))
+            match_num += 1
+        rounds.append(placeholders)
+        teams_in_round //= 2
+
+    links = link_rounds(rounds)
+    fixtures = [entry for round_entries in rounds for entry in round_entries if isinstance(entry, TournamentMatch)]
+    return fixtures, links
+
+
+def save_bracket(tournament, fixtures, links):
+    """
+    Insert ``fixtures`` with one bulk insert and write the feeder links with
+    one bulk update. Runs inside the caller's transaction.
+    """
+    TournamentMatch.objects.bulk_create(fixtures, batch_size=500)
+    if any(match.pk is None for match in fixtures):
+        # Backends that don't return ids from bulk inserts
+        ids = {
+            (stage, number): pk
+            for pk, stage, number in tournament.matches.values_list('id', 'stage', 'match_number')
+        }
+        for match in fixtures:
+            match.pk = ids[(match.stage, match.match_number)]
+
+    for match, target, slot in links:
+        match.next_match_id = target.pk
+        match.next_match_slot = slot
+    TournamentMatch.objects.bulk_update(
+        [match for match, _, _ in links], ['next_match', 'next_match_slot'], batch_size=500
+    )
+    invalidate_bracket(tournament.id)
+    return fixtures
+
+
+def advance_winner(match):
+    """
+    Put the winner of a completed knockout match into its slot of the next
+    match. Returns the winner's registration id, or None when there is
+    nothing to advance (no next match, not completed, or still level); the
+    slot is then emptied, so a result corrected to a draw takes back the
+    team it had advanced. A next match that has started is never changed;
+    callers refuse such a correction first (``locked_next_match``).
+    """
+    if not match.next_match_id:
+        return None
+    winner_id = match.winner_id
+    slot = f'{match.next_match_slot}_team_id'
+    changed = TournamentMatch.objects.filter(pk=match.next_match_id).exclude(
+        status__in=STARTED_STATUSES,
+    ).exclude(**{slot: winner_id}).update(**{slot: winner_id})
+    if changed:
+        invalidate_bracket(match.tournament_id)
+    return winner_id
+
+
+def locked_next_match(match):
+    """
+    The next match of ``match`` if it has started with another team in
+    ``match``'s slot than ``match``'s current winner, else None. Recording
+    that result would swap a team into a match already played.
+    """
+    if not match.next_match_id:
+        return None
+    slot = f'{match.next_match_slot}_team_id'
+    return TournamentMatch.objects.filter(
+        pk=match.next_match_id, status__in=STARTED_STATUSES,
+    ).exclude(**{slot: match.winner_id}).first()
+
+
+def _cache_key(tournament_id):
+    return f'tournaments:bracket:{tournament_id}'
+
+
+def invalidate_bracket(tournament_id):
+    cache.delete(_cache_key(tournament_id))
+
+
+def _team_data(registration):
+    if registration is None:
+        return None
+    return {'id': registration.id, 'name': registration.display_name}
+
+
+def _build_bracket(tournament):
+    matches = tournament.matches.exclude(stage='group').select_related(
+        'home_team__team', 'home_team__external_team',
+        'away_team__team', 'away_team__external_team',
+    ).order_by('match_number')
+
+    rounds = {}
+    for match in matches:
+        stage = rounds.setdefault(match.stage, {
+            'stage': match.stage,
+            'name': match.get_stage_display(),
+            'matches': [],
+        })
+        stage['matches'].append({
+            'id': match.id,
+            'match_number': match.match_number,
+            'match_date': match.match_date.isoformat(),
+            'venue': match.venue,
+            'status': match.status,
+            'home': _team_data(match.home_team),
+            'away': _team_data(match.away_team),
+            'home_score': match.home_score,
+            'away_score': match.away_score,
+            'home_penalties': match.home_penalties,
+            'away_penalties': match.away_penalties,
+            'winner_id': match.winner_id,
+            'next_match_id': match.next_match_id,
+            'next_match_slot': match.next_match_slot,
+        })
+    return sorted(rounds.values(), key=lambda stage: STAGE_ORDER.index(stage['stage']))
+
+
+def bracket_data(tournament):
+    """Knockout rounds in play order, each {'stage', 'name', 'matches': [...]}; JSON-ready."""
+    key = _cache_key(tournament.id)
+    data = cache.get(key)
+    if data is None:
+        data = _build_bracket(tournament)
+        cache.set(key, data, CACHE_TTL)
+    return data
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:43
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_points_and_positions(apps, schema_editor):
+    TournamentGroupStanding = apps.get_model('tournaments', 'TournamentGroupStanding')
+    TournamentGroupStanding.objects.update(
+        points=F('won') * 3 + F('drawn'),
+        goal_difference=F('goals_for') - F('goals_against'),
+    )
+    # Plain points/GD/GF order; head-to-head is applied on the next recompute
+    rows = list(TournamentGroupStanding.objects.order_by('group_id', '-points', '-goal_difference', '-goals_for', 'id'))
+    positions = {}
+    for row in rows:
+        positions[row.group_id] = positions.get(row.group_id, 0) + 1
+        row.position = positions[row.group_id]
+    TournamentGroupStanding.objects.bulk_update(rows, ['position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0003_tournamentmatch_extra_time_duration_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tournamentgroupstanding',
+            options={'ordering': ['position', '-points', '-goal_difference', '-goals_for']},
+        ),
+        migrations.AddField(
+            model_name='tournamentgroupstanding',
+            name='goal_difference',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournamentgroupstanding',
+            name='points',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournamentgroupstanding',
+            name='position',
+            field=models.PositiveIntegerField(default=0, help_text='Rank in the group after tie-breakers.'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentgroupstanding',
+            index=models.Index(fields=['group', 'position'], name='group_standing_position_idx'),
+        ),
+        migrations.RunPython(backfill_points_and_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0004_group_standing_points'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='next_match',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feeder_matches', to='tournaments.tournamentmatch'),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='next_match_slot',
+            field=models.CharField(blank=True, choices=[('home', 'Home'), ('away', 'Away')], max_length=4),
+        ),
+        migrations.AlterField(
+            model_name='tournamentmatch',
+            name='stage',
+            field=models.CharField(choices=[('group', 'Group Stage'), ('round_of_64', 'Round of 64'), ('round_of_32', 'Round of 32'), ('round_of_16', 'Round of 16'), ('quarter_final', 'Quarter Final'), ('semi_final', 'Semi Final'), ('third_place', 'Third Place Playoff'), ('final', 'Final')], default='group', max_length=20),
+        ),
+    ]
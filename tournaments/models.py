@@ -351,18 +351,18 @@ class TournamentGroupStanding(models.Model):
     lost = models.PositiveIntegerField(default=0)
     goals_for = models.PositiveIntegerField(default=0)
     goals_against = models.PositiveIntegerField(default=0)
+    # Stored so standings can be sorted in SQL; kept up to date by
+    # tournaments.standings.recompute_group_standings
+    points = models.IntegerField(default=0)
+    goal_difference = models.IntegerField(default=0)
+    position = models.PositiveIntegerField(default=0, help_text="Rank in the group after tie-breakers.")
 
     class Meta:
         unique_together = ('group', 'team_registration')
-        ordering = ['-won', '-goals_for', 'goals_against']
-
-    @property
-    def points(self):
-        return self.won * 3 + self.drawn
-
-    @property
-    def goal_difference(self):
-        return self.goals_for - self.goals_against
+        ordering = ['position', '-points', '-goal_difference', '-goals_for']
+        indexes = [
+            models.Index(fields=['group', 'position'], name='group_standing_position_idx'),
+        ]
 
     def __str__(self):
         return f"{self.team_registration.team} – {self.group}"
@@ -374,6 +374,7 @@ class TournamentGroupStanding(models.Model):
 class TournamentMatch(models.Model):
     STAGE_CHOICES = [
         ('group', 'Group Stage'),
+        ('round_of_64', 'Round of 64'),
         ('round_of_32', 'Round of 32'),
         ('round_of_16', 'Round of 16'),
         ('quarter_final', 'Quarter Final'),
@@ -390,6 +391,11 @@ class TournamentMatch(models.Model):
         ('cancelled', 'Cancelled'),
     ]
 
+    SLOT_CHOICES = [
+        ('home', 'Home'),
+        ('away', 'Away'),
+    ]
+
     tournament = models.ForeignKey(
         Tournament, on_delete=models.CASCADE, related_name='matches'
     )
@@ -402,6 +408,14 @@ class TournamentMatch(models.Model):
         help_text="Sequence number within the stage."
     )
 
+    # Knockout bracket: the winner of this match plays in ``next_match_slot``
+    # of ``next_match``
+    next_match = models.ForeignKey(
+        'self', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='feeder_matches',
+    )
+    next_match_slot = models.CharField(max_length=4, choices=SLOT_CHOICES, blank=True)
+
     home_team = models.ForeignKey(
         TournamentTeamRegistration, on_delete=models.CASCADE,
         related_name='home_tournament_matches', null=True, blank=True,
@@ -473,6 +487,18 @@ class TournamentMatch(models.Model):
             return self.away_team
         return None  # draw in group stage
 
+    @property
+    def winner_id(self):
+        """Id of the winning registration, without loading it."""
+        if self.status != 'completed':
+            return None
+        if self.home_penalties is not None and self.away_penalties is not None:
+            if self.home_penalties != self.away_penalties:
+                return self.home_team_id if self.home_penalties > self.away_penalties else self.away_team_id
+        if self.home_score != self.away_score:
+            return self.home_team_id if self.home_score > self.away_score else self.away_team_id
+        return None
+
 
 # ---------------------------------------------------------------------------
 #  TOURNAMENT GOAL  (supports league + external players)
@@ -0,0 +1,149 @@
+# tournaments/standings.py
+"""
+Set-based group standings.
+
+A recompute reads the totals of every requested group with one aggregate
+query (home and away sides combined with UNION ALL), stores points and goal
+difference on the standing rows and ranks each group with the tie-breaker
+pipeline: points, then head-to-head points, GD and GF among the tied teams,
+then overall GD and GF. The number of queries does not depend on how many
+groups or teams are recomputed.
+"""
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, When
+
+from .models import TournamentGroupStanding, TournamentMatch
+
+
+STAT_FIELDS = ['played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'points', 'goal_difference']
+
+
+def _completed_group_matches(group_ids):
+    return TournamentMatch.objects.filter(
+        group_id__in=group_ids, status='completed',
+        home_team__isnull=False, away_team__isnull=False,
+    )
+
+
+def _side_totals(completed, team, scored, conceded):
+    return completed.values('group_id', team_id=F(team)).annotate(
+        played_count=Count('id'),
+        won_count=Sum(Case(When(**{f'{scored}__gt': F(conceded)}, then=1), default=0)),
+        drawn_count=Sum(Case(When(**{scored: F(conceded)}, then=1), default=0)),
+        lost_count=Sum(Case(When(**{f'{scored}__lt': F(conceded)}, then=1), default=0)),
+        scored_total=Sum(scored),
+        conceded_total=Sum(conceded),
+    ).order_by()
+
+
+def group_totals(group_ids):
+    """{(group_id, team_registration_id): {field: value}} from completed group matches."""
+    completed = _completed_group_matches(group_ids)
+    home = _side_totals(completed, 'home_team_id', 'home_score', 'away_score')
+    away = _side_totals(completed, 'away_team_id', 'away_score', 'home_score')
+
+    totals = {}
+    for row in home.union(away, all=True):
+        stats = totals.setdefault((row['group_id'], row['team_id']), dict.fromkeys(STAT_FIELDS, 0))
+        stats['played'] += row['played_count']
+        stats['won'] += row['won_count']
+        stats['drawn'] += row['drawn_count']
+        stats['lost'] += row['lost_count']
+        stats['goals_for'] += row['scored_total']
+        stats['goals_against'] += row['conceded_total']
+    for stats in totals.values():
+        stats['points'] = stats['won'] * 3 + stats['drawn']
+        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+    return totals
+
+
+def _mini_table(team_ids, results):
+    """Points, GD and GF of ``team_ids`` counting only matches between them."""
+    table = {team_id: [0, 0, 0] for team_id in team_ids}
+    for home, away, home_score, away_score in results:
+        if home not in table or away not in table:
+            continue
+        for team_id, scored, conceded in ((home, home_score, away_score), (away, away_score, home_score)):
+            entry = table[team_id]
+            entry[0] += 3 if scored > conceded else 1 if scored == conceded else 0
+            entry[1] += scored - conceded
+            entry[2] += scored
+    return table
+
+
+def rank_group(rows, results):
+    """
+    Order one group's standing rows and set their ``position``. ``results``
+    are the group's completed matches as (home_id, away_id, home_score,
+    away_score) and are only consulted for teams level on points.
+    """
+    ranked = []
+    by_points = sorted(rows, key=lambda row: -row.points)
+    for _, tied in groupby(by_points, key=lambda row: row.points):
+        tied = list(tied)
+        if len(tied) > 1:
+            mini = _mini_table({row.team_registration_id for row in tied}, results)
+            tied.sort(key=lambda row: (
+                [-value for value in mini[row.team_registration_id]],
+                -row.goal_difference,
+                -row.goals_for,
+                row.team_registration_id,
+            ))
+        ranked.extend(tied)
+    for position, row in enumerate(ranked, 1):
+        row.position = position
+    return ranked
+
+
+def recompute_group_standings(group_ids):
+    """
+    Rewrite the standing rows of ``group_ids`` from their completed matches,
+    creating rows for teams that have results but no standing yet.
+    Returns the number of rows written.
+    """
+    group_ids = list(set(group_ids))
+    if not group_ids:
+        return 0
+    totals = group_totals(group_ids)
+
+    with transaction.atomic():
+        rows = list(TournamentGroupStanding.objects.select_for_update().filter(group_id__in=group_ids))
+        existing = {(row.group_id, row.team_registration_id) for row in rows}
+        missing = [
+            TournamentGroupStanding(group_id=group_id, team_registration_id=team_id)
+            for group_id, team_id in totals
+            if (group_id, team_id) not in existing
+        ]
+
+        by_group = {}
+        for row in rows + missing:
+            stats = totals.get((row.group_id, row.team_registration_id), {})
+            for field in STAT_FIELDS:
+                setattr(row, field, stats.get(field, 0))
+            by_group.setdefault(row.group_id, []).append(row)
+
+        # Head-to-head results are only needed where teams are level on points
+        tied_groups = [
+            group_id for group_id, group_rows in by_group.items()
+            if len({row.points for row in group_rows}) < len(group_rows)
+        ]
+        results = {}
+        if tied_groups:
+            for group_id, *result in _completed_group_matches(tied_groups).values_list(
+                'group_id', 'home_team_id', 'away_team_id', 'home_score', 'away_score'
+            ):
+                results.setdefault(group_id, []).append(result)
+
+        for group_id, group_rows in by_group.items():
+            rank_group(group_rows, results.get(group_id, []))
+
+        TournamentGroupStanding.objects.bulk_create(missing, batch_size=500)
+        TournamentGroupStanding.objects.bulk_update(rows, STAT_FIELDS + ['position'], batch_size=500)
+    return len(rows) + len(missing)
+
+
+def recompute_tournament_standings(tournament):
+    """Recompute every group of ``tournament``."""
+    return recompute_group_standings(tournament.groups.values_list('id', flat=True))
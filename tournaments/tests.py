@@ -1,3 +1,289 @@
+from collections import Counter
+from datetime import date, timedelta
+from itertools import combinations
+
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from fkf_league.testing import isolate_activity_log, make_team
+from teams.models import Zone
+from tournaments import views
+from tournaments.bracket import advance_winner, bracket_data, build_knockout, locked_next_match, save_bracket
+from tournaments.models import (
+    Tournament, TournamentGroupStanding, TournamentMatch, TournamentTeamRegistration,
+)
+from tournaments.standings import rank_group, recompute_group_standings, recompute_tournament_standings
+
+
+class KnockoutBracketTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(
+            name='Meru Cup', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1),
+            registration_deadline=timezone.now(), format='knockout',
+        )
+        self.zone = Zone.objects.create(name='Cup Zone')
+
+    def make_bracket(self, size):
+        registrations = [
+            TournamentTeamRegistration.objects.create(
+                tournament=self.tournament, team=make_team(self.zone), status='approved',
+            )
+            for _ in range(size)
+        ]
+        fixtures, links = build_knockout(self.tournament, registrations, timezone.now(), 7, 'Kinoru Stadium')
+        save_bracket(self.tournament, fixtures, links)
+        return registrations, list(self.tournament.matches.order_by('match_number'))
+
+    def play(self, match, home_score, away_score, **kwargs):
+        match.status = 'completed'
+        match.home_score, match.away_score = home_score, away_score
+        for field, value in kwargs.items():
+            setattr(match, field, value)
+        match.save()
+        return advance_winner(match)
+
+    def test_bracket_links_every_match_to_one_free_slot(self):
+        for size in (2, 5, 8, 13):
+            with self.subTest(size=size):
+                TournamentMatch.objects.all().delete()
+                registrations, matches = self.make_bracket(size)
+
+                self.assertEqual(len(matches), size - 1)
+                finals = [match for match in matches if match.next_match_id is None]
+                self.assertEqual(len(finals), 1)
+                feeds = Counter((match.next_match_id, match.next_match_slot) for match in matches if match.next_match_id)
+                self.assertLessEqual(set(feeds.values()), {1})
+                # Each slot is filled up front (first round or bye) or fed by
+                # exactly one earlier match, never both
+                for match in matches:
+                    for slot in ('home', 'away'):
+                        filled = getattr(match, f'{slot}_team_id') is not None
+                        self.assertNotEqual(filled, (match.id, slot) in feeds)
+                placed = [team for match in matches for team in (match.home_team_id, match.away_team_id) if team]
+                self.assertEqual(sorted(placed), sorted(registration.id for registration in registrations))
+
+    def test_winner_advances_and_correction_to_a_draw_takes_it_back(self):
+        _, matches = self.make_bracket(4)
+        semi = matches[0]
+
+        self.assertEqual(self.play(semi, 0, 2), semi.away_team_id)
+        final = TournamentMatch.objects.get(pk=semi.next_match_id)
+        self.assertEqual(getattr(final, f'{semi.next_match_slot}_team_id'), semi.away_team_id)
+
+        self.assertIsNone(self.play(semi, 2, 2))
+        final.refresh_from_db()
+        self.assertIsNone(getattr(final, f'{semi.next_match_slot}_team_id'))
+
+    def test_penalties_decide_a_level_match(self):
+        _, matches = self.make_bracket(4)
+        semi = matches[1]
+
+        winner = self.play(semi, 1, 1, home_penalties=4, away_penalties=3)
+
+        self.assertEqual(winner, semi.home_team_id)
+        final = TournamentMatch.objects.get(pk=semi.next_match_id)
+        self.assertEqual(getattr(final, f'{semi.next_match_slot}_team_id'), semi.home_team_id)
+
+    def test_bracket_data_follows_results(self):
+        _, matches = self.make_bracket(4)
+        self.assertEqual([entry['stage'] for entry in bracket_data(self.tournament)], ['semi_final', 'final'])
+
+        self.play(matches[0], 3, 0)
+
+        final = bracket_data(self.tournament)[-1]['matches'][0]
+        self.assertEqual(final[matches[0].next_match_slot]['id'], matches[0].home_team_id)
+
+    def test_played_next_match_is_never_changed(self):
+        _, matches = self.make_bracket(4)
+        first, second = matches[0], matches[1]
+        self.play(first, 0, 2)
+        self.play(second, 1, 0)
+        final = TournamentMatch.objects.get(pk=first.next_match_id)
+        final.status, final.home_score, final.away_score = 'completed', 1, 0
+        final.save()
+
+        for correction in [(3, 0), (1, 1)]:
+            with self.subTest(correction=correction):
+                first.home_score, first.away_score = correction
+                self.assertEqual(locked_next_match(first), final)
+                advance_winner(first)
+                final.refresh_from_db()
+                self.assertEqual(getattr(final, f'{first.next_match_slot}_team_id'), first.away_team_id)
+
+        # A correction that keeps the same winner is fine
+        first.home_score, first.away_score = 1, 4
+        self.assertIsNone(locked_next_match(first))
+
+    def test_result_form_refuses_a_correction_behind_a_played_match(self):
+        isolate_activity_log(self)
+        self.client.force_login(User.objects.create_superuser('cup-admin', 'cup@example.com', 'x'))
+        _, matches = self.make_bracket(4)
+        semi = matches[0]
+        self.play(semi, 0, 2)
+        TournamentMatch.objects.filter(pk=semi.next_match_id).update(status='completed', home_score=2, away_score=0)
+
+        response = self.client.post(reverse('tournaments:record_result', args=[semi.pk]), {
+            'home_score': 3, 'away_score': 0, 'home_penalties': '', 'away_penalties': '',
+        })
+
+        self.assertIn('already been played', str(list(get_messages(response.wsgi_request))[0]))
+        semi.refresh_from_db()
+        self.assertEqual((semi.home_score, semi.away_score), (0, 2))
+
+
+class ScheduleGenerationTests(TestCase):
+    def setUp(self):
+        self.zone = Zone.objects.create(name='Cup Zone')
+        self.first_date = timezone.now()
+
+    def make_tournament(self, fmt, size, group_count=4):
+        tournament = Tournament.objects.create(
+            name=f'{fmt} cup', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1),
+            registration_deadline=timezone.now(), format=fmt, group_count=group_count,
+        )
+        registrations = [
+            TournamentTeamRegistration.objects.create(
+                tournament=tournament, team=make_team(self.zone), status='approved',
+            )
+            for _ in range(size)
+        ]
+        return tournament, registrations
+
+    def assert_round_robin(self, matches, registrations):
+        pairs = Counter(frozenset((match.home_team_id, match.away_team_id)) for match in matches)
+        expected = {frozenset((a.id, b.id)) for a, b in combinations(registrations, 2)}
+        self.assertEqual(set(pairs), expected)
+        self.assertEqual(set(pairs.values()), {1})
+        per_day = Counter(
+            (match.match_date, team) for match in matches for team in (match.home_team_id, match.away_team_id)
+        )
+        self.assertEqual(set(per_day.values()), {1})
+
+    def test_group_stage_is_written_in_bulk(self):
+        tournament, registrations = self.make_tournament('group_knockout', 16)
+
+        # Groups, their re-read, memberships, standings, matches, then the
+        # knockout feeder links and the bracket cache entry
+        with self.assertNumQueries(7):
+            views._generate_group_knockout_fixtures(tournament, registrations, self.first_date, 7, 'Kinoru')
+
+        groups = list(tournament.groups.order_by('name'))
+        self.assertEqual([group.name for group in groups], ['Group A', 'Group B', 'Group C', 'Group D'])
+        self.assertEqual(TournamentGroupStanding.objects.filter(group__tournament=tournament).count(), 16)
+        for group in groups:
+            members = list(group.teams.all())
+            self.assertEqual(len(members), 4)
+            self.assert_round_robin(tournament.matches.filter(group=group), members)
+        self.assertEqual(
+            list(tournament.matches.exclude(stage='group').values_list('stage', flat=True).order_by('match_number')),
+            ['quarter_final'] * 4 + ['semi_final'] * 2 + ['final'],
+        )
+        numbers = list(tournament.matches.values_list('match_number', flat=True))
+        self.assertEqual(sorted(numbers), list(range(1, len(numbers) + 1)))
+
+    def test_knockout_date_follows_the_longest_group(self):
+        tournament, registrations = self.make_tournament('group_knockout', 10)
+
+        views._generate_group_knockout_fixtures(tournament, registrations, self.first_date, 7, 'Kinoru')
+
+        # Groups of 3 need 3 rounds (one bye each), groups of 2 just one
+        self.assertEqual(sorted(group.teams.count() for group in tournament.groups.all()), [2, 2, 3, 3])
+        quarter_final_dates = set(tournament.matches.filter(stage='quarter_final').values_list('match_date', flat=True))
+        self.assertEqual(quarter_final_dates, {self.first_date + timedelta(days=7 * 4)})
+
+    def test_round_robin_pairs_every_team_once(self):
+        tournament, registrations = self.make_tournament('round_robin', 7)
+
+        with self.assertNumQueries(1):
+            views._generate_round_robin_fixtures(tournament, registrations, self.first_date, 7, 'Kinoru')
+
+        self.assert_round_robin(tournament.matches.all(), registrations)
+
+    def test_regenerating_replaces_the_schedule(self):
+        isolate_activity_log(self)
+        self.client.force_login(User.objects.create_superuser('cup-admin', 'cup@example.com', 'x'))
+        tournament, registrations = self.make_tournament('round_robin', 6)
+        url = reverse('tournaments:generate_fixtures', args=[tournament.slug])
+        data = {'first_match_date': '2026-03-01T15:00', 'days_between_rounds': 7, 'venue': 'Kinoru'}
+
+        self.client.post(url, data)
+        self.client.post(url, data)
+
+        self.assert_round_robin(tournament.matches.all(), registrations)
+
+
+class GroupStandingsTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(
+            name='Group Cup', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1),
+            registration_deadline=timezone.now(), format='group_knockout', group_count=2,
+        )
+        zone = Zone.objects.create(name='Cup Zone')
+        registrations = [
+            TournamentTeamRegistration.objects.create(tournament=self.tournament, team=make_team(zone), status='approved')
+            for _ in range(8)
+        ]
+        views._generate_group_knockout_fixtures(self.tournament, registrations, timezone.now(), 7, 'Kinoru')
+        self.group_a, self.group_b = self.tournament.groups.order_by('name')
+
+    def play(self, group, scores):
+        matches = list(group.matches.order_by('match_number'))
+        for match, (home_score, away_score) in zip(matches, scores):
+            TournamentMatch.objects.filter(pk=match.pk).update(
+                status='completed', home_score=home_score, away_score=away_score,
+            )
+        return matches
+
+    def standings(self, group):
+        return list(group.standings.order_by('position'))
+
+    def test_totals_and_positions(self):
+        matches = self.play(self.group_a, [(2, 0)] + [(1, 1)] * 5)
+
+        self.assertEqual(recompute_tournament_standings(self.tournament), 8)
+
+        rows = self.standings(self.group_a)
+        self.assertEqual([row.position for row in rows], [1, 2, 3, 4])
+        self.assertEqual((rows[0].team_registration_id, rows[0].points), (matches[0].home_team_id, 5))
+        self.assertEqual((rows[0].won, rows[0].drawn, rows[0].goal_difference), (1, 2, 2))
+        self.assertEqual((rows[-1].team_registration_id, rows[-1].points), (matches[0].away_team_id, 2))
+        self.assertEqual(sum(row.played for row in rows), 12)
+        self.assertEqual({row.points for row in self.standings(self.group_b)}, {0})
+
+    def test_query_count_does_not_grow_with_the_groups(self):
+        self.play(self.group_a, [(1, 0)] * 6)
+        with CaptureQueriesContext(connection) as one_group:
+            recompute_group_standings([self.group_a.id])
+
+        self.play(self.group_b, [(1, 0)] * 6)
+        with CaptureQueriesContext(connection) as both_groups:
+            recompute_tournament_standings(self.tournament)
+
+        self.assertEqual(len(both_groups), len(one_group) + 1)  # + the group id lookup
+
+    def test_missing_standing_row_is_created(self):
+        matches = self.play(self.group_a, [(3, 0)])
+        TournamentGroupStanding.objects.filter(team_registration_id=matches[0].home_team_id).delete()
+
+        recompute_group_standings([self.group_a.id])
+
+        row = TournamentGroupStanding.objects.get(team_registration_id=matches[0].home_team_id)
+        self.assertEqual((row.points, row.position), (3, 1))
+
+    def test_head_to_head_breaks_a_points_tie(self):
+        class Row:
+            def __init__(self, team_id, points, goal_difference, goals_for):
+                self.team_registration_id = team_id
+                self.points, self.goal_difference, self.goals_for = points, goal_difference, goals_for
 
-# Create your tests here.
+        beaten = Row(2, 3, 5, 6)
+        winner = Row(1, 3, 0, 1)
+        self.assertEqual([row.team_registration_id for row in rank_group([beaten, winner], [(1, 2, 1, 0)])], [1, 2])
+        # Without a meeting between them, overall goal difference decides
+        self.assertEqual([row.team_registration_id for row in rank_group([winner, beaten], [])], [2, 1])
+        self.assertEqual((beaten.position, winner.position), (1, 2))
@@ -9,6 +9,8 @@ urlpatterns = [
     path('<slug:slug>/', views.tournament_detail, name='tournament_detail'),
     path('<slug:slug>/fixtures/', views.tournament_fixtures, name='tournament_fixtures'),
     path('<slug:slug>/standings/', views.tournament_standings, name='tournament_standings'),
+    path('<slug:slug>/bracket/', views.tournament_bracket, name='tournament_bracket'),
+    path('<slug:slug>/bracket.json', views.tournament_bracket_json, name='tournament_bracket_json'),
 
     # ── League team manager actions ───────────────────────────────────────
     path('<slug:slug>/register/', views.register_team, name='register_team'),
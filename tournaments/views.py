@@ -1,12 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from django.http import JsonResponse
 from django.contrib.auth.models import User, Group
 from django.utils import timezone
-from django.db.models import Q, Sum
+from django.db import transaction
+from django.db.models import Prefetch, Q, Sum
 from datetime import timedelta
 import random
-import math
 
 from django.contrib.auth import login as auth_login
 
@@ -39,15 +40,20 @@ from .forms import (
     GenerateFixturesForm,
 )
 from teams.models import Team, Player
+from fkf_league.roles import roles_for
+from .standings import recompute_group_standings
+from .bracket import (
+    advance_winner, bracket_data, build_knockout, invalidate_bracket, link_rounds, locked_next_match, save_bracket,
+)
 
 
 # ── permission helpers ────────────────────────────────────────────────────
 def admin_required(user):
-    return user.is_superuser or user.groups.filter(name='League Admin').exists()
+    return user.is_superuser or roles_for(user).is_league_admin
 
 
 def team_manager_required(user):
-    return user.groups.filter(name='Team Managers').exists() or user.is_superuser
+    return roles_for(user).is_team_manager or user.is_superuser
 
 
 # ══════════════════════════════════════════════════════════════════════════
@@ -88,11 +94,27 @@ def tournament_fixtures(request, slug):
     return render(request, 'tournaments/tournament_fixtures.html', context)
 
 
+def tournament_bracket(request, slug):
+    """Knockout bracket, rendered from the cached bracket data."""
+    tournament = get_object_or_404(Tournament, slug=slug)
+    context = {'tournament': tournament, 'bracket': bracket_data(tournament)}
+    return render(request, 'tournaments/tournament_bracket.html', context)
+
+
+def tournament_bracket_json(request, slug):
+    """Same bracket data as JSON, for client-side rendering."""
+    tournament = get_object_or_404(Tournament, slug=slug)
+    return JsonResponse({'tournament': tournament.slug, 'rounds': bracket_data(tournament)})
+
+
 def tournament_standings(request, slug):
     """Group standings for a tournament."""
     tournament = get_object_or_404(Tournament, slug=slug)
+    # Rows are stored already ranked (tie-breakers applied on recompute)
     groups = tournament.groups.prefetch_related(
-        'standings__team_registration__team'
+        Prefetch('standings', queryset=TournamentGroupStanding.objects.select_related(
+            'team_registration__team', 'team_registration__external_team'
+        ))
     ).order_by('name')
     context = {'tournament': tournament, 'groups': groups}
     return render(request, 'tournaments/tournament_standings.html', context)
@@ -518,9 +540,20 @@ def record_result(request, match_pk):
         if form.is_valid():
             match = form.save(commit=False)
             match.status = 'completed'
+            locked = locked_next_match(match)
+            if locked:
+                messages.error(
+                    request,
+                    f'❌ This result changes who plays in match #{locked.match_number}, which has already '
+                    f'been played. Reset that match before correcting this one.'
+                )
+                return redirect('tournaments:tournament_fixtures', slug=match.tournament.slug)
             match.save()
             if match.group and match.home_team and match.away_team:
-                _update_group_standing(match)
+                recompute_group_standings([match.group_id])
+            invalidate_bracket(match.tournament_id)
+            if match.next_match_id and advance_winner(match) is None:
+                messages.warning(request, '⚠️ No winner yet – record penalties to advance a team.')
             messages.success(request, '✅ Result recorded.')
             return redirect('tournaments:tournament_fixtures', slug=match.tournament.slug)
     else:
@@ -592,23 +625,25 @@ def generate_fixtures(request, slug):
     if request.method == 'POST':
         form = GenerateFixturesForm(request.POST)
         if form.is_valid():
-            # Delete existing fixtures if any
-            if existing_match_count > 0:
-                tournament.matches.all().delete()
-                tournament.groups.all().delete()
-
             first_date = form.cleaned_data['first_match_date']
             interval = form.cleaned_data['days_between_rounds']
             venue = form.cleaned_data['venue'] or tournament.venue
 
-            if tournament.format == 'knockout':
-                _generate_knockout_fixtures(tournament, approved_regs, first_date, interval, venue)
-            elif tournament.format == 'group_knockout':
-                _generate_group_knockout_fixtures(tournament, approved_regs, first_date, interval, venue)
-            elif tournament.format == 'round_robin':
-                _generate_round_robin_fixtures(tournament, approved_regs, first_date, interval, venue)
-            else:
-                _generate_round_robin_fixtures(tournament, approved_regs, first_date, interval, venue)
+            # Replace the old schedule all-or-nothing
+            with transaction.atomic():
+                # Delete existing fixtures if any
+                if existing_match_count > 0:
+                    tournament.matches.all().delete()
+                    tournament.groups.all().delete()
+
+                if tournament.format == 'knockout':
+                    _generate_knockout_fixtures(tournament, approved_regs, first_date, interval, venue)
+                elif tournament.format == 'group_knockout':
+                    _generate_group_knockout_fixtures(tournament, approved_regs, first_date, interval, venue)
+                elif tournament.format == 'round_robin':
+                    _generate_round_robin_fixtures(tournament, approved_regs, first_date, interval, venue)
+                else:
+                    _generate_round_robin_fixtures(tournament, approved_regs, first_date, interval, venue)
 
             messages.success(request, f'✅ Fixtures generated for {tournament.name}!')
             return redirect('tournaments:tournament_fixtures', slug=slug)
@@ -624,126 +659,94 @@ def generate_fixtures(request, slug):
     return render(request, 'tournaments/generate_fixtures.html', context)
 
 
-def _generate_knockout_fixtures(tournament, teams, first_date, interval, venue):
-    """Generate single-elimination bracket."""
-    random.shuffle(teams)
-    n = len(teams)
-
-    # Pad to next power of 2 for byes
-    bracket_size = 1
-    while bracket_size < n:
-        bracket_size *= 2
-
-    # Determine first round name
-    stage_map = {
-        2: 'final', 4: 'semi_final', 8: 'quarter_final',
-        16: 'round_of_16', 32: 'round_of_32',
-    }
-    first_stage = stage_map.get(bracket_size, 'round_of_32')
-
-    match_num = 1
-    current_date = first_date
+def _round_robin_rounds(teams):
+    """
+    Circle-method pairings for ``teams``: a list of rounds, each a list of
+    (home, away) registrations. Odd counts get a bye each round.
+    """
+    team_list = list(teams)
+    if len(team_list) < 2:
+        return []
+    if len(team_list) % 2 == 1:
+        team_list.append(None)
+    n = len(team_list)
+
+    rounds = []
+    for _ in range(n - 1):
+        rounds.append([
+            (team_list[i], team_list[n - 1 - i])
+            for i in range(n // 2)
+            if team_list[i] and team_list[n - 1 - i]
+        ])
+        # Rotate (keep first element fixed)
+        team_list = [team_list[0]] + [team_list[-1]] + team_list[1:-1]
+    return rounds
 
-    for i in range(0, bracket_size, 2):
-        home = teams[i] if i < n else None
-        away = teams[i + 1] if (i + 1) < n else None
 
-        if home and away:
-            TournamentMatch.objects.create(
-                tournament=tournament,
-                stage=first_stage,
-                match_number=match_num,
-                home_team=home,
-                away_team=away,
-                match_date=current_date,
-                venue=venue,
-            )
-        elif home and not away:
-            # Bye – home team advances, create placeholder for next round
-            pass
-        match_num += 1
-
-    # Create placeholder matches for subsequent rounds
-    rounds_remaining = int(math.log2(bracket_size)) - 1
-    stage_sequence = ['round_of_16', 'quarter_final', 'semi_final', 'final']
-    # Find starting index in sequence
-    try:
-        idx = stage_sequence.index(first_stage) + 1
-    except ValueError:
-        idx = 0
-
-    for r in range(rounds_remaining):
-        current_date += timedelta(days=interval)
-        stage = stage_sequence[idx + r] if (idx + r) < len(stage_sequence) else 'final'
-        matches_in_round = bracket_size // (2 ** (r + 2))
-        for m in range(matches_in_round):
-            TournamentMatch.objects.create(
-                tournament=tournament,
-                stage=stage,
-                match_number=match_num,
-                match_date=current_date,
-                venue=venue,
-            )
-            match_num += 1
+def _generate_knockout_fixtures(tournament, teams, first_date, interval, venue):
+    """Generate single-elimination bracket with byes resolved and feeder links."""
+    random.shuffle(teams)
+    fixtures, links = build_knockout(tournament, teams, first_date, interval, venue)
+    return save_bracket(tournament, fixtures, links)
 
 
 def _generate_group_knockout_fixtures(tournament, teams, first_date, interval, venue):
-    """Generate group stage fixtures + empty knockout placeholders."""
+    """
+    Generate group stage fixtures + empty knockout placeholders.
+    Groups, memberships, standings and matches are each written with one
+    bulk insert; group membership is kept in memory, not re-queried.
+    """
     random.shuffle(teams)
     group_count = tournament.group_count or 4
 
-    # Distribute teams into groups
-    groups = []
-    for g in range(group_count):
-        group_obj = TournamentGroup.objects.create(
-            tournament=tournament,
-            name=f"Group {chr(65 + g)}",  # A, B, C, …
-        )
-        groups.append(group_obj)
+    # Create the groups, then read them back once for their ids
+    names = [f"Group {chr(65 + g)}" for g in range(group_count)]  # A, B, C, …
+    TournamentGroup.objects.bulk_create([
+        TournamentGroup(tournament=tournament, name=name) for name in names
+    ])
+    groups_by_name = {group.name: group for group in tournament.groups.all()}
+    groups = [groups_by_name[name] for name in names]
 
+    # Distribute teams into groups
+    members = {group.id: [] for group in groups}
     for idx, team_reg in enumerate(teams):
-        g = groups[idx % group_count]
-        g.teams.add(team_reg)
-        TournamentGroupStanding.objects.create(
-            group=g, team_registration=team_reg,
-        )
+        members[groups[idx % group_count].id].append(team_reg)
+
+    Membership = TournamentGroup.teams.through
+    Membership.objects.bulk_create([
+        Membership(tournamentgroup_id=group_id, tournamentteamregistration_id=team_reg.id)
+        for group_id, group_teams in members.items()
+        for team_reg in group_teams
+    ], batch_size=500)
+    TournamentGroupStanding.objects.bulk_create([
+        TournamentGroupStanding(group_id=group_id, team_registration=team_reg)
+        for group_id, group_teams in members.items()
+        for team_reg in group_teams
+    ], batch_size=500)
 
     # Generate round-robin fixtures within each group
+    fixtures = []
     match_num = 1
     current_date = first_date
+    total_rounds = 0
 
     for group_obj in groups:
-        group_teams = list(group_obj.teams.all())
-        n = len(group_teams)
-        if n < 2:
-            continue
-
-        if n % 2 == 1:
-            group_teams.append(None)
-            n = len(group_teams)
-
-        total_rounds = n - 1
-        rd = 0
-        for round_idx in range(total_rounds):
-            round_date = current_date + timedelta(days=interval * rd)
-            for i in range(n // 2):
-                t1 = group_teams[i]
-                t2 = group_teams[n - 1 - i]
-                if t1 and t2:
-                    TournamentMatch.objects.create(
-                        tournament=tournament,
-                        group=group_obj,
-                        stage='group',
-                        match_number=match_num,
-                        home_team=t1,
-                        away_team=t2,
-                        match_date=round_date,
-                        venue=venue,
-                    )
-                    match_num += 1
-            # Rotate (keep first fixed)
-            group_teams = [group_teams[0]] + [group_teams[-1]] + group_teams[1:-1]
-            rd += 1
+        rounds = _round_robin_rounds(members[group_obj.id])
+        total_rounds = max(total_rounds, len(rounds))
+        for round_idx, pairs in enumerate(rounds):
+            round_date = current_date + timedelta(days=interval * round_idx)
+            for t1, t2 in pairs:
+                fixtures.append(TournamentMatch(
+                    tournament=tournament,
+                    group=group_obj,
+                    stage='group',
+                    match_number=match_num,
+                    home_team=t1,
+                    away_team=t2,
+                    match_date=round_date,
+                    venue=venue,
+                ))
+                match_num += 1
 
     # Determine knockout stage based on number of groups
     total_qualified = group_count * 2  # top 2 per group
@@ -754,85 +757,48 @@ def _generate_group_knockout_fixtures(tournament, teams, first_date, interval, v
 
     ko_date = current_date + timedelta(days=interval * (total_rounds + 1))
     matches_in_round = total_qualified // 2
+    ko_rounds = []
     for stage_name in stages:
+        ko_round = []
         for _ in range(matches_in_round):
-            TournamentMatch.objects.create(
+            ko_round.append(TournamentMatch(
                 tournament=tournament,
                 stage=stage_name,
                 match_number=match_num,
                 match_date=ko_date,
                 venue=venue,
-            )
+            ))
             match_num += 1
+        ko_rounds.append(ko_round)
+        fixtures.extend(ko_round)
         matches_in_round //= 2
         ko_date += timedelta(days=interval)
 
+    return save_bracket(tournament, fixtures, link_rounds(ko_rounds))
+
 
 def _generate_round_robin_fixtures(tournament, teams, first_date, interval, venue):
     """Generate single round-robin fixtures."""
     random.shuffle(teams)
-    n = len(teams)
-    team_list = list(teams)
 
-    if n % 2 == 1:
-        team_list.append(None)
-        n = len(team_list)
-
-    total_rounds = n - 1
+    fixtures = []
     match_num = 1
-
-    for round_idx in range(total_rounds):
+    for round_idx, pairs in enumerate(_round_robin_rounds(teams)):
         round_date = first_date + timedelta(days=interval * round_idx)
-        for i in range(n // 2):
-            t1 = team_list[i]
-            t2 = team_list[n - 1 - i]
-            if t1 and t2:
-                TournamentMatch.objects.create(
-                    tournament=tournament,
-                    stage='group',
-                    match_number=match_num,
-                    home_team=t1,
-                    away_team=t2,
-                    match_date=round_date,
-                    venue=venue,
-                )
-                match_num += 1
-        # Rotate (keep first element fixed)
-        team_list = [team_list[0]] + [team_list[-1]] + team_list[1:-1]
-
-
-def _update_group_standing(match):
-    """Recalculate group standing row for both teams after a result."""
-    for team_reg in [match.home_team, match.away_team]:
-        standing, _ = TournamentGroupStanding.objects.get_or_create(
-            group=match.group, team_registration=team_reg,
-        )
-        team_matches = TournamentMatch.objects.filter(
-            group=match.group, status='completed',
-        ).filter(Q(home_team=team_reg) | Q(away_team=team_reg))
-
-        w = d = l = gf = ga = 0
-        for m in team_matches:
-            if m.home_team == team_reg:
-                sf, sa = m.home_score, m.away_score
-            else:
-                sf, sa = m.away_score, m.home_score
-            gf += sf
-            ga += sa
-            if sf > sa:
-                w += 1
-            elif sf == sa:
-                d += 1
-            else:
-                l += 1
+        for t1, t2 in pairs:
+            fixtures.append(TournamentMatch(
+                tournament=tournament,
+                stage='group',
+                match_number=match_num,
+                home_team=t1,
+                away_team=t2,
+                match_date=round_date,
+                venue=venue,
+            ))
+            match_num += 1
 
-        standing.played = w + d + l
-        standing.won = w
-        standing.drawn = d
-        standing.lost = l
-        standing.goals_for = gf
-        standing.goals_against = ga
-        standing.save()
+    TournamentMatch.objects.bulk_create(fixtures, batch_size=500)
+    return fixtures
 
 
 # ══════════════════════════════════════════════════════════════════════════
@@ -1111,6 +1077,7 @@ def edit_tournament_match(request, match_pk):
                 pass
 
         match.save()
+        invalidate_bracket(match.tournament_id)
         messages.success(request, f'Match #{match.match_number} updated.')
         return redirect('tournaments:tournament_fixtures', slug=match.tournament.slug)
 